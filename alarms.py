@@ -0,0 +1,228 @@
+import numpy as np
+
+from engine import MODES, MODE_OFF
+
+LIMIT_HI = 0
+LIMIT_LO = 1
+RATE = 2
+DEVIATION = 3
+DISCRETE = 4
+
+RATE_DIRECTIONS = {"rise": 1, "fall": -1, "both": 0}
+
+RAISE = "raise"
+CLEAR = "clear"
+
+STATE_ACTIVE = 1
+STATE_ACKED = 2
+STATE_SHELVED = 4
+
+
+class AlarmEngine:
+    def __init__(self, db):
+        self.db = db
+        self.names = []
+        self.messages = []
+        self.lookup = {}
+        self._spec = {k: [] for k in ("kind", "tag", "ref", "limit", "deadband", "on_delay", "off_delay", "priority", "direction")}
+        self._dirty_index = True
+        self.events = []
+        self.time = 0.0
+        self._prev = None
+        self._exported = None
+
+    def _add(self, name, kind, tag, ref=-1, limit=0.0, deadband=0.0, on_delay=0.0, off_delay=0.0,
+             priority=1, message="", direction=0):
+        if name in self.lookup:
+            raise ValueError(f"Alarm już istnieje: {name}")
+        self.lookup[name] = len(self.names)
+        self.names.append(name)
+        self.messages.append(message or name)
+        for key, value in (("kind", kind), ("tag", self.db.handle(tag)),
+                           ("ref", self.db.handle(ref) if isinstance(ref, str) else ref),
+                           ("limit", limit), ("deadband", deadband), ("on_delay", on_delay),
+                           ("off_delay", off_delay), ("priority", priority), ("direction", direction)):
+            self._spec[key].append(value)
+        self._dirty_index = True
+        return self.lookup[name]
+
+    def add_high(self, name, tag, limit, **opts):
+        return self._add(name, LIMIT_HI, tag, limit=limit, **opts)
+
+    def add_low(self, name, tag, limit, **opts):
+        return self._add(name, LIMIT_LO, tag, limit=limit, **opts)
+
+    def add_rate(self, name, tag, limit, direction="both", **opts):
+        if direction not in RATE_DIRECTIONS:
+            raise ValueError(f"Nieznany kierunek zmiany: {direction}")
+        return self._add(name, RATE, tag, limit=limit, direction=RATE_DIRECTIONS[direction], **opts)
+
+    def add_deviation(self, name, tag, ref, limit, **opts):
+        return self._add(name, DEVIATION, tag, ref=ref, limit=limit, **opts)
+
+    def add_state(self, name, tag, state, **opts):
+        return self._add(name, DISCRETE, tag, limit=state, **opts)
+
+    def _build(self):
+        spec = self._spec
+        n = len(self.names)
+        old = getattr(self, "cond", np.zeros(0, dtype=bool))
+        self.kind = np.array(spec["kind"], dtype=np.int8)
+        self.tag = np.array(spec["tag"], dtype=np.int64)
+        self.ref = np.array(spec["ref"], dtype=np.int64)
+        self.limit = np.array(spec["limit"], dtype=float)
+        self.deadband = np.array(spec["deadband"], dtype=float)
+        self.on_delay = np.array(spec["on_delay"], dtype=float)
+        self.off_delay = np.array(spec["off_delay"], dtype=float)
+        self.priority = np.array(spec["priority"], dtype=np.int8)
+        self.direction = np.array(spec["direction"], dtype=np.int8)
+
+        def grow(arr, fill, dtype):
+            out = np.full(n, fill, dtype=dtype)
+            out[:len(arr)] = arr
+            return out
+
+        self.cond = grow(old, False, bool)
+        self.since = grow(getattr(self, "since", ()), self.time, float)
+        self.active = grow(getattr(self, "active", ()), False, bool)
+        self.acked = grow(getattr(self, "acked", ()), True, bool)
+        self.shelved_until = grow(getattr(self, "shelved_until", ()), -np.inf, float)
+
+        size = len(self.db)
+        inputs = np.concatenate([self.tag, self.ref[self.ref >= 0]])
+        owners = np.concatenate([np.arange(n), np.nonzero(self.ref >= 0)[0]])
+        order = np.argsort(inputs, kind="stable")
+        self._by_tag = owners[order]
+        self._tag_start = np.searchsorted(inputs[order], np.arange(size + 1))
+        self._always = np.nonzero(self.kind == RATE)[0]
+        self._dirty_index = False
+
+    def _rules_for(self, handles):
+        starts = self._tag_start[handles]
+        counts = self._tag_start[handles + 1] - starts
+        total = counts.sum()
+        if not total:
+            return np.zeros(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+        return self._by_tag[offsets]
+
+    def attach(self, engine):
+        engine.observers.append(self.evaluate)
+
+    def export(self, prefix="alarm."):
+        self._exported = np.array([self.db.register(prefix + name, kind=int) for name in self.names], dtype=np.int64)
+        return self
+
+    def follow(self, engine):
+        engine.observers.append(self.sync)
+
+    def sync(self, t):
+        if self._dirty_index:
+            self._build()
+        state = np.frombuffer(self.db.values)[self._exported].astype(np.int64)
+        self.time = t
+        self.active = (state & STATE_ACTIVE) > 0
+        self.acked = (state & STATE_ACKED) > 0
+        self.shelved_until = np.where(state & STATE_SHELVED, np.inf, -np.inf)
+
+    def evaluate(self, t):
+        values = np.frombuffer(self.db.values)
+        if self._dirty_index or len(self._tag_start) != len(values) + 1:
+            self._build()
+        if self._prev is None or len(self._prev) != len(values):
+            self._prev = values.copy()
+            idx = np.arange(len(self.names))
+        else:
+            changed = np.nonzero(values != self._prev)[0]
+            idx = np.unique(self._rules_for(changed))
+            waiting = np.nonzero(self.cond != self.active)[0]
+            rates = self._always[self.cond[self._always] | (values[self.tag[self._always]] != self._prev[self.tag[self._always]])]
+            if len(waiting) or len(rates):
+                idx = np.union1d(idx, np.concatenate([waiting, rates]))
+        dt = t - self.time
+        self.time = t
+        if len(idx):
+            self._step(idx, values, dt, t)
+        if self._exported is not None:
+            values[self._exported] = (self.active * STATE_ACTIVE + self.acked * STATE_ACKED
+                                      + (self.shelved_until > t) * STATE_SHELVED)
+        np.copyto(self._prev, values)
+        del values
+
+    def _step(self, idx, values, dt, t):
+        kind = self.kind[idx]
+        v = values[self.tag[idx]]
+        limit = self.limit[idx]
+        x = np.where(kind == LIMIT_HI, v - limit, limit - v)
+        rate = kind == RATE
+        if rate.any():
+            change = (v[rate] - self._prev[self.tag[idx[rate]]]) / max(dt, 1e-12)
+            direction = self.direction[idx[rate]]
+            x[rate] = np.where(direction == 0, np.abs(change), direction * change) - limit[rate]
+        dev = kind == DEVIATION
+        if dev.any():
+            x[dev] = np.abs(v[dev] - values[self.ref[idx[dev]]]) - limit[dev]
+        disc = kind == DISCRETE
+        if disc.any():
+            x[disc] = np.where(v[disc] == limit[disc], 1.0, -np.inf)
+
+        cond = self.cond[idx]
+        new_cond = np.where(x > 0, True, np.where(x < -self.deadband[idx], False, cond))
+        flipped = new_cond != cond
+        self.cond[idx] = new_cond
+        self.since[idx[flipped]] = t
+
+        active = self.active[idx]
+        held = t - self.since[idx] + 1e-9
+        raise_ = new_cond & ~active & (held >= self.on_delay[idx])
+        clear = ~new_cond & active & (held >= self.off_delay[idx])
+        for i in idx[raise_]:
+            self.active[i] = True
+            self.acked[i] = False
+            self.events.append((t, self.names[i], RAISE))
+        for i in idx[clear]:
+            self.active[i] = False
+            self.events.append((t, self.names[i], CLEAR))
+
+    def ack(self, name=None):
+        if self._dirty_index:
+            self._build()
+        if name is None:
+            self.acked[:] = True
+        else:
+            self.acked[self.lookup[name]] = True
+
+    def shelve(self, name, until):
+        if self._dirty_index:
+            self._build()
+        self.shelved_until[self.lookup[name]] = until
+
+    def unshelve(self, name):
+        self.shelve(name, -np.inf)
+
+    def visible(self):
+        if self._dirty_index:
+            self._build()
+        shown = np.nonzero((self.active | ~self.acked) & (self.shelved_until <= self.time))[0]
+        shown = shown[np.lexsort((shown, -self.priority[shown]))]
+        return [(self.names[i], self.messages[i], bool(self.active[i]), bool(self.acked[i])) for i in shown]
+
+
+def plant_alarms(alarms, unit=""):
+    p = unit + "." if unit else ""
+    alarms.add_low(p + "wegiel_niski", p + "silo.amount", 20.0, deadband=2.0, message="Niski stan węgla")
+    for tank in ("w1", "w2", "wr"):
+        alarms.add_low(f"{p}{tank}_niski", f"{p}{tank}.level", 50.0, deadband=2.0, on_delay=1.0,
+                       message=f"Niski poziom wody {tank.upper()}")
+    for bat in ("bat1", "bat2"):
+        alarms.add_low(f"{p}{bat}_niski", f"{p}{bat}.charge", 20.0, deadband=2.0,
+                       message=f"Niskie naładowanie {bat.upper()}")
+    alarms.add_high(p + "cisnienie_wysokie", p + "boiler.pressure", 120.0, deadband=5.0, on_delay=2.0,
+                    priority=2, message="Wysokie ciśnienie w kotle")
+    alarms.add_rate(p + "cisnienie_skok", p + "boiler.pressure", 20.0, direction="rise", off_delay=5.0,
+                    priority=2, message="Gwałtowny wzrost ciśnienia")
+    alarms.add_low(p + "woda_kociol", p + "boiler.water_level", 10.0, deadband=2.0, on_delay=2.0,
+                   priority=2, message="Niski poziom wody w kotle")
+    alarms.add_state(p + "odlaczony", p + "plant.mode_code", MODES.index(MODE_OFF),
+                     message="Rozdzielnia odłączona")
+    return alarms
@@ -0,0 +1,175 @@
+import numpy as np
+
+from engine import (NOMINAL_DT, PIPE_CAPACITY_M3, TANK_CAPACITY_M3, FEED_TANK_CAPACITY_M3,
+                    TOTAL_CHARGE_CAPACITY, TOTAL_DISCHARGE_CAP, MODES)
+
+MODE_CODES = {mode: i for i, mode in enumerate(MODES)}
+CODE_NORMAL, CODE_CHARGE, CODE_DISCHARGE, CODE_OFF = range(4)
+
+
+class PlantBatch:
+    def __init__(self, n, dtype=np.float64):
+        self.n = n
+        f = lambda value, shape=(n,): np.full(shape, value, dtype=dtype)
+
+        self.level = f(80.0, (3, n))
+        self.flow_in = f(0.0, (3, n))
+        self.flow_out = f(0.0, (3, n))
+        self.amount = f(0.0)
+        self.temp = f(20.0)
+        self.pressure = f(0.0)
+        self.water_level = f(50.0)
+        self.rpm = f(0.0)
+        self.power_mw = f(0.0)
+        self.hot_level = f(0.0)
+        self.charge = f(50.0, (2, n))
+        self.tank_val = f(500.0)
+        self.mw_out = f(0.0)
+
+        self.feed = f(0.0)
+        self.pump = f(0.0)
+        self.city = f(0.0)
+        self.dump_valve = np.zeros(n, dtype=bool)
+        self.mode = np.zeros(n, dtype=np.int8)
+        self.sections = np.ones((2, n), dtype=bool)
+
+        self.time = 0.0
+        self.ticks = 0
+        self._alpha_dt = None
+
+    @classmethod
+    def from_engine(cls, engine, n, dtype=np.float64):
+        b = cls(n, dtype)
+        for i, z in enumerate((engine.w1, engine.w2, engine.wr)):
+            b.level[i] = z.level
+            b.flow_in[i] = z.flow_in
+            b.flow_out[i] = z.flow_out
+        b.amount[:] = engine.silo.amount
+        b.temp[:] = engine.boiler.temp
+        b.pressure[:] = engine.boiler.pressure
+        b.water_level[:] = engine.boiler.water_level
+        b.rpm[:] = engine.turbine.rpm
+        b.power_mw[:] = engine.turbine.power_mw
+        b.hot_level[:] = engine.hot_res.level
+        b.charge[0] = engine.bat1.charge
+        b.charge[1] = engine.bat2.charge
+        b.tank_val[:] = engine.tank_val
+        b.feed[:] = engine.feed
+        b.pump[:] = engine.pump
+        b.city[:] = engine.city
+        b.dump_valve[:] = engine.dump_valve
+        b.mode[:] = MODE_CODES[engine.mode]
+        b.sections[0] = engine.section_a
+        b.sections[1] = engine.section_b
+        return b
+
+    def set_mode(self, mode, mask=slice(None)):
+        self.mode[mask] = MODE_CODES[mode]
+
+    def step(self, dt=NOMINAL_DT):
+        self.step_water(dt)
+        self.step_generation(dt)
+        self.step_energy(dt)
+        self.time += dt
+        self.ticks += 1
+
+    def run(self, seconds, dt=NOMINAL_DT):
+        steps = int(round(seconds / dt))
+        for _ in range(steps):
+            self.step(dt)
+        return steps
+
+    def step_water(self, dt):
+        scale = dt / NOMINAL_DT
+        k = PIPE_CAPACITY_M3 / 100.0 * scale / TANK_CAPACITY_M3 * 100.0
+        self.level += (self.flow_in - self.flow_out) * k
+        np.clip(self.level, 0.0, 100.0, out=self.level)
+
+    def step_generation(self, dt):
+        scale = dt / NOMINAL_DT
+        if self._alpha_dt != dt:
+            self._alpha_wet = 1.0 - (1.0 - 0.05) ** scale
+            self._alpha_dry = 1.0 - (1.0 - 0.2) ** scale
+            self._alpha_dt = dt
+
+        real_inflow = np.where(self.level > 0, self.flow_out, 0.0).sum(axis=0) * 0.05
+
+        tank = self.tank_val
+        tank += real_inflow * dt
+        can_pump = (tank > 0) & (self.water_level < 100)
+        actual_pump = np.where(can_pump, np.minimum(self.pump * 0.2, tank / dt), 0.0)
+        tank -= actual_pump * dt
+        np.clip(tank, 0.0, FEED_TANK_CAPACITY_M3, out=tank)
+
+        water = self.water_level
+        water += actual_pump * (0.2 * dt)
+        water -= np.where(self.pressure > 0, self.pressure * (0.05 * dt), 0.0)
+        np.clip(water, 0.0, 100.0, out=water)
+
+        amount = self.amount
+        has_coal = amount > 0
+        burn_cost = self.feed * (0.05 * scale / 100.0)
+        burning = has_coal & (amount >= burn_cost)
+        amount -= np.where(burning, burn_cost, 0.0)
+        amount[has_coal & ~burning] = 0.0
+        heat_gain = np.where(burning, self.feed * 0.3, 0.0)
+
+        temp = self.temp
+        heat_loss = (temp - 20.0) * 0.02
+
+        ready = temp > 110.0
+        self.dump_valve &= ready
+        dumping = self.dump_valve & (self.hot_level < 100)
+        transfer_cooling = np.where(dumping, 15.0, 0.0)
+        self.hot_level += np.where(dumping, 0.2 * scale, 0.0)
+
+        temp += (heat_gain - heat_loss - transfer_cooling) * dt
+        np.clip(temp, 20.0, 600.0, out=temp)
+
+        wet = water > 0
+        target_p = np.where((temp > 100) & wet, (temp - 100) * 0.5, 0.0)
+        inertia = np.where(wet, self._alpha_wet, self._alpha_dry)
+        self.pressure += (target_p - self.pressure) * inertia
+
+        hot = self.hot_level
+        hot -= np.where(hot > 0, self.city * (0.1 * scale / 100.0), 0.0)
+        np.clip(hot, 0.0, 100.0, out=hot)
+
+        p_in = self.pressure
+        rpm = self.rpm
+        torque = np.where(p_in > 20, (p_in - 20) * 2.0, 0.0)
+        load = np.where(rpm > 2500, (rpm - 2500) * 0.5, 0.0)
+        rpm += (torque - rpm * 0.05 - load) * dt
+        np.maximum(rpm, 0.0, out=rpm)
+
+        np.minimum(rpm * (50.0 / 3000.0), 55.0, out=self.power_mw)
+
+    def step_energy(self, dt):
+        mw_in = self.power_mw
+        mode = self.mode
+        charge = self.charge
+        active = self.sections
+        n_active = active.sum(axis=0)
+
+        charging = (mode == CODE_CHARGE) & (mw_in > 0) & (n_active > 0)
+        hungry = active & (charge < 100.0) & charging
+        n_hungry = hungry.sum(axis=0)
+        used = np.where(n_hungry > 0, np.minimum(mw_in, TOTAL_CHARGE_CAPACITY), 0.0)
+        p_in = used / np.maximum(n_hungry, 1)
+        charge += np.where(hungry, p_in * (0.2 * dt), 0.0)
+        np.minimum(charge, 100.0, out=charge)
+
+        discharging = mode == CODE_DISCHARGE
+        full = active & (charge > 0.0) & discharging
+        n_full = full.sum(axis=0)
+        p_out = TOTAL_DISCHARGE_CAP / np.maximum(n_full, 1)
+        charge -= np.where(full, p_out * (0.25 * dt), 0.0)
+        np.maximum(charge, 0.0, out=charge)
+        boost = np.where(n_full > 0, TOTAL_DISCHARGE_CAP, 0.0)
+
+        mw_out = self.mw_out
+        mw_out[:] = 0.0
+        normal = mode == CODE_NORMAL
+        mw_out[normal] = mw_in[normal]
+        mw_out[charging] = np.maximum(0.0, mw_in - used)[charging]
+        mw_out[discharging] = (mw_in + boost)[discharging]
@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from engine import PlantEngine, WaterTank, NOMINAL_DT
+
+BASELINE = "bench_baseline.json"
+SCALES = (0, 50, 200, 800)
+LAYOUT_SIZE = 5000
+
+_app = None
+
+
+def percentiles(samples_ns):
+    s = sorted(samples_ns)
+    n = len(s)
+    pick = lambda q: s[min(n - 1, int(q / 100.0 * n))] / 1000.0
+    return {
+        "n": n,
+        "p50": pick(50),
+        "p90": pick(90),
+        "p99": pick(99),
+        "max": s[-1] / 1000.0,
+        "mean": sum(s) / n / 1000.0,
+    }
+
+
+def measure(fn, repeat, warmup=5):
+    for _ in range(warmup):
+        fn()
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(repeat):
+        t0 = clock()
+        fn()
+        samples.append(clock() - t0)
+    return percentiles(samples)
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base and stats["p50"] > base["p50"] * (1.0 + threshold):
+            regressions.append((name, base["p50"], stats["p50"]))
+    return regressions
+
+
+def loaded_engine():
+    e = PlantEngine()
+    e.deliver_coal(100)
+    e.set_feed(60)
+    e.set_pump(40)
+    e.set_city(30)
+    for name in e.tanks:
+        e.set_tank_flow(name, 20, 25)
+    e.run(600)
+    return e
+
+
+def qt_app():
+    global _app
+    if _app is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        _app = QApplication.instance() or QApplication(sys.argv[:1])
+    return _app
+
+
+def bench_tick(results, repeat):
+    e = loaded_engine()
+    results["tick.engine"] = measure(lambda: e.step(NOMINAL_DT), repeat * 10)
+    m = loaded_engine()
+    m.set_rates()
+    results["tick.engine_multirate"] = measure(lambda: m.step(NOMINAL_DT), repeat * 10)
+    for name, subsystem in e.subsystems:
+        results[f"tick.{name}"] = measure(lambda: subsystem(NOMINAL_DT), repeat * 10)
+
+
+def _image(w, h):
+    from PyQt5.QtGui import QImage
+    image = QImage(int(w), int(h), QImage.Format_ARGB32_Premultiplied)
+    image.fill(0)
+    return image
+
+
+def bench_scene(results, repeat):
+    qt_app()
+    from PyQt5.QtGui import QPainter
+    from main import ScadaScene, DISPLAY_CACHE
+
+    scene = ScadaScene(loaded_engine())
+    scene.resize(1100, 750)
+    e = scene.engine
+
+    def frame():
+        e.step(NOMINAL_DT)
+        scene.update_simulation()
+
+    results["scene.update_simulation"] = measure(frame, repeat)
+    image = _image(1100, 750)
+    results["scene.paint"] = measure(lambda: scene.render(image), repeat)
+
+    def cold():
+        DISPLAY_CACHE.clear()
+        scene.static_key = None
+        scene.render(image)
+
+    results["scene.paint_cold"] = measure(cold, repeat)
+
+    for comp in scene.Scadas:
+        image = _image(comp.width + 4, comp.height + 4)
+        label = " ".join(comp.name.split()) or "siec"
+
+        def draw(comp=comp, image=image):
+            painter = QPainter(image)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.translate(2, 2)
+            comp.draw_content(painter)
+            painter.end()
+
+        results[f"draw_content.{type(comp).__name__}.{label}"] = measure(draw, repeat)
+
+
+def bench_startup(results, repeat):
+    cli = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scada.py"), "run", "--seconds", "0"]
+    results["startup.cli"] = measure(lambda: subprocess.run(cli, check=True, stdout=subprocess.DEVNULL),
+                                     max(5, repeat // 10), warmup=1)
+    qt_app()
+    import main
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            def start():
+                w = main.MainWindow()
+                w.show()
+                w.grab()
+                w.timer.stop()
+                w.close()
+                w.deleteLater()
+
+            results["startup.main_window"] = measure(start, max(3, repeat // 20), warmup=1)
+        finally:
+            os.chdir(cwd)
+
+
+def scaled_scene(n):
+    from PyQt5.QtGui import QColor
+    from main import ScadaScene, ZbiornikWoda, Rura
+
+    scene = ScadaScene(loaded_engine())
+    scene.resize(1100, 750)
+    db = scene.engine.db
+    models = []
+    for i in range(n):
+        x = 20 + (i * 37) % 1000
+        y = 20 + (i * 53) % 600
+        model = WaterTank(db, f"bench{i}")
+        models.append(model)
+        scene.add_component(f"bench{i}", ZbiornikWoda(x, y, f"Z{i}", model))
+        scene.add_pipe(f"bench_r{i}", Rura(x, y + 60, x + 40, y + 60, QColor(0, 150, 255), 4))
+    return scene, models
+
+
+def bench_scaling(results, repeat, scales):
+    qt_app()
+    image = _image(1100, 750)
+    for n in scales:
+        scene, models = scaled_scene(n)
+        k = [0]
+
+        def frame():
+            k[0] += 1
+            for i, model in enumerate(models):
+                model.level = (k[0] + i) % 100
+            scene.update_simulation()
+            scene.render(image)
+
+        results[f"scale.{n}.frame"] = measure(frame, repeat)
+
+
+def bench_layout(results, repeat, n=LAYOUT_SIZE):
+    qt_app()
+    from main import ScadaScene
+    from layout import synthetic_layout
+
+    image = _image(1100, 750)
+    scene = ScadaScene(loaded_engine(), synthetic_layout(n))
+    scene.resize(1100, 750)
+    e = scene.engine
+
+    def frame():
+        e.step(NOMINAL_DT)
+        scene.update_simulation()
+        scene.render(image)
+
+    results[f"layout.{n}.frame"] = measure(frame, repeat)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarki: koszt kroku symulacji, rysowania i startu aplikacji.")
+    parser.add_argument("--repeat", type=int, default=200, help="liczba pomiarów na benchmark")
+    parser.add_argument("--only", nargs="+", choices=("tick", "scene", "startup", "scale"),
+                        default=["tick", "scene", "startup", "scale"])
+    parser.add_argument("--scale", type=int, nargs="+", default=list(SCALES), help="liczby dodatkowych zbiorników/rur")
+    parser.add_argument("--baseline", default=BASELINE, help="plik z wynikami odniesienia")
+    parser.add_argument("--save-baseline", action="store_true", help="zapisz wyniki jako odniesienie")
+    parser.add_argument("--threshold", type=float, default=0.2, help="dopuszczalny wzrost p50 względem odniesienia")
+    parser.add_argument("--json", help="zapisz wyniki do pliku JSON")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if "tick" in args.only:
+        bench_tick(results, args.repeat)
+    if "scene" in args.only:
+        bench_scene(results, args.repeat)
+    if "startup" in args.only:
+        bench_startup(results, args.repeat)
+    if "scale" in args.only:
+        bench_scaling(results, args.repeat, args.scale)
+        bench_layout(results, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"{'benchmark':45s} {'p50':>10s} {'p90':>10s} {'p99':>10s} {'max':>10s}  [µs]")
+    for name, s in results.items():
+        line = f"{name:45s} {s['p50']:10.1f} {s['p90']:10.1f} {s['p99']:10.1f} {s['max']:10.1f}"
+        if name in baseline:
+            line += f"  {(s['p50'] / baseline[name]['p50'] - 1.0) * 100.0:+6.1f}%"
+        print(line)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, old, new in regressions:
+        print(f"REGRESJA {name}: p50 {old:.1f} -> {new:.1f} µs")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
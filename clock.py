@@ -0,0 +1,84 @@
+import time
+
+from engine import NOMINAL_DT
+
+SPEED_MAX = None
+SPEEDS = {
+    "x1": 1.0,
+    "x10": 10.0,
+    "x100": 100.0,
+    "MAX": SPEED_MAX,
+}
+
+
+class SimulationClock:
+    def __init__(self, engine, dt=NOMINAL_DT, max_frame_time=0.25, frame_budget=0.035):
+        self.engine = engine
+        self.dt = dt
+        self.speed = 1.0
+        self.max_frame_time = max_frame_time
+        self.frame_budget = frame_budget
+        self.accumulator = 0.0
+        self.dropped_time = 0.0
+        self.last_steps = 0
+        self.paused = False
+
+    def set_speed(self, speed):
+        self.speed = speed
+        self.accumulator = 0.0
+
+    def set_paused(self, paused):
+        self.paused = bool(paused)
+        self.accumulator = 0.0
+
+    @property
+    def sim_time(self):
+        return self.engine.time
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.dt
+
+    def advance(self, real_elapsed):
+        if self.paused:
+            self.last_steps = 0
+            return 0
+        if self.speed is SPEED_MAX:
+            steps = self._run_budget()
+        else:
+            steps = self._run_accumulated(real_elapsed)
+        self.last_steps = steps
+        return steps
+
+    def _run_accumulated(self, real_elapsed):
+        if real_elapsed > self.max_frame_time:
+            self.dropped_time += (real_elapsed - self.max_frame_time) * self.speed
+            real_elapsed = self.max_frame_time
+        self.accumulator += real_elapsed * self.speed
+
+        dt = self.dt
+        step = self.engine.step
+        deadline = time.perf_counter() + self.frame_budget
+        steps = 0
+        while self.accumulator >= dt - 1e-9:
+            step(dt)
+            self.accumulator -= dt
+            steps += 1
+            if steps % 64 == 0 and time.perf_counter() > deadline:
+                self.dropped_time += self.accumulator
+                self.accumulator = 0.0
+                break
+        return steps
+
+    def _run_budget(self):
+        dt = self.dt
+        step = self.engine.step
+        perf = time.perf_counter
+        deadline = perf() + self.frame_budget
+        steps = 0
+        while True:
+            for _ in range(64):
+                step(dt)
+            steps += 64
+            if perf() > deadline:
+                return steps
@@ -0,0 +1,132 @@
+import numpy as np
+
+POINT = np.dtype([("t", "<f8"), ("v", "<f8")])
+INF = float("inf")
+DOOR_WINDOW = 256
+DOOR_RUN = 16
+
+
+class SwingingDoor:
+    __slots__ = ("deviation", "exception", "received", "stored",
+                 "_anchor", "_snapshot", "_held", "_lo", "_hi", "_scalar")
+
+    def __init__(self, deviation=0.0, exception=0.0):
+        self.deviation = float(deviation)
+        self.exception = float(exception)
+        self.received = 0
+        self.stored = 0
+        self._anchor = None
+        self._snapshot = None
+        self._held = None
+        self._lo = -INF
+        self._hi = INF
+        self._scalar = False
+
+    @property
+    def ratio(self):
+        return self.received / self.stored if self.stored else float(self.received)
+
+    def pending(self):
+        return [p for p in (self._snapshot, self._held) if p is not None]
+
+    def feed(self, points):
+        self.received += len(points)
+        ts = points["t"]
+        vs = points["v"]
+        if self._anchor is not None and self._snapshot is not None and self._held is None:
+            v0 = vs[0]
+            if v0 == self._anchor[1] and (vs == v0).all() and self._lo <= 0.0 <= self._hi:
+                t_end = float(ts[-1])
+                span = t_end - self._anchor[0]
+                self._lo = max(self._lo, -self.deviation / span)
+                self._hi = min(self._hi, self.deviation / span)
+                self._snapshot = (t_end, float(v0))
+                return np.empty(0, dtype=POINT)
+
+        out = []
+        if self.exception > 0.0:
+            for t, v in zip(ts.tolist(), vs.tolist()):
+                self._exception(t, v, out)
+        elif self._scalar:
+            for t, v in zip(ts.tolist(), vs.tolist()):
+                self._door(t, v, out)
+        else:
+            self._doors(ts, vs, out)
+        self._scalar = len(out) * DOOR_RUN > len(points)
+        self.stored += len(out)
+        return np.array(out, dtype=POINT)
+
+    def _exception(self, t, v, out):
+        last = self._snapshot
+        if last is not None and abs(v - last[1]) <= self.exception:
+            self._held = (t, v)
+            return
+        if self._held is not None:
+            self._door(self._held[0], self._held[1], out)
+            self._held = None
+        self._door(t, v, out)
+
+    def _doors(self, ts, vs, out):
+        i = 0
+        n = len(ts)
+        if self._anchor is None and n:
+            self._door(float(ts[0]), float(vs[0]), out)
+            i = 1
+        dev = self.deviation
+        while i < n:
+            ta, va = self._anchor
+            t = ts[i:i + DOOR_WINDOW]
+            span = t - ta
+            slope = (vs[i:i + DOOR_WINDOW] - va) / span
+            width = dev / span
+            lo = slope - width
+            hi = slope + width
+            lo[0] = max(lo[0], self._lo)
+            hi[0] = min(hi[0], self._hi)
+            np.maximum.accumulate(lo, out=lo)
+            np.minimum.accumulate(hi, out=hi)
+            rest = slope[1:]
+            broken = np.flatnonzero((rest < lo[:-1]) | (rest > hi[:-1]))
+            if not self._lo <= slope[0] <= self._hi:
+                k = 0
+            elif len(broken):
+                k = int(broken[0]) + 1
+                self._snapshot = (float(t[k - 1]), float(vs[i + k - 1]))
+            else:
+                k = len(t)
+                self._lo = float(lo[-1])
+                self._hi = float(hi[-1])
+                self._snapshot = (float(t[-1]), float(vs[i + k - 1]))
+                i += k
+                continue
+            out.append(self._snapshot)
+            self._anchor = self._snapshot
+            self._lo = -INF
+            self._hi = INF
+            i += k
+
+    def _door(self, t, v, out):
+        anchor = self._anchor
+        if anchor is None:
+            self._anchor = (t, v)
+            out.append(self._anchor)
+            return
+        snap = self._snapshot
+        if snap is None:
+            ta, va = anchor
+        else:
+            ta, va = anchor
+            slope = (v - va) / (t - ta)
+            if slope < self._lo or slope > self._hi:
+                out.append(snap)
+                self._anchor = snap
+                ta, va = snap
+                self._lo = -INF
+                self._hi = INF
+        span = t - ta
+        dev = self.deviation
+        lo = (v - dev - va) / span
+        hi = (v + dev - va) / span
+        if lo > self._lo: self._lo = lo
+        if hi < self._hi: self._hi = hi
+        self._snapshot = (t, v)
@@ -0,0 +1,603 @@
+import math
+
+from integrators import METHODS, integrate
+from tags import TagDatabase, TagBlock
+
+NOMINAL_DT = 0.1
+
+TANK_CAPACITY_M3 = 1000.0
+PIPE_CAPACITY_M3 = 5.0
+SILO_CAPACITY_T = 800.0
+FEED_TANK_CAPACITY_M3 = 1000.0
+
+INTEGRATOR_TICK = "euler"
+INTEGRATORS = (INTEGRATOR_TICK,) + tuple(m for m in METHODS if m != "euler")
+K_WET = -math.log(1.0 - 0.05) / NOMINAL_DT
+K_DRY = -math.log(1.0 - 0.2) / NOMINAL_DT
+BURN_RATE = 0.05 / 100.0 / NOMINAL_DT
+DUMP_RATE = 0.2 / NOMINAL_DT
+CITY_RATE = 0.1 / 100.0 / NOMINAL_DT
+RK4_MAX_STEP = 1.0
+RTOL = 1e-6
+ATOL = 1e-8
+
+MULTIRATE = {"water": 1.0, "boiler": NOMINAL_DT, "turbine": NOMINAL_DT, "thermal": NOMINAL_DT, "energy": 0.01}
+RATE_EPS = 1e-9
+
+(TANK_EMPTY, TANK_FULL, DRY, WATER_FULL, COAL_EMPTY, READY, BOILING,
+ COLD, OVERHEAT, TORQUE, HOT_EMPTY, HOT_FULL, LOADED, STOPPED, FLASH) = range(15)
+
+MODE_NORMAL = "normal"
+MODE_CHARGE = "charge"
+MODE_DISCHARGE = "discharge"
+MODE_OFF = "off"
+MODES = (MODE_NORMAL, MODE_CHARGE, MODE_DISCHARGE, MODE_OFF)
+
+TOTAL_CHARGE_CAPACITY = 15.0
+TOTAL_DISCHARGE_CAP = 20.0
+
+BAT_IDLE = "idle"
+BAT_CHARGING = "charging"
+BAT_FULL = "full"
+BAT_NO_SECTIONS = "no_sections"
+BAT_NO_INPUT = "no_input"
+BAT_DISCHARGING = "discharging"
+BAT_EMPTY = "empty"
+BAT_CUT_OFF = "cut_off"
+BAT_STATUSES = (BAT_IDLE, BAT_CHARGING, BAT_FULL, BAT_NO_SECTIONS, BAT_NO_INPUT,
+                BAT_DISCHARGING, BAT_EMPTY, BAT_CUT_OFF)
+
+
+class WaterTank(TagBlock):
+    __slots__ = ()
+    FIELDS = (
+        ("level", float, 80.0),
+        ("flow_in", float, 0.0),
+        ("flow_out", float, 0.0),
+        ("balance_m3", float, 0.0),
+    )
+
+
+class CoalSilo(TagBlock):
+    __slots__ = ()
+    FIELDS = (
+        ("amount", float, 0.0),
+    )
+
+
+class BoilerState(TagBlock):
+    __slots__ = ()
+    FIELDS = (
+        ("temp", float, 20.0),
+        ("pressure", float, 0.0),
+        ("water_level", float, 50.0),
+        ("flow_dump", float, 0.0),
+    )
+
+
+class TurbineState(TagBlock):
+    __slots__ = ()
+    FIELDS = (
+        ("rpm", float, 0.0),
+        ("power_mw", float, 0.0),
+    )
+
+
+class HeatBuffer(TagBlock):
+    __slots__ = ()
+    FIELDS = (
+        ("level", float, 0.0),
+        ("max_capacity", float, 1000.0),
+        ("flow_city", float, 0.0),
+    )
+
+
+class BatteryState(TagBlock):
+    __slots__ = ()
+    FIELDS = (
+        ("charge", float, 50.0),
+        ("current_flow", float, 0.0),
+    )
+
+
+class PlantEngine(TagBlock):
+    __slots__ = ("w1", "w2", "wr", "tanks", "silo", "boiler", "turbine", "hot_res", "bat1", "bat2",
+                 "subsystems", "observers", "time", "ticks", "integrator", "rtol", "atol", "rates", "units",
+                 "probes", "_due", "_couplings", "_offset",
+                 "_alpha_dt", "_alpha_wet", "_alpha_dry",
+                 "_h_tanks", "_h_gen", "_h_turbine", "_h_energy", "__weakref__")
+    FIELDS = (
+        ("tank_val", float, 500.0),
+        ("feed", int, 0),
+        ("pump", int, 0),
+        ("city", int, 0),
+        ("dump_valve", bool, 0),
+        ("mode_code", int, 0),
+        ("section_a", bool, 1),
+        ("section_b", bool, 1),
+        ("real_inflow", float, 0.0),
+        ("dump_ready", bool, 0),
+        ("mw_out", float, 0.0),
+        ("bat_status_code", int, 0),
+        ("bat_sections", int, 0),
+    )
+
+    def __init__(self, db=None, unit=""):
+        db = db if db is not None else TagDatabase()
+        p = unit + "." if unit else ""
+        TagBlock.__init__(self, db, p + "plant")
+        self.w1 = WaterTank(db, p + "w1")
+        self.w2 = WaterTank(db, p + "w2")
+        self.wr = WaterTank(db, p + "wr")
+        self.tanks = {"w1": self.w1, "w2": self.w2, "wr": self.wr}
+        self.silo = CoalSilo(db, p + "silo")
+        self.boiler = BoilerState(db, p + "boiler")
+        self.turbine = TurbineState(db, p + "turbine")
+        self.hot_res = HeatBuffer(db, p + "hot_res")
+        self.bat1 = BatteryState(db, p + "bat1")
+        self.bat2 = BatteryState(db, p + "bat2")
+
+        self.subsystems = [
+            ("water", self.step_water),
+            ("boiler", self.step_boiler),
+            ("turbine", self.step_turbine),
+            ("energy", self.step_energy),
+        ]
+        self.observers = []
+        self.integrator = INTEGRATOR_TICK
+        self.rtol = RTOL
+        self.atol = ATOL
+        self.rates = {}
+        self.units = []
+        self.probes = []
+        self._due = {}
+        self._couplings = {}
+        self._offset = 0.0
+
+        self.time = 0.0
+        self.ticks = 0
+        self._alpha_dt = None
+        self._alpha_wet = 0.0
+        self._alpha_dry = 0.0
+
+        self._h_tanks = tuple(
+            (z.handle("level"), z.handle("flow_in"), z.handle("flow_out"), z.handle("balance_m3"))
+            for z in (self.w1, self.w2, self.wr))
+        self._h_gen = (
+            self.handle("tank_val"), self.handle("real_inflow"), self.handle("pump"), self.handle("feed"),
+            self.handle("city"), self.handle("dump_valve"), self.handle("dump_ready"),
+            self.boiler.handle("temp"), self.boiler.handle("pressure"),
+            self.boiler.handle("water_level"), self.boiler.handle("flow_dump"),
+            self.silo.handle("amount"), self.hot_res.handle("level"), self.hot_res.handle("flow_city"),
+        )
+        self._h_turbine = (self.boiler.handle("pressure"), self.turbine.handle("rpm"), self.turbine.handle("power_mw"))
+        self._h_energy = (
+            self.turbine.handle("power_mw"), self.handle("mode_code"),
+            self.handle("section_a"), self.handle("section_b"),
+            self.bat1.handle("charge"), self.bat1.handle("current_flow"),
+            self.bat2.handle("charge"), self.bat2.handle("current_flow"),
+            self.handle("mw_out"), self.handle("bat_status_code"), self.handle("bat_sections"),
+        )
+
+    @property
+    def mode(self):
+        return MODES[self.mode_code]
+
+    @property
+    def bat_status(self):
+        return BAT_STATUSES[self.bat_status_code]
+
+    def deliver_coal(self, percent):
+        if percent > 0:
+            self.silo.amount = min(self.silo.amount + percent, 100.0)
+
+    def set_tank_flow(self, name, flow_in, flow_out):
+        tank = self.tanks[name]
+        tank.flow_in = float(flow_in)
+        tank.flow_out = float(flow_out)
+
+    def set_feed(self, value):
+        self.feed = value
+
+    def set_pump(self, value):
+        self.pump = value
+
+    def set_city(self, value):
+        self.city = value
+
+    def set_dump_valve(self, is_open):
+        self.dump_valve = bool(is_open) and self.dump_ready
+
+    def set_mode(self, mode):
+        if mode not in MODES:
+            raise ValueError(f"Nieznany tryb pracy: {mode}")
+        self.mode_code = MODES.index(mode)
+
+    def set_section(self, section, enabled):
+        if section == "a":
+            self.section_a = bool(enabled)
+        elif section == "b":
+            self.section_b = bool(enabled)
+        else:
+            raise ValueError(f"Nieznana sekcja: {section}")
+
+    def set_integrator(self, name, rtol=RTOL, atol=ATOL):
+        if name not in INTEGRATORS:
+            raise ValueError(f"Nieznany integrator: {name}")
+        if not (rtol > 0 and atol > 0):
+            raise ValueError("Tolerancje integratora muszą być dodatnie")
+        if name == INTEGRATOR_TICK:
+            core = [("boiler", self.step_boiler), ("turbine", self.step_turbine)]
+        else:
+            core = [("thermal", self.step_thermal)]
+        self.subsystems = ([s for s in self.subsystems if s[0] == "water"] + core +
+                           [s for s in self.subsystems if s[0] not in ("water", "boiler", "turbine", "thermal")])
+        self.integrator = name
+        self.rtol = rtol
+        self.atol = atol
+        for unit in self.units:
+            unit.set_integrator(name, rtol, atol)
+
+    def add_unit(self, unit, engine):
+        self.units.append(engine)
+        self.subsystems.append(("unit:" + unit, engine.step))
+        engine.set_integrator(self.integrator, self.rtol, self.atol)
+        engine.set_rates(self._unit_rates(), self._due)
+
+    def _unit_rates(self):
+        return {name: period for name, period in self.rates.items() if not name.startswith("unit:")}
+
+    def set_rates(self, rates=None, due=None):
+        rates = dict(MULTIRATE if rates is None else rates)
+        names = {name for name, _ in self.subsystems} | set(MULTIRATE)
+        for name, period in rates.items():
+            if name not in names:
+                raise ValueError(f"Nieznany podsystem: {name}")
+            if not period > 0:
+                raise ValueError(f"Krok podsystemu {name} musi być dodatni")
+        self.rates = rates
+        self._due = dict.fromkeys(rates, 0.0)
+        self._due.update(due or {})
+        self._couplings = {"energy": (self.turbine.handle("power_mw"),)}
+        for unit in self.units:
+            unit.set_rates(self._unit_rates(), self._due)
+
+    def step(self, dt=NOMINAL_DT):
+        if self.rates:
+            self._step_multirate(dt)
+        else:
+            for _, subsystem in self.subsystems:
+                subsystem(dt)
+        self.time += dt
+        self.ticks += 1
+        for observer in self.observers:
+            observer(self.time)
+
+    def _step_multirate(self, dt):
+        v = self._values
+        rates = self.rates
+        due = self._due
+        held = {name: [(h, v[h]) for h in handles] for name, handles in self._couplings.items() if name in rates}
+        for name, subsystem in self.subsystems:
+            period = rates.get(name)
+            if period is None:
+                subsystem(dt)
+            elif period >= dt - RATE_EPS:
+                elapsed = due[name] + dt
+                if elapsed >= period - RATE_EPS:
+                    self._offset = dt - elapsed
+                    subsystem(elapsed)
+                    self._offset = 0.0
+                    elapsed = 0.0
+                due[name] = elapsed
+            else:
+                n = math.ceil(dt / period - RATE_EPS)
+                h = dt / n
+                inputs = [(handle, start, v[handle]) for handle, start in held.get(name, ())]
+                for k in range(1, n + 1):
+                    for handle, start, end in inputs:
+                        v[handle] = start + (end - start) * k / n
+                    self._offset = (k - 1) * h
+                    subsystem(h)
+                self._offset = 0.0
+
+    def run(self, seconds, dt=NOMINAL_DT):
+        steps = int(round(seconds / dt))
+        step = self.step
+        for _ in range(steps):
+            step(dt)
+        return steps
+
+    def step_water(self, dt):
+        v = self._values
+        k = (PIPE_CAPACITY_M3 / 100.0) * (dt / NOMINAL_DT) / TANK_CAPACITY_M3 * 100.0
+        per_pct = PIPE_CAPACITY_M3 / 100.0
+        for h_level, h_in, h_out, h_balance in self._h_tanks:
+            diff = v[h_in] - v[h_out]
+            v[h_balance] = diff * per_pct
+            level = v[h_level] + diff * k
+            v[h_level] = 0.0 if level < 0.0 else (100.0 if level > 100.0 else level)
+
+    def _pressure_alphas(self, dt):
+        scale = dt / NOMINAL_DT
+        self._alpha_wet = 1.0 - (1.0 - 0.05) ** scale
+        self._alpha_dry = 1.0 - (1.0 - 0.2) ** scale
+        self._alpha_dt = dt
+
+    def step_boiler(self, dt):
+        scale = dt / NOMINAL_DT
+        v = self._values
+        (h_tank, h_inflow, h_pump, h_feed, h_city, h_valve, h_ready,
+         h_temp, h_press, h_water, h_dump, h_amount, h_hot, h_city_flow) = self._h_gen
+
+        inflow_sum = 0.0
+        for h_level, _, h_out, _ in self._h_tanks:
+            if v[h_level] > 0: inflow_sum += v[h_out]
+        real_inflow = inflow_sum * 0.05
+        v[h_inflow] = real_inflow
+
+        water = v[h_water]
+        tank_val = v[h_tank] + real_inflow * dt
+        actual_pump = 0.0
+        if tank_val > 0 and water < 100:
+            actual_pump = v[h_pump] * 0.2
+            max_possible = tank_val / dt
+            if actual_pump > max_possible:
+                actual_pump = max_possible
+            tank_val -= actual_pump * dt
+        if tank_val < 0: tank_val = 0.0
+        if tank_val > FEED_TANK_CAPACITY_M3: tank_val = FEED_TANK_CAPACITY_M3
+        v[h_tank] = tank_val
+
+        pressure = v[h_press]
+        water += actual_pump * 0.2 * dt
+        if pressure > 0:
+            water -= pressure * 0.05 * dt
+        if water < 0: water = 0.0
+        if water > 100: water = 100.0
+        v[h_water] = water
+
+        feed = v[h_feed]
+        heat_gain = 0.0
+        amount = v[h_amount]
+        if amount > 0:
+            burn_cost = (feed / 100.0) * 0.05 * scale
+            if amount >= burn_cost:
+                v[h_amount] = amount - burn_cost
+                heat_gain = feed * 0.3
+            else:
+                v[h_amount] = 0.0
+
+        temp = v[h_temp]
+        heat_loss = (temp - 20.0) * 0.02
+
+        hot = v[h_hot]
+        transfer_cooling = 0.0
+        if temp > 110.0:
+            v[h_ready] = 1.0
+            if v[h_valve] and hot < 100:
+                transfer_cooling = 15.0
+                hot += 0.2 * scale
+        else:
+            v[h_ready] = 0.0
+            v[h_valve] = 0.0
+        v[h_dump] = transfer_cooling
+
+        temp += (heat_gain - heat_loss - transfer_cooling) * dt
+        temp = 20.0 if temp < 20.0 else (600.0 if temp > 600.0 else temp)
+        v[h_temp] = temp
+
+        target_p = 0.0
+        if temp > 100 and water > 0:
+            target_p = (temp - 100) * 0.5
+        if self._alpha_dt != dt:
+            self._pressure_alphas(dt)
+        inertia = self._alpha_wet if water > 0 else self._alpha_dry
+        pressure += (target_p - pressure) * inertia
+        v[h_press] = pressure
+
+        if hot > 0:
+            drain = (v[h_city] / 100.0) * 0.1 * scale
+            hot -= drain
+            v[h_city_flow] = drain
+        else:
+            v[h_city_flow] = 0.0
+        v[h_hot] = 0.0 if hot < 0.0 else (100.0 if hot > 100.0 else hot)
+
+    def step_turbine(self, dt):
+        v = self._values
+        h_press, h_rpm, h_mw = self._h_turbine
+        pressure = v[h_press]
+        rpm = v[h_rpm]
+        torque = 0.0
+        if pressure > 20: torque = (pressure - 20) * 2.0
+        friction = rpm * 0.05
+        load = 0.0
+        if rpm > 2500: load = (rpm - 2500) * 0.5
+        rpm += (torque - friction - load) * dt
+        if rpm < 0: rpm = 0.0
+        v[h_rpm] = rpm
+
+        mw = 0.0
+        if rpm > 0:
+            mw = (rpm / 3000.0) * 50.0
+            if mw > 55: mw = 55.0
+        v[h_mw] = mw
+
+    def step_thermal(self, dt):
+        v = self._values
+        (h_tank, h_inflow, h_pump, h_feed, h_city, h_valve, h_ready,
+         h_temp, h_press, h_water, h_dump, h_amount, h_hot, h_city_flow) = self._h_gen
+        _, h_rpm, h_mw = self._h_turbine
+
+        inflow_sum = 0.0
+        for h_level, _, h_out, _ in self._h_tanks:
+            if v[h_level] > 0: inflow_sum += v[h_out]
+        real_inflow = inflow_sum * 0.05
+        v[h_inflow] = real_inflow
+        pump_rate = v[h_pump] * 0.2
+        feed = v[h_feed]
+        city_rate = v[h_city] * CITY_RATE
+        valve = [v[h_valve]]
+
+        def rates(t, y, m):
+            tank, water, amount, temp, pressure, hot, rpm = y
+            drain = pressure * 0.05 if pressure > 0 else 0.0
+            pump = pump_rate
+            if m[TANK_EMPTY] and pump > real_inflow: pump = real_inflow
+            if m[WATER_FULL] and pump > drain / 0.2: pump = drain / 0.2
+            d_tank = real_inflow - pump
+            if m[TANK_FULL] and d_tank > 0: d_tank = 0.0
+            d_water = pump * 0.2 - drain
+
+            heat_gain = 0.0 if m[COAL_EMPTY] else feed * 0.3
+            d_amount = 0.0 if m[COAL_EMPTY] else -feed * BURN_RATE
+            dump = DUMP_RATE if m[READY] and valve[0] else 0.0
+            cooling = 15.0 if dump else 0.0
+            out = 0.0 if m[HOT_EMPTY] else city_rate
+            if m[HOT_FULL] and dump > out:
+                cooling *= out / dump
+                dump = out
+            d_temp = heat_gain - (temp - 20.0) * 0.02 - cooling
+            if (m[COLD] and d_temp < 0) or (m[OVERHEAT] and d_temp > 0): d_temp = 0.0
+
+            target_p = (temp - 100) * 0.5 if m[BOILING] else 0.0
+            d_press = (target_p - pressure) * K_WET
+            if m[DRY]:
+                flash = pump * 4.0
+                if target_p >= flash:
+                    d_water = 0.0
+                    d_press = (flash - pressure) * K_WET if not m[FLASH] else -pressure * K_DRY
+                else:
+                    d_water = max(d_water, 0.0)
+                    d_press = -pressure * K_DRY
+            torque = (pressure - 20) * 2.0 if m[TORQUE] else 0.0
+            load = (rpm - 2500) * 0.5 if m[LOADED] else 0.0
+            d_rpm = torque - rpm * 0.05 - load
+            if m[STOPPED] and d_rpm < 0: d_rpm = 0.0
+            return (d_tank, d_water, d_amount, d_temp, d_press, dump - out, d_rpm)
+
+        def events(y):
+            tank, water, amount, temp, pressure, hot, rpm = y
+            feed_water = pump_rate if tank > 0 or pump_rate < real_inflow else real_inflow
+            return (-tank, tank - FEED_TANK_CAPACITY_M3, -water, water - 100.0, -amount, temp - 110.0,
+                    temp - 100.0, 20.0 - temp, temp - 600.0, pressure - 20.0, -hot, hot - 100.0,
+                    rpm - 2500.0, -rpm, pressure - feed_water * 4.0)
+
+        def on_event(before, after, y):
+            if before[READY] and not after[READY]:
+                valve[0] = 0.0
+
+        def clamp(y):
+            tank, water, amount, temp, pressure, hot, rpm = y
+            return [min(max(tank, 0.0), FEED_TANK_CAPACITY_M3), min(max(water, 0.0), 100.0), max(amount, 0.0),
+                    min(max(temp, 20.0), 600.0), pressure, min(max(hot, 0.0), 100.0), max(rpm, 0.0)]
+
+        def linear(m, y):
+            flash = (min(pump_rate, real_inflow) if m[TANK_EMPTY] else pump_rate) * 4.0
+            target_p = (y[3] - 100) * 0.5 if m[BOILING] else 0.0
+            dry = m[DRY] and (m[FLASH] or target_p < flash)
+            return (0.0, 0.0, 0.0, 0.0, K_DRY if dry else K_WET, 0.0, 0.5 * m[LOADED] + 0.05)
+
+        def store(y):
+            tank, water, amount, temp, pressure, hot, rpm = y
+            v[h_tank] = tank
+            v[h_water] = water
+            v[h_amount] = amount
+            v[h_temp] = temp
+            v[h_press] = pressure
+            v[h_hot] = hot
+            v[h_rpm] = rpm
+            v[h_mw] = min(rpm / 3000.0 * 50.0, 55.0)
+
+        on_step = None
+        if self.probes:
+            start = self.time + self._offset
+
+            def on_step(t, y):
+                store(y)
+                for probe in self.probes:
+                    probe(start + t)
+
+        y = [v[h_tank], v[h_water], v[h_amount], v[h_temp], v[h_press], v[h_hot], v[h_rpm]]
+        h = min(dt, RK4_MAX_STEP) if self.integrator == "rk4" else None
+        y = integrate(rates, y, 0.0, dt, self.integrator, events, on_event, h=h, rtol=self.rtol, atol=self.atol,
+                      clamp=clamp, linear=linear, on_step=on_step)
+        store(y)
+        tank, water, amount, temp, pressure, hot, rpm = y
+
+        if temp > 110.0:
+            v[h_ready] = 1.0
+            v[h_valve] = valve[0]
+        else:
+            v[h_ready] = 0.0
+            v[h_valve] = 0.0
+        v[h_dump] = 15.0 if v[h_valve] and hot < 100 else 0.0
+        v[h_city_flow] = city_rate * dt if hot > 0 else 0.0
+
+    def step_energy(self, dt):
+        v = self._values
+        (h_mw, h_mode, h_sec_a, h_sec_b, h_charge_1, h_flow_1, h_charge_2, h_flow_2,
+         h_out, h_status, h_sections) = self._h_energy
+        mw_in = v[h_mw]
+        mw_out = 0.0
+        mode = MODES[int(v[h_mode])]
+        v[h_flow_1] = 0.0
+        v[h_flow_2] = 0.0
+
+        active_bats = []
+        if v[h_sec_a]: active_bats.append((h_charge_1, h_flow_1))
+        if v[h_sec_b]: active_bats.append((h_charge_2, h_flow_2))
+
+        status = BAT_IDLE
+        sections = 0
+        if mode == MODE_NORMAL:
+            mw_out = mw_in
+
+        elif mode == MODE_CHARGE:
+            if mw_in > 0 and active_bats:
+                hungry = [b for b in active_bats if v[b[0]] < 100.0]
+                used = 0.0
+                if hungry:
+                    p_per_bat = TOTAL_CHARGE_CAPACITY / len(hungry)
+                    if mw_in < TOTAL_CHARGE_CAPACITY:
+                        p_per_bat = mw_in / len(hungry)
+                        used = mw_in
+                    else:
+                        used = TOTAL_CHARGE_CAPACITY
+                    for h_charge, h_flow in hungry:
+                        charge = v[h_charge] + p_per_bat * 0.2 * dt
+                        v[h_charge] = 100.0 if charge > 100 else charge
+                        v[h_flow] = p_per_bat
+                    status = BAT_CHARGING
+                else:
+                    status = BAT_FULL
+                sections = len(hungry)
+                mw_out = max(0.0, mw_in - used)
+            else:
+                mw_out = 0.0
+                status = BAT_NO_SECTIONS if not active_bats else BAT_NO_INPUT
+
+        elif mode == MODE_DISCHARGE:
+            full = [b for b in active_bats if v[b[0]] > 0.0]
+            boost = 0.0
+            if full:
+                p_per_bat = TOTAL_DISCHARGE_CAP / len(full)
+                for h_charge, h_flow in full:
+                    charge = v[h_charge] - p_per_bat * 0.25 * dt
+                    v[h_charge] = 0.0 if charge < 0 else charge
+                    v[h_flow] = -p_per_bat
+                    boost += p_per_bat
+                status = BAT_DISCHARGING
+            else:
+                status = BAT_NO_SECTIONS if not active_bats else BAT_EMPTY
+            sections = len(full)
+            mw_out = mw_in + boost
+
+        elif mode == MODE_OFF:
+            mw_out = 0.0
+            status = BAT_CUT_OFF
+
+        v[h_out] = mw_out
+        v[h_status] = BAT_STATUSES.index(status)
+        v[h_sections] = sections
@@ -0,0 +1,214 @@
+import os
+
+import numpy as np
+
+from compression import POINT, SwingingDoor
+from rollup import Rollups
+
+SPILL_ROWS = 64
+HISTORY_DEVIATIONS = {
+    "boiler.temp": 0.5,
+    "boiler.pressure": 0.1,
+    "boiler.water_level": 0.1,
+    "turbine.rpm": 5.0,
+    "turbine.power_mw": 0.1,
+    "hot_res.level": 0.1,
+    "bat1.charge": 0.1,
+    "bat2.charge": 0.1,
+    "silo.amount": 0.05,
+    "plant.tank_val": 0.5,
+}
+HISTORY_ROLLUPS = ["boiler.temp", "boiler.pressure", "turbine.power_mw", "plant.mw_out",
+                   "hot_res.level", "bat1.charge", "bat2.charge"]
+
+
+class Segment:
+    __slots__ = ("path", "count", "t_first", "t_last", "_map", "_map_count", "_file")
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "wb", buffering=0)
+        self.count = 0
+        self.t_first = None
+        self.t_last = None
+        self._map = None
+        self._map_count = 0
+
+    def append(self, points):
+        self._file.write(points.tobytes())
+        if self.t_first is None:
+            self.t_first = float(points["t"][0])
+        self.t_last = float(points["t"][-1])
+        self.count += len(points)
+
+    def points(self):
+        if self._map is None or self._map_count != self.count:
+            self._map = np.memmap(self.path, dtype=POINT, mode="r", shape=(self.count,))
+            self._map_count = self.count
+        return self._map
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class TagArchive:
+    def __init__(self, directory, name, segment_points, compressor=None):
+        self.directory = directory
+        self.name = name
+        self.segment_points = segment_points
+        self.compressor = compressor
+        self.segments = []
+
+    def append(self, points):
+        if self.compressor is not None:
+            points = self.compressor.feed(points)
+        while len(points):
+            if not self.segments or self.segments[-1].count >= self.segment_points:
+                if self.segments:
+                    self.segments[-1].close()
+                path = os.path.join(self.directory, f"{self.name}.{len(self.segments):05d}.seg")
+                self.segments.append(Segment(path))
+            seg = self.segments[-1]
+            room = self.segment_points - seg.count
+            seg.append(points[:room])
+            points = points[room:]
+
+    def close(self):
+        if self.segments:
+            self.segments[-1].close()
+
+    def read(self, t0, t1):
+        parts = []
+        for seg in self.segments:
+            if seg.t_last < t0 or seg.t_first > t1:
+                continue
+            p = seg.points()
+            t = p["t"]
+            parts.append(p[np.searchsorted(t, t0, "left"):np.searchsorted(t, t1, "right")])
+        if self.compressor is not None:
+            tail = np.array(self.compressor.pending(), dtype=POINT)
+            parts.append(tail[(tail["t"] >= t0) & (tail["t"] <= t1)])
+        return parts
+
+
+class Historian:
+    def __init__(self, db, directory=None, capacity=4096, segment_points=1 << 20, deviations=None,
+                 rollup_tags=None):
+        self.db = db
+        self.names = list(db.names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.width = len(self.names)
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.rows = np.zeros((capacity, self.width))
+        self.head = 0
+        self.count = 0
+        self.samples = 0
+        self.last_time = -np.inf
+        self.spill_rows = min(SPILL_ROWS, capacity)
+        self.spilled_time = -np.inf
+        self._unspilled = 0
+
+        self.rollups = None
+        self._unrolled = 0
+        if rollup_tags:
+            self.rollups = Rollups(rollup_tags)
+            self._rollup_cols = [self.index[name] for name in rollup_tags]
+
+        self.directory = directory
+        self.archives = {}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            for name in self.names:
+                deviation = deviations.get(name, 0.0) if deviations is not None else 0.0
+                if not isinstance(deviation, tuple):
+                    deviation = (deviation,)
+                compressor = SwingingDoor(*deviation) if any(deviation) else None
+                self.archives[name] = TagArchive(directory, name, segment_points, compressor)
+
+    def record(self, t):
+        i = self.head
+        self.times[i] = t
+        self.last_time = t
+        self.rows[i] = self.db.values[:self.width]
+        self.samples += self.width
+        i += 1
+        if i == self.capacity:
+            i = 0
+        self.head = i
+        if self.count < self.capacity:
+            self.count += 1
+        self._unrolled += 1
+        if self._unrolled == self.capacity:
+            self._roll()
+        if self.archives:
+            self._unspilled += 1
+            if self._unspilled == self.spill_rows:
+                self._spill()
+
+    def attach(self, engine):
+        engine.observers.append(self.record)
+
+    def _ordered(self):
+        if self.count < self.capacity:
+            return self.times[:self.count], self.rows[:self.count]
+        order = np.roll(np.arange(self.capacity), -self.head)
+        return self.times[order], self.rows[order]
+
+    def _roll(self):
+        n = self._unrolled
+        self._unrolled = 0
+        if not n or self.rollups is None:
+            return
+        idx = np.arange(self.head - n, self.head) % self.capacity
+        self.rollups.ingest(self.times[idx], self.rows[np.ix_(idx, self._rollup_cols)])
+
+    def _spill(self):
+        n = self._unspilled
+        self._unspilled = 0
+        if not n:
+            return
+        idx = np.arange(self.head - n, self.head) % self.capacity
+        rows = self.rows[idx]
+        points = np.empty(n, dtype=POINT)
+        points["t"] = self.times[idx]
+        for j, name in enumerate(self.names):
+            points["v"] = rows[:, j]
+            self.archives[name].append(points)
+        self.spilled_time = self.times[idx[-1]]
+
+    def flush(self):
+        self._roll()
+        if self.archives:
+            self._spill()
+
+    def close(self):
+        self.flush()
+        for archive in self.archives.values():
+            archive.close()
+
+    def query(self, name, t0, t1, bucket=None):
+        self._roll()
+        return self.rollups.query(name, t0, t1, bucket)
+
+    def compression_ratios(self):
+        return {name: a.compressor.ratio for name, a in self.archives.items() if a.compressor is not None}
+
+    def latest(self, name):
+        if not self.count:
+            return None
+        return self.rows[self.head - 1, self.index[name]]
+
+    def series(self, name, t0=-np.inf, t1=np.inf):
+        j = self.index[name]
+        parts = []
+        if name in self.archives:
+            parts = [(p["t"], p["v"]) for p in self.archives[name].read(t0, t1)]
+        times, rows = self._ordered()
+        lo = np.searchsorted(times, max(t0, np.nextafter(self.spilled_time, np.inf)), "left")
+        hi = np.searchsorted(times, t1, "right")
+        parts.append((times[lo:hi], rows[lo:hi, j]))
+        return (np.concatenate([p[0] for p in parts]),
+                np.concatenate([p[1] for p in parts]))
@@ -0,0 +1,138 @@
+import math
+
+EVENT_TOL = 1e-6
+MAX_EVENTS = 16
+MIN_STEP = 1e-9
+EXP_LIMIT = 200.0
+
+
+def euler(f, t, y, h):
+    return [yi + h * ki for yi, ki in zip(y, f(t, y))], None
+
+
+def rk4(f, t, y, h):
+    k1 = f(t, y)
+    k2 = f(t + h / 2, [yi + h / 2 * k for yi, k in zip(y, k1)])
+    k3 = f(t + h / 2, [yi + h / 2 * k for yi, k in zip(y, k2)])
+    k4 = f(t + h, [yi + h * k for yi, k in zip(y, k3)])
+    return [yi + h / 6 * (a + 2 * b + 2 * c + d) for yi, a, b, c, d in zip(y, k1, k2, k3, k4)], None
+
+
+def rk45(f, t, y, h):
+    k1 = f(t, y)
+    k2 = f(t + h / 5, [a + h * (b1 / 5) for a, b1 in zip(y, k1)])
+    k3 = f(t + h * 3 / 10, [a + h * (3 / 40 * b1 + 9 / 40 * b2) for a, b1, b2 in zip(y, k1, k2)])
+    k4 = f(t + h * 4 / 5, [a + h * (44 / 45 * b1 - 56 / 15 * b2 + 32 / 9 * b3) for a, b1, b2, b3 in zip(y, k1, k2, k3)])
+    k5 = f(t + h * 8 / 9, [a + h * (19372 / 6561 * b1 - 25360 / 2187 * b2 + 64448 / 6561 * b3 - 212 / 729 * b4)
+                           for a, b1, b2, b3, b4 in zip(y, k1, k2, k3, k4)])
+    k6 = f(t + h, [a + h * (9017 / 3168 * b1 - 355 / 33 * b2 + 46732 / 5247 * b3 + 49 / 176 * b4 - 5103 / 18656 * b5)
+                   for a, b1, b2, b3, b4, b5 in zip(y, k1, k2, k3, k4, k5)])
+    y5 = [a + h * (35 / 384 * b1 + 500 / 1113 * b3 + 125 / 192 * b4 - 2187 / 6784 * b5 + 11 / 84 * b6)
+          for a, b1, b3, b4, b5, b6 in zip(y, k1, k3, k4, k5, k6)]
+    k7 = f(t + h, y5)
+    err = [h * (71 / 57600 * b1 - 71 / 16695 * b3 + 71 / 1920 * b4 - 17253 / 339200 * b5 + 22 / 525 * b6 - 1 / 40 * b7)
+           for b1, b3, b4, b5, b6, b7 in zip(k1, k3, k4, k5, k6, k7)]
+    return y5, err
+
+
+METHODS = {"euler": euler, "rk4": rk4, "rk45": rk45}
+
+
+def _mode(events, y):
+    return tuple(g >= 0.0 for g in events(y))
+
+
+def _locate(advance, h, events, mode, g_lo, g_hi):
+    lo, hi = 0.0, h
+    y_hi = None
+    stale = 0
+    secant = True
+    while hi - lo > EVENT_TOL:
+        width = hi - lo
+        if secant:
+            root = min((lo + width * a / (a - b) for a, b in zip(g_lo, g_hi) if (a >= 0.0) != (b >= 0.0) and a != b),
+                       default=lo + width / 2)
+            probes = (min(root + EVENT_TOL / 2, hi - EVENT_TOL / 4), max(root - EVENT_TOL / 2, lo + EVENT_TOL / 4))
+        else:
+            probes = (lo + width / 2,)
+        for mid in probes:
+            if not lo < mid < hi:
+                continue
+            y_mid = advance(mid)[0]
+            g_mid = events(y_mid)
+            if _mode(events, y_mid) == mode:
+                lo, g_lo = mid, g_mid
+                if stale < 0:
+                    g_hi = [g / 2 for g in g_hi]
+                stale = min(stale, 0) - 1
+            else:
+                hi, g_hi, y_hi = mid, g_mid, y_mid
+                if stale > 0:
+                    g_lo = [g / 2 for g in g_lo]
+                stale = max(stale, 0) + 1
+        secant = not secant or hi - lo <= width / 2
+    if y_hi is None:
+        y_hi = advance(hi)[0]
+    return hi, y_hi
+
+
+def lawson(step, f, t, y, h, lam):
+    eq = [(d + l * yi) / l if l else 0.0 for d, l, yi in zip(f(t, y), lam, y)]
+
+    def g(s, u):
+        grow = [math.exp(l * (s - t)) for l in lam]
+        z = [q + ui / e for q, ui, e in zip(eq, u, grow)]
+        return [e * (d + l * (zi - q)) for e, d, l, zi, q in zip(grow, f(s, z), lam, z, eq)]
+
+    u, err = step(g, t, [yi - q for yi, q in zip(y, eq)], h)
+    decay = [math.exp(-l * h) for l in lam]
+    return [q + ui * d for q, ui, d in zip(eq, u, decay)], None if err is None else [e * d for e, d in zip(err, decay)]
+
+
+def integrate(rhs, y, t0, t1, method="rk4", events=None, on_event=None, h=None, rtol=1e-6, atol=1e-8, clamp=None,
+              linear=None, on_step=None):
+    step = METHODS[method]
+    events = events or (lambda y: ())
+    t = t0
+    h = min(h or (t1 - t0), t1 - t0)
+    count = 0
+    while t1 - t > MIN_STEP:
+        mode = _mode(events, y)
+        f = lambda t, y, mode=mode: rhs(t, y, mode)
+        lam = linear(mode, y) if linear is not None else ()
+
+        if max(lam, default=0.0) > 0.0:
+            h = min(h, EXP_LIMIT / max(lam))
+
+            def advance(h, t=t, y=y, f=f, lam=lam):
+                return lawson(step, f, t, y, h, lam)
+        else:
+            def advance(h, t=t, y=y, f=f):
+                return step(f, t, y, h)
+
+        h = min(h, t1 - t)
+        y_new, err = advance(h)
+        if err is not None:
+            scale = max(abs(e) / (atol + rtol * max(abs(a), abs(b))) for e, a, b in zip(err, y, y_new))
+            if scale > 1.0 and h > MIN_STEP:
+                h *= max(0.2, 0.9 * scale ** -0.25)
+                continue
+            h_next = h * min(5.0, max(0.2, 0.9 * scale ** -0.2 if scale > 0 else 5.0))
+        else:
+            h_next = h
+        taken = h
+        if _mode(events, y_new) != mode and count < MAX_EVENTS:
+            taken, y_new = _locate(advance, h, events, mode, events(y), events(y_new))
+            count += 1
+        if clamp is not None:
+            y_new = clamp(y_new)
+        t += taken
+        y = y_new
+        if on_step is not None:
+            on_step(t, y)
+        if taken < h:
+            if on_event is not None:
+                on_event(mode, _mode(events, y), y)
+            h_next = h
+        h = h_next
+    return y
@@ -0,0 +1,198 @@
+import argparse
+import struct
+import sys
+
+from engine import PlantEngine, MODES, NOMINAL_DT, INTEGRATORS
+
+MAGIC = b"SCJ2"
+HEADER = struct.Struct("<4sdI")
+NAME = struct.Struct("<H")
+CONFIG = struct.Struct("<BddH")
+RATE = struct.Struct("<Bdd")
+RECORD = struct.Struct("<QB")
+
+COMMANDS = (
+    ("deliver_coal", "d", None),
+    ("set_tank_flow", "Bdd", ("w1", "w2", "wr")),
+    ("set_feed", "i", None),
+    ("set_pump", "i", None),
+    ("set_city", "i", None),
+    ("set_dump_valve", "?", None),
+    ("set_mode", "B", MODES),
+    ("set_section", "B?", ("a", "b")),
+)
+OPCODES = {name: i for i, (name, _, _) in enumerate(COMMANDS)}
+ARGS = [struct.Struct("<" + fmt) for _, fmt, _ in COMMANDS]
+
+
+def _command(name):
+    opcode = OPCODES[name]
+    enum = COMMANDS[opcode][2]
+
+    def command(self, *args):
+        engine = self.engine
+        if (engine.integrator, engine.rtol, engine.atol, engine.rates) != self.config:
+            raise ValueError("Zmiana integratora lub kroków podsystemów w trakcie zapisu dziennika")
+        result = getattr(engine, name)(*args)
+        if enum is not None:
+            self._write(opcode, enum.index(args[0]), *args[1:])
+        else:
+            self._write(opcode, *args)
+        return result
+
+    command.__name__ = name
+    return command
+
+
+class CommandJournal:
+    def __init__(self, engine, path, dt=NOMINAL_DT):
+        self.engine = engine
+        self.path = path
+        self.count = 0
+        self.start_tick = engine.ticks
+        self.config = (engine.integrator, engine.rtol, engine.atol, dict(engine.rates))
+        self.file = open(path, "wb")
+        snapshot = engine.db.snapshot()
+        self.file.write(HEADER.pack(MAGIC, dt, len(snapshot)))
+        self.file.write(snapshot.tobytes())
+        for name in engine.db.names:
+            encoded = name.encode()
+            self.file.write(NAME.pack(len(encoded)) + encoded)
+        self.file.write(CONFIG.pack(INTEGRATORS.index(engine.integrator), engine.rtol, engine.atol, len(engine.rates)))
+        for name, period in engine.rates.items():
+            encoded = name.encode()
+            self.file.write(RATE.pack(len(encoded), period, engine._due[name]) + encoded)
+        self.file.flush()
+
+    def _write(self, opcode, *args):
+        self.file.write(RECORD.pack(self.engine.ticks - self.start_tick, opcode) + ARGS[opcode].pack(*args))
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+for _name, _, _ in COMMANDS:
+    setattr(CommandJournal, _name, _command(_name))
+
+
+def decode(opcode, data, pos=0):
+    args = ARGS[opcode].unpack_from(data, pos)
+    name, _, enum = COMMANDS[opcode]
+    if enum is not None:
+        args = (enum[args[0]],) + args[1:]
+    return name, args
+
+
+def _read_header(data):
+    magic, dt, n = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("To nie jest dziennik poleceń operatora")
+    pos = HEADER.size
+    values = struct.unpack_from(f"<{n}d", data, pos)
+    pos += 8 * n
+    names = []
+    for _ in range(n):
+        size, = NAME.unpack_from(data, pos)
+        pos += NAME.size
+        names.append(data[pos:pos + size].decode())
+        pos += size
+    integrator, rtol, atol, count = CONFIG.unpack_from(data, pos)
+    pos += CONFIG.size
+    rates, due = {}, {}
+    for _ in range(count):
+        size, period, phase = RATE.unpack_from(data, pos)
+        pos += RATE.size
+        name = data[pos:pos + size].decode()
+        pos += size
+        rates[name] = period
+        due[name] = phase
+    return dt, dict(zip(names, values)), (INTEGRATORS[integrator], rtol, atol, rates, due), pos
+
+
+def read_config(path):
+    with open(path, "rb") as f:
+        return _read_header(f.read())[2]
+
+
+def read_journal(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    dt, snapshot, _, pos = _read_header(data)
+    records = []
+    while pos < len(data):
+        tick, opcode = RECORD.unpack_from(data, pos)
+        pos += RECORD.size
+        name, args = decode(opcode, data, pos)
+        pos += ARGS[opcode].size
+        records.append((tick, name, args))
+    return dt, snapshot, records
+
+
+class JournalPlayer:
+    def __init__(self, engine, path):
+        self.engine = engine
+        self.dt, snapshot, self.records = read_journal(path)
+        self.pos = 0
+        integrator, rtol, atol, rates, due = read_config(path)
+        engine.set_integrator(integrator, rtol, atol)
+        engine.set_rates(rates, due)
+        engine.db.restore_named(snapshot, snapshot.values())
+        self.apply_due()
+
+    @property
+    def last_tick(self):
+        return self.records[-1][0] if self.records else 0
+
+    @property
+    def finished(self):
+        return self.pos >= len(self.records)
+
+    def apply_due(self, *_):
+        engine = self.engine
+        records = self.records
+        while self.pos < len(records) and records[self.pos][0] <= engine.ticks:
+            _, name, args = records[self.pos]
+            getattr(engine, name)(*args)
+            self.pos += 1
+
+    def attach(self):
+        self.engine.observers.append(self.apply_due)
+
+    def fast_forward(self, tick):
+        engine = self.engine
+        step = engine.step
+        dt = self.dt
+        while engine.ticks < tick:
+            if self.pos < len(self.records):
+                target = min(tick, self.records[self.pos][0])
+            else:
+                target = tick
+            for _ in range(target - engine.ticks):
+                step(dt)
+            self.apply_due()
+        return engine
+
+
+def replay(path, engine=None, extra_ticks=0):
+    engine = engine if engine is not None else PlantEngine()
+    player = JournalPlayer(engine, path)
+    return player.fast_forward(player.last_tick + extra_ticks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Odtwarzanie dziennika poleceń operatora bez GUI.")
+    parser.add_argument("journal", help="plik dziennika (.scj)")
+    parser.add_argument("--extra", type=float, default=0.0, help="dodatkowy czas symulacji po ostatnim poleceniu [s]")
+    args = parser.parse_args(argv)
+
+    dt = read_journal(args.journal)[0]
+    e = replay(args.journal, extra_ticks=int(round(args.extra / dt)))
+    for name, value in e.db.as_dict().items():
+        print(f"{name} = {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
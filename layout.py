@@ -0,0 +1,209 @@
+import json
+import os
+
+import numpy as np
+
+from engine import PlantEngine
+from network import FlowNetwork
+from spatial import GridIndex
+from topology import Energisation, reach_sets
+
+DEFAULT_LAYOUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plant_layout.json")
+MODELS = ("w1", "w2", "wr", "silo", "boiler", "turbine", "hot_res", "bat1", "bat2")
+ACTIVE_FLOW = 1e-6
+FLOW_TOL = 1e-3
+
+SOURCES = {
+    "w1_flow": lambda e: e.w1.level > 0 and e.w1.flow_out > 0,
+    "w2_flow": lambda e: e.w2.level > 0 and e.w2.flow_out > 0,
+    "wr_flow": lambda e: e.wr.level > 0 and e.wr.flow_out > 0,
+    "coal": lambda e: e.silo.amount > 0,
+    "steam": lambda e: e.boiler.pressure > 2.0,
+    "gen": lambda e: e.turbine.power_mw > 0.1,
+    "bat1": lambda e: e.bat1.charge > 1.0,
+    "bat2": lambda e: e.bat2.charge > 1.0,
+    "heat": lambda e: e.boiler.temp > 100.0,
+    "city": lambda e: e.hot_res.level > 0,
+}
+
+
+def _fail(msg):
+    raise ValueError(f"Błędny układ instalacji: {msg}")
+
+
+def validate_layout(data):
+    units = data.setdefault("units", [""])
+    if not units or len(set(units)) != len(units):
+        _fail("lista jednostek jest pusta lub ma powtórzenia")
+    ids = set()
+    for kind in ("sources", "sinks"):
+        for i, item in enumerate(data.setdefault(kind, [])):
+            if len(item.get("at", ())) != 2:
+                _fail(f"{kind}[{i}]: pole at musi mieć dwie współrzędne")
+            if item.get("unit", units[0]) not in units:
+                _fail(f"{kind}[{i}]: nieznana jednostka {item['unit']}")
+            if kind == "sources" and item.get("when") not in SOURCES:
+                _fail(f"sources[{i}]: nieznany warunek {item.get('when')}")
+    for kind in ("components", "pipes"):
+        for item in data.setdefault(kind, []):
+            if "id" not in item:
+                _fail(f"element bez id w sekcji {kind}")
+            if item["id"] in ids:
+                _fail(f"powtórzone id {item['id']}")
+            ids.add(item["id"])
+            if item.get("unit", units[0]) not in units:
+                _fail(f"{item['id']}: nieznana jednostka {item['unit']}")
+    for c in data["components"]:
+        for key in ("type", "x", "y"):
+            if key not in c:
+                _fail(f"{c['id']}: brak pola {key}")
+        if c.get("model") is not None and c["model"] not in MODELS:
+            _fail(f"{c['id']}: nieznany model {c['model']}")
+    for p in data["pipes"]:
+        for key in ("from", "to"):
+            if len(p.get(key, ())) != 2:
+                _fail(f"{p['id']}: pole {key} musi mieć dwie współrzędne")
+    return data
+
+
+def load_layout(path=DEFAULT_LAYOUT):
+    with open(path, encoding="utf-8") as f:
+        return validate_layout(json.load(f))
+
+
+def plant_engines(units, engine=None):
+    engine = engine if engine is not None else PlantEngine()
+    engines = {units[0]: engine}
+    for unit in units[1:]:
+        engines[unit] = PlantEngine(engine.db, unit)
+        engine.add_unit(unit, engines[unit])
+    return engines
+
+
+def synthetic_layout(n, units=1, columns=40):
+    names = [""] + [f"u{i}" for i in range(2, units + 1)]
+    components = []
+    pipes = []
+    sources = []
+    sinks = []
+    for i in range(n):
+        unit = names[i % units]
+        x = 50 + (i % columns) * 130
+        y = 50 + (i // columns) * 170
+        tank = ("w1", "w2", "wr")[i % 3]
+        components.append({"id": f"z{i}", "type": "ZbiornikWoda", "x": x, "y": y,
+                           "label": f"Z{i}", "model": tank, "unit": unit})
+        pipes.append({"id": f"r{i}", "from": [x + 45, y + 120], "to": [x + 45, y + 150],
+                      "color": "#0096ff", "width": 4, "unit": unit})
+        sources.append({"at": [x + 45, y + 120], "when": f"{tank}_flow", "tag": f"{tank}.flow_out", "unit": unit})
+        sinks.append({"at": [x + 45, y + 150], "unit": unit})
+    return validate_layout({"units": names, "components": components, "pipes": pipes,
+                            "sources": sources, "sinks": sinks})
+
+
+class PipeFlows:
+    def __init__(self, layout, engines):
+        net = self.network = FlowNetwork()
+        net.add_node("ground", head=0.0)
+        units = layout["units"]
+        points = {}
+
+        def node(unit, xy):
+            key = (unit, float(xy[0]), float(xy[1]))
+            if key not in net.nodes:
+                net.add_node(key)
+                points.setdefault(unit, GridIndex()).insert(key, key[1], key[2], key[1], key[2])
+            return key
+
+        for p in layout["pipes"]:
+            node(p.get("unit", units[0]), p["from"])
+            node(p.get("unit", units[0]), p["to"])
+        for s in layout["sources"] + layout["sinks"]:
+            node(s.get("unit", units[0]), s["at"])
+
+        self.pipe_ids = []
+        starts = []
+        for p in layout["pipes"]:
+            unit = p.get("unit", units[0])
+            start, end = node(unit, p["from"]), node(unit, p["to"])
+            (_, x0, y0), (_, x1, y1) = start, end
+            dx, dy = x1 - x0, y1 - y0
+            inner = [k for k in points[unit].query(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+                     if k != start and k != end and abs((k[1] - x0) * dy - (k[2] - y0) * dx) < 1e-9]
+            inner.sort(key=lambda k: (k[1] - x0) * dx + (k[2] - y0) * dy)
+            chain = [start] + inner + [end]
+            starts.append(len(net.edges))
+            for i, (u, v) in enumerate(zip(chain, chain[1:])):
+                net.add_pipe((p["id"], i), u, v, p.get("conductance", 1.0))
+            self.pipe_ids.append(p["id"])
+        self._starts = np.array(starts, dtype=np.int64)
+        self._segments = len(net.edges)
+
+        self.db = next(iter(engines.values())).db
+        self._flow_base = len(self.db)
+        for ident in self.pipe_ids:
+            self.db.register(f"pipe.{ident}.flow")
+        conditions = {}
+        edges, which, handles = [], [], []
+        for i, s in enumerate(layout["sources"]):
+            unit = s.get("unit", units[0])
+            key = (s["when"], unit)
+            which.append(conditions.setdefault(key, len(conditions)))
+            edges.append(net.add_pump(("source", i), "ground", node(unit, s["at"]), 1.0, s.get("conductance", 1.0), False))
+            handles.append(self.db.handle((unit + "." if unit else "") + s["tag"]) if "tag" in s else -1)
+        self.conditions = [(SOURCES[when], engines[unit]) for when, unit in conditions]
+        self._source_edges = np.array(edges, dtype=np.int64)
+        self._source_which = np.array(which, dtype=np.int64)
+        self._source_handles = np.array(handles, dtype=np.int64)
+        self._sink_edges = np.array([
+            net.add_pipe(("sink", i), node(s.get("unit", units[0]), s["at"]), "ground", s.get("conductance", 1.0))
+            for i, s in enumerate(layout["sinks"])], dtype=np.int64)
+        self.flow = np.zeros(len(self.pipe_ids))
+        self.solves = 0
+        self._last = None
+
+    def attach(self, engine):
+        engine.observers.append(self.on_tick)
+
+    def on_tick(self, t):
+        on = self.source_states()
+        values = np.frombuffer(self.db.values)
+        lifts = values[self._source_handles[self._source_handles >= 0]]
+        del values
+        last = self._last
+        if last is not None and np.array_equal(on, last[0]) and np.allclose(lifts, last[1], FLOW_TOL, FLOW_TOL):
+            return
+        self._last = (on, lifts)
+        self.update(on)
+
+    def source_states(self):
+        state = np.array([bool(condition(engine)) for condition, engine in self.conditions], dtype=bool)
+        return state[self._source_which]
+
+    def energisation(self):
+        net = self.network
+        a = np.array(net._a, dtype=np.int64)
+        b = np.array(net._b, dtype=np.int64)
+        seg = self._segments
+        owner = np.repeat(np.arange(len(self._starts)), np.diff(np.append(self._starts, seg)))
+        reach = reach_sets(len(net.nodes), a[:seg], b[:seg], owner,
+                           b[self._source_edges].tolist(), a[self._sink_edges].tolist())
+        return Energisation(len(self.pipe_ids), reach)
+
+    def update(self, on=None):
+        net = self.network
+        on = self.source_states() if on is None else on
+        net.set_valves(self._source_edges, on)
+        tagged = on & (self._source_handles >= 0)
+        if tagged.any():
+            values = np.frombuffer(self.db.values)
+            net.lift[self._source_edges[tagged]] = np.abs(values[self._source_handles[tagged]])
+            del values
+        flow = np.abs(net.solve()[:self._segments])
+        self.solves += 1
+        if len(self._starts):
+            self.flow = np.maximum.reduceat(flow, self._starts)
+            values = np.frombuffer(self.db.values)
+            values[self._flow_base:self._flow_base + len(self.flow)] = self.flow
+            del values
+        return self.flow
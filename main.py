@@ -1,30 +1,154 @@
+import math
+import os
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QPushButton, QVBoxLayout, QLabel, QHBoxLayout, QSlider, QFrame, QCheckBox, QProgressBar, QComboBox, QButtonGroup
-from PyQt5.QtCore import QTimer, Qt, QRectF, QPointF
-from PyQt5.QtGui import QPainter, QColor, QPen, QPolygonF, QFont, QPainterPath
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QPushButton, QVBoxLayout, QLabel, QHBoxLayout, QSlider, QFrame, QCheckBox, QProgressBar, QComboBox, QButtonGroup, QToolTip
+from PyQt5.QtCore import QTimer, Qt, QRect, QRectF, QPointF, QLineF
+from PyQt5.QtGui import QPainter, QColor, QPen, QPolygonF, QFont, QFontMetrics, QPainterPath, QPixmap, QTransform
+
+from engine import (PlantEngine, MODE_NORMAL, MODE_CHARGE, MODE_DISCHARGE, MODE_OFF,
+                    BAT_CHARGING, BAT_FULL, BAT_NO_SECTIONS, BAT_DISCHARGING,
+                    TANK_CAPACITY_M3, SILO_CAPACITY_T)
+from clock import SimulationClock, SPEEDS
+from historian import Historian, HISTORY_DEVIATIONS, HISTORY_ROLLUPS
+from trend import TrendTiles, LEVELS
+from alarms import AlarmEngine, plant_alarms
+from journal import CommandJournal, JournalPlayer
+from profiler import TickProfiler, NULL_PROFILER
+from worker import SimulationProcess
+from layout import load_layout, plant_engines, PipeFlows, DEFAULT_LAYOUT
+from spatial import GridIndex
+
+FRAME_MS = 50
+OVERLAY_RECT = QRect(520, 5, 300, 250)
+ZOOM_MIN = 0.05
+ZOOM_MAX = 8.0
+GESTURE_MS = 150
+HISTORY_DIR = "historia"
+CACHE_MARGIN = 2
+CACHE_BYTES = 64 << 20
+ZOOM_STEPS = 4
+_MISSING = object()
+
+
+def cache_scale(device_ratio, zoom):
+    if zoom <= 1.0:
+        return round(device_ratio, 3)
+    return round(device_ratio * 2 ** (math.ceil(math.log2(zoom) * ZOOM_STEPS - 1e-9) / ZOOM_STEPS), 3)
+
+
+def pixmap_bytes(pixmap):
+    return pixmap.width() * pixmap.height() * 4
+
+
+class DisplayListCache:
+    def __init__(self, capacity=CACHE_BYTES):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        pixmap = self.entries.get(key)
+        if pixmap is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return pixmap
+
+    def put(self, key, pixmap):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= pixmap_bytes(old)
+        self.entries[key] = pixmap
+        self.bytes += pixmap_bytes(pixmap)
+        while self.bytes > self.capacity and len(self.entries) > 1:
+            self.bytes -= pixmap_bytes(self.entries.popitem(last=False)[1])
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+
+DISPLAY_CACHE = DisplayListCache()
+
 
 class Scada:
-    def __init__(self, x, y, w, h, name):
+    __slots__ = ("x", "y", "width", "height", "name", "model")
+
+    def __init__(self, x, y, w, h, name, model=None):
         self.x = float(x)
         self.y = float(y)
         self.width = float(w)
         self.height = float(h)
         self.name = name
+        self.model = model
 
     def update(self, dt):
         pass
 
-    def draw_content(self, painter):
+    def visual_state(self):
+        return ()
+
+    def bounding_rect(self):
+        return QRect(int(self.x) - 2, int(self.y) - 2, int(self.width) + 4, int(self.height) + 4)
+
+    def draw_static(self, painter):
+        pass
+
+    def draw_dynamic(self, painter):
         pass
 
+    def draw_content(self, painter):
+        self.draw_static(painter)
+        self.draw_dynamic(painter)
+
+    def draw_cached(self, painter, content=False):
+        dpr = cache_scale(painter.device().devicePixelRatioF(), painter.transform().m11())
+        key = (type(self), self.name, self.width, self.height, content, dpr, self.visual_state())
+        pixmap = DISPLAY_CACHE.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(int((self.width + 2 * CACHE_MARGIN) * dpr), int((self.height + 2 * CACHE_MARGIN) * dpr))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.transparent)
+            p = QPainter(pixmap)
+            p.setRenderHint(QPainter.Antialiasing)
+            p.translate(CACHE_MARGIN, CACHE_MARGIN)
+            if content:
+                self.draw_content(p)
+            else:
+                self.draw_dynamic(p)
+            p.end()
+            DISPLAY_CACHE.put(key, pixmap)
+        painter.drawPixmap(QPointF(-CACHE_MARGIN, -CACHE_MARGIN), pixmap)
+
     def draw(self, painter):
         painter.save()
         painter.translate(self.x, self.y)
         self.draw_content(painter)
         painter.restore()
 
+    def draw_static_layer(self, painter):
+        painter.save()
+        painter.translate(self.x, self.y)
+        self.draw_static(painter)
+        painter.restore()
+
+    def draw_dynamic_layer(self, painter):
+        painter.save()
+        painter.translate(self.x, self.y)
+        self.draw_cached(painter)
+        painter.restore()
+
 
 class Rura:
+    __slots__ = ("x1", "y1", "x2", "y2", "base_color", "thickness", "label", "active", "label_width")
+
     def __init__(self, x1, y1, x2, y2, color, thickness, label=""):
         self.x1 = int(x1)
         self.y1 = int(y1)
@@ -34,6 +158,22 @@ class Rura:
         self.thickness = thickness
         self.label = label
         self.active = False
+        self.label_width = None
+
+    def visual_state(self):
+        return self.active
+
+    def bounding_rect(self):
+        m = self.thickness
+        rect = QRect(min(self.x1, self.x2) - m, min(self.y1, self.y2) - m,
+                     abs(self.x2 - self.x1) + 2 * m, abs(self.y2 - self.y1) + 2 * m)
+        if self.label:
+            if self.label_width is None:
+                self.label_width = QFontMetrics(QFont("Arial", 8, QFont.Bold)).width(self.label)
+            mid_x = (self.x1 + self.x2) // 2
+            mid_y = (self.y1 + self.y2) // 2
+            rect = rect.united(QRect(mid_x - 1, mid_y - 13, self.label_width + 6, 16))
+        return rect
 
     def draw(self, painter):
         current_color = self.base_color if self.active else QColor(50, 50, 50)
@@ -46,8 +186,9 @@ class Rura:
             mid_x = (self.x1 + self.x2) // 2
             mid_y = (self.y1 + self.y2) // 2
             painter.setFont(QFont("Arial", 8, QFont.Bold))
-            fm = painter.fontMetrics()
-            tw = fm.width(self.label)
+            if self.label_width is None:
+                self.label_width = painter.fontMetrics().width(self.label)
+            tw = self.label_width
 
             painter.setPen(Qt.NoPen)
             painter.setBrush(QColor(0, 0, 0))
@@ -57,19 +198,22 @@ class Rura:
             painter.drawText(mid_x + 2, mid_y, self.label)
 
 class ZbiornikWoda(Scada):
-    def __init__(self, x, y, name):
-        Scada.__init__(self, x, y, 90, 120, name)
-        self.level = 80.0
-        self.flow_in = 0.0
-        self.flow_out = 0.0
+    __slots__ = ("ui_label_m3",)
+
+    def __init__(self, x, y, name, model):
+        Scada.__init__(self, x, y, 90, 120, name, model)
         self.ui_label_m3 = None
 
-    def draw_content(self, painter):
+    def visual_state(self):
+        return round(self.model.level / 100.0 * self.height)
+
+    def draw_static(self, painter):
         painter.setPen(QPen(Qt.white, 2))
         painter.setBrush(Qt.NoBrush)
         painter.drawRect(0, 0, int(self.width), int(self.height))
 
-        fill_h = (self.level / 100.0) * self.height
+    def draw_dynamic(self, painter):
+        fill_h = (self.model.level / 100.0) * self.height
         painter.setPen(Qt.NoPen)
         painter.setBrush(QColor(0, 120, 255))
         painter.drawRect(QRectF(2, self.height - fill_h, self.width - 4, fill_h))
@@ -81,58 +225,66 @@ class ZbiornikWoda(Scada):
             painter.drawText(5, 20 + (i * 15), line)
 
 class ZbiornikWegiel(Scada):
-    def __init__(self, x, y, name):
-        Scada.__init__(self, x, y, 100, 150, name)
-        self.amount = 0.0
+    __slots__ = ("path",)
 
-    def update(self, dt):
-        pass
-
-    def draw_content(self, painter):
+    def __init__(self, x, y, name, model):
+        Scada.__init__(self, x, y, 100, 150, name, model)
         p1 = QPointF(0, 0)
         p2 = QPointF(self.width, 0)
         p3 = QPointF(self.width / 2, self.height)
-        path = QPolygonF([p1, p2, p3])
+        self.path = QPolygonF([p1, p2, p3])
 
+    def update(self, dt):
+        pass
+
+    def visual_state(self):
+        amount = self.model.amount
+        return round(amount / 100.0 * self.height), int(amount), amount > 20
+
+    def draw_static(self, painter):
         painter.setPen(QPen(Qt.white, 2))
         painter.setBrush(QColor(80, 80, 80))
-        painter.drawPolygon(path)
+        painter.drawPolygon(self.path)
 
-        fill_ratio = self.amount / 100.0
+    def draw_dynamic(self, painter):
+        amount = self.model.amount
+        fill_ratio = amount / 100.0
         fill_h = fill_ratio * self.height
 
         painter.save()
 
         clip_rect = QRectF(0, self.height - fill_h, self.width, fill_h)
-        painter.setClipRect(clip_rect)
+        painter.setClipRect(clip_rect, Qt.IntersectClip)
 
         painter.setPen(Qt.NoPen)
         painter.setBrush(QColor(20, 20, 20))
-        painter.drawPolygon(path)
+        painter.drawPolygon(self.path)
 
         painter.restore()
 
         painter.setPen(Qt.white)
+        painter.setFont(QFont("Arial", 9))
         painter.drawText(25, 30, "WĘGIEL")
 
-        if self.amount > 20:
+        if amount > 20:
             painter.setPen(Qt.green)
         else:
             painter.setPen(Qt.red)
 
         painter.setFont(QFont("Arial", 10, QFont.Bold))
-        painter.drawText(35, 50, f"{int(self.amount)}%")
+        painter.drawText(35, 50, f"{int(amount)}%")
 
 
 class Boiler(Scada):
-    def __init__(self, x, y, name):
-        Scada.__init__(self, x, y, 140, 180, name)
-        self.temp = 20.0
-        self.pressure = 0.0
-        self.water_level = 50.0
-        self.flow_dump = 0.0
+    __slots__ = ()
 
-    def draw_content(self, painter):
+    def __init__(self, x, y, name, model):
+        Scada.__init__(self, x, y, 140, 180, name, model)
+
+    def visual_state(self):
+        return self.model.temp > 50
+
+    def draw_static(self, painter):
         painter.setPen(QPen(Qt.white, 2))
         painter.setBrush(QColor(50, 50, 50))
         painter.drawRect(0, 0, int(self.width), int(self.height))
@@ -142,7 +294,13 @@ class Boiler(Scada):
         painter.setPen(Qt.NoPen)
         painter.drawRect(fx, fy, fw, fh)
 
-        if self.temp > 50:
+        painter.setPen(Qt.white)
+        painter.setFont(QFont("Arial", 12, QFont.Bold))
+        painter.drawText(40, 30, self.name)
+
+    def draw_dynamic(self, painter):
+        if self.model.temp > 50:
+            fx, fy = 30, 120
             flame_x, flame_y = fx + 20, fy - 5
             flame_w, flame_h = 40, 45
             painter.setRenderHint(QPainter.Antialiasing, True)
@@ -152,74 +310,18 @@ class Boiler(Scada):
                            flame_y + flame_h * 0.1, flame_x + flame_w * 0.5, flame_y)
             path_o.cubicTo(flame_x + flame_w * 0.9, flame_y + flame_h * 0.1, flame_x + flame_w * 1.2,
                            flame_y + flame_h * 0.6, flame_x + flame_w * 0.5, flame_y + flame_h)
+            painter.setPen(Qt.NoPen)
             painter.setBrush(QColor(242, 92, 25))
             painter.drawPath(path_o)
 
-        painter.setPen(Qt.white)
-        painter.setFont(QFont("Arial", 12, QFont.Bold))
-        painter.drawText(40, 30, self.name)
-
-
-class ZbiornikWodaCiepla(Scada):
-    def __init__(self, x, y, name):
-        Scada.__init__(self, x, y, 100, 100, name)
-        self.level = 0.0
-        self.max_capacity = 1000.0
-        self.flow_city = 0.0
-
-    def draw_content(self, painter):
-        painter.setPen(QPen(QColor(255, 100, 100), 2))
-        painter.setBrush(Qt.NoBrush)
-        painter.drawRect(0, 0, int(self.width), int(self.height))
-        fill_h = (self.level / 100.0) * self.height
-        painter.setPen(Qt.NoPen)
-        painter.setBrush(QColor(200, 40, 40))
-        painter.drawRect(QRectF(2, self.height - fill_h, self.width - 4, fill_h))
-        painter.setPen(Qt.white)
-        painter.setFont(QFont("Arial", 9, QFont.Bold))
-        painter.drawText(10, 20, "BUFOR")
-        painter.drawText(10, 40, "CIEPŁA")
-        painter.setPen(Qt.yellow)
-        painter.drawText(30, 80, f"{int(self.level)}%")
-
-
-class Bateria(Scada):
-    def __init__(self, x, y, name):
-        Scada.__init__(self, x, y, 100, 140, name)
-        self.charge = 50.0
-        self.current_flow = 0.0
-
-    def update(self, dt):
-        pass
-
-    def draw_content(self, painter):
-        painter.setPen(QPen(Qt.white, 2))
-        painter.setBrush(Qt.NoBrush)
-        painter.drawRect(0, 0, int(self.width), int(self.height))
-        margin_x = 10
-        active_height = self.height - 40
-        fill_h = (self.charge / 100.0) * active_height
-        color = QColor(0, 255, 0)
-        if self.charge < 20: color = QColor(255, 0, 0)
-        painter.setPen(Qt.NoPen)
-        painter.setBrush(color)
-        painter.drawRect(QRectF(margin_x, self.height - 30 - fill_h, self.width - 2 * margin_x, fill_h))
-        painter.setPen(Qt.white)
-        painter.setFont(QFont("Arial", 9, QFont.Bold))
-        painter.drawText(5, -10, self.name)
-        painter.setBrush(Qt.black)
-        painter.setPen(Qt.white)
-        painter.drawRect(20, int(self.height) - 25, 60, 20)
-        painter.drawText(30, int(self.height) - 10, f"{int(self.charge)}%")
 
 class Turbina(Scada):
-    def __init__(self, x, y, name):
-        Scada.__init__(self, x, y, 160, 100, name)
+    __slots__ = ()
 
-        self.rpm = 0.0
-        self.power_mw = 0.0
+    def __init__(self, x, y, name, model):
+        Scada.__init__(self, x, y, 160, 100, name, model)
 
-    def draw_content(self, painter):
+    def draw_static(self, painter):
         painter.setPen(QPen(Qt.white, 2))
         painter.setBrush(QColor(70, 130, 180))
         painter.drawRect(0, 0, int(self.width), int(self.height))
@@ -230,20 +332,26 @@ class Turbina(Scada):
 
 
 class ZbiornikWodaCiepla(Scada):
-    def __init__(self, x, y, name):
-        Scada.__init__(self, x, y, 100, 100, name)
-        self.level = 0.0
-        self.max_capacity = 1000.0
+    __slots__ = ()
+
+    def __init__(self, x, y, name, model):
+        Scada.__init__(self, x, y, 100, 100, name, model)
 
     def update(self, dt):
         pass
 
-    def draw_content(self, painter):
+    def visual_state(self):
+        level = self.model.level
+        return round(level / 100.0 * self.height), int(level)
+
+    def draw_static(self, painter):
         painter.setPen(QPen(QColor(255, 100, 100), 2))
         painter.setBrush(Qt.NoBrush)
         painter.drawRect(0, 0, int(self.width), int(self.height))
 
-        fill_h = (self.level / 100.0) * self.height
+    def draw_dynamic(self, painter):
+        level = self.model.level
+        fill_h = (level / 100.0) * self.height
 
         painter.setPen(Qt.NoPen)
         painter.setBrush(QColor(200, 40, 40))
@@ -255,28 +363,43 @@ class ZbiornikWodaCiepla(Scada):
         painter.drawText(10, 40, "CIEPŁA")
 
         painter.setPen(Qt.yellow)
-        painter.drawText(30, 80, f"{int(self.level)}%")
+        painter.drawText(30, 80, f"{int(level)}%")
 
 
 class Bateria(Scada):
-    def __init__(self, x, y, name):
-        Scada.__init__(self, x, y, 100, 140, name)
-        self.charge = 50.0
+    __slots__ = ()
+
+    def __init__(self, x, y, name, model):
+        Scada.__init__(self, x, y, 100, 140, name, model)
 
     def update(self, dt):
         pass
 
-    def draw_content(self, painter):
+    def visual_state(self):
+        charge = self.model.charge
+        return round(charge / 100.0 * (self.height - 40)), int(charge), charge < 20
+
+    def draw_static(self, painter):
         painter.setPen(QPen(Qt.white, 2))
         painter.setBrush(Qt.NoBrush)
         painter.drawRect(0, 0, int(self.width), int(self.height))
 
+        painter.setPen(Qt.white)
+        painter.setFont(QFont("Arial", 9, QFont.Bold))
+        painter.drawText(5, -10, self.name)
+
+        painter.setBrush(Qt.black)
+        painter.setPen(Qt.white)
+        painter.drawRect(20, int(self.height) - 25, 60, 20)
+
+    def draw_dynamic(self, painter):
         margin_x = 10
         active_height = self.height - 40
-        fill_h = (self.charge / 100.0) * active_height
+        charge = self.model.charge
+        fill_h = (charge / 100.0) * active_height
 
         color = QColor(0, 255, 0)
-        if self.charge < 20: color = QColor(255, 0, 0)
+        if charge < 20: color = QColor(255, 0, 0)
 
         painter.setPen(Qt.NoPen)
         painter.setBrush(color)
@@ -284,19 +407,16 @@ class Bateria(Scada):
 
         painter.setPen(Qt.white)
         painter.setFont(QFont("Arial", 9, QFont.Bold))
-        painter.drawText(5, -10, self.name)
-
-        painter.setBrush(Qt.black)
-        painter.setPen(Qt.white)
-        painter.drawRect(20, int(self.height) - 25, 60, 20)
-        painter.drawText(30, int(self.height) - 10, f"{int(self.charge)}%")
+        painter.drawText(30, int(self.height) - 10, f"{int(charge)}%")
 
 
 class SiecEnerg(Scada):
-    def __init__(self, x, y):
-        Scada.__init__(self, x, y, 140, 220, "")
+    __slots__ = ()
 
-    def draw_content(self, painter):
+    def __init__(self, x, y, name="", model=None):
+        Scada.__init__(self, x, y, 140, 220, name, model)
+
+    def draw_static(self, painter):
         painter.setRenderHint(QPainter.Antialiasing, True)
 
         pen_thick = 2
@@ -357,137 +477,426 @@ class SiecEnerg(Scada):
         painter.drawPath(path)
 
 
+COMPONENT_TYPES = {
+    "ZbiornikWoda": ZbiornikWoda,
+    "ZbiornikWegiel": ZbiornikWegiel,
+    "Boiler": Boiler,
+    "Turbina": Turbina,
+    "ZbiornikWodaCiepla": ZbiornikWodaCiepla,
+    "Bateria": Bateria,
+    "SiecEnerg": SiecEnerg,
+}
+
 class ScadaScene(QWidget):
-    def __init__(self):
+    def __init__(self, engine=None, layout=None):
         super().__init__()
+        self.engine = engine if engine is not None else PlantEngine()
+        self.commands = self.engine
+        self.engines = {}
         self.Scadas = []
         self.Ruras = []
-
-        # --- OBIEKTY ---
-        self.w1 = ZbiornikWoda(50, 50, "WODA 1\nZIMNA")
-        self.w2 = ZbiornikWoda(160, 50, "WODA 2\nZIMNA")
-        self.wr = ZbiornikWoda(270, 50, "WODA\nREZERWA")
-        self.silo = ZbiornikWegiel(50, 400, "WĘGIEL")
-        self.boiler = Boiler(350, 400, "KOCIOŁ")
-        self.Turbina = Turbina(340, 180, "TURBINA")
-        self.hot_res = ZbiornikWodaCiepla(550, 450, "Gorąca")
-        self.bat1 = Bateria(750, 400, "AKU 1")
-        self.bat2 = Bateria(870, 400, "AKU 2")
-        self.lines = SiecEnerg(850, 20)
-
-        self.Scadas.extend([self.w1, self.w2, self.wr, self.silo, self.boiler, self.Turbina,
-                            self.hot_res, self.bat1, self.bat2, self.lines])
-
-        self.r_w1_drop = Rura(95, 170, 95, 220, QColor(0, 150, 255), 4)
-        self.r_w2_drop = Rura(205, 170, 205, 220, QColor(0, 150, 255), 4)
-        self.r_wr_drop = Rura(315, 170, 315, 220, QColor(0, 150, 255), 4)
-
-        self.r_mix_1 = Rura(95, 220, 205, 220, QColor(0, 150, 255), 4)
-        self.r_mix_2 = Rura(205, 220, 315, 220, QColor(0, 150, 255), 4)
-
-        self.r_feed_v = Rura(315, 220, 315, 450, QColor(0, 150, 255), 4)
-        self.r_feed_h = Rura(315, 450, 350, 450, QColor(0, 150, 255), 4)
-
-        self.r_coal = Rura(100, 550, 350, 550, QColor(150, 150, 150), 8, "PODAJNIK")
-        self.r_steam = Rura(420, 400, 420, 280, Qt.white, 4, "PARA")
-
-        self.r_el_gen = Rura(500, 230, 700, 230, Qt.yellow, 3)
-
-        self.r_el_bus = Rura(700, 230, 700, 350, Qt.yellow, 3)
-        self.r_el_bat_bus = Rura(700, 350, 920, 350, Qt.yellow, 3)
-        self.r_el_b1 = Rura(800, 350, 800, 400, Qt.yellow, 3)
-        self.r_el_b2 = Rura(920, 350, 920, 400, Qt.yellow, 3)
-        self.r_el_grid_1 = Rura(700, 230, 920, 230, Qt.yellow, 3, "SIEĆ")
-        self.r_el_grid_2 = Rura(920, 230, 920, 180, Qt.yellow, 3)
-        self.r_heat_in = Rura(490, 480, 550, 480, QColor(255, 100, 100), 4)
-        self.r_heat_out = Rura(600, 450, 600, 400, QColor(255, 100, 100), 4)
-        self.r_city = Rura(600, 400, 670, 400, QColor(255, 100, 100), 4, "MIASTO")
-        self.Ruras.extend([
-            self.r_w1_drop, self.r_w2_drop, self.r_wr_drop,
-            self.r_mix_1, self.r_mix_2, self.r_feed_v, self.r_feed_h,
-            self.r_coal, self.r_steam,
-            self.r_el_gen, self.r_el_bus, self.r_el_bat_bus, self.r_el_b1, self.r_el_b2,
-            self.r_el_grid_1, self.r_el_grid_2,
-            self.r_heat_in, self.r_heat_out, self.r_city
-        ])
+        self.items = {}
+        self.flows = None
+        self.energisation = None
+        self.flow_pipes = []
+        self.changed_pipes = []
+        self.comp_index = GridIndex()
+        self.pipe_index = GridIndex()
+        self.zoom = 1.0
+        self.pan = QPointF(0, 0)
+        self.view = QTransform()
+        self.visible_items = None
+        self.visible_set = set()
+        self.drag_pos = None
+        self.static_pixmap = None
+        self.static_key = None
+        self.static_view = QTransform()
+        self.gesture = False
+        self.settle = QTimer(self)
+        self.settle.setSingleShot(True)
+        self.settle.setInterval(GESTURE_MS)
+        self.settle.timeout.connect(self.end_gesture)
+        self.visual_states = {}
+        self.changed_components = []
+        self.refresh_bus = RefreshBus()
+        self.profiler = NULL_PROFILER
+        self.overlay = False
+
+        self.load(layout if layout is not None else load_layout())
+
+    def load(self, layout):
+        units = layout["units"]
+        self.engines = plant_engines(units, self.engine)
+
+        for c in layout["components"]:
+            engine = self.engines[c.get("unit", units[0])]
+            model = getattr(engine, c["model"]) if c.get("model") else None
+            self.add_component(c["id"], COMPONENT_TYPES[c["type"]](c["x"], c["y"], c.get("label", ""), model))
+        for p in layout["pipes"]:
+            pipe = Rura(*p["from"], *p["to"], QColor(p.get("color", "#ffffff")), p.get("width", 4), p.get("label", ""))
+            self.add_pipe(p["id"], pipe)
+        self.flows = PipeFlows(layout, self.engines)
+        self.flows.attach(self.engine)
+        self.energisation = self.flows.energisation()
+        self.flow_pipes = [self.items[ident] for ident in self.flows.pipe_ids]
+
+    def _register(self, ident, item, index):
+        self.items[ident] = item
+        if ident.isidentifier() and not hasattr(self, ident):
+            setattr(self, ident, item)
+        r = item.bounding_rect()
+        index.insert(item, r.left(), r.top(), r.right(), r.bottom())
+        self.visible_items = None
+        self.static_key = None
+
+    def add_component(self, ident, comp):
+        self.Scadas.append(comp)
+        self._register(ident, comp, self.comp_index)
+        return comp
+
+    def add_pipe(self, ident, pipe):
+        self.Ruras.append(pipe)
+        self._register(ident, pipe, self.pipe_index)
+        return pipe
 
     def update_simulation(self):
-        dt = 0.05
-        for comp in self.Scadas:
-            comp.update(dt)
-        w1_flow = (self.w1.level > 0 and self.w1.flow_out > 0)
-        w2_flow = (self.w2.level > 0 and self.w2.flow_out > 0)
-        wr_flow = (self.wr.level > 0 and self.wr.flow_out > 0)
-
-        self.r_w1_drop.active = w1_flow
-        self.r_w2_drop.active = w2_flow
-        self.r_wr_drop.active = wr_flow
-        self.r_mix_1.active = w1_flow
-        self.r_mix_2.active = (w1_flow or w2_flow)
-        main_feed_active = (self.r_mix_2.active or wr_flow)
-        self.r_feed_v.active = main_feed_active
-        self.r_feed_h.active = main_feed_active
-        self.r_steam.active = (self.boiler.pressure > 2.0)
-        self.r_coal.active = (self.silo.amount > 0)
-        gen_active = (self.Turbina.power_mw > 0.1)
-        self.r_el_gen.active = gen_active
-        bat1_has_juice = (self.bat1.charge > 1.0)
-        bat2_has_juice = (self.bat2.charge > 1.0)
-        bus_active = gen_active or bat1_has_juice or bat2_has_juice
-        self.r_el_bus.active = bus_active
-        self.r_el_bat_bus.active = bus_active
-        self.r_el_b1.active = (bat1_has_juice or bus_active)
-        self.r_el_b2.active = (bat2_has_juice or bus_active)
-        self.r_el_grid_1.active = bus_active
-        self.r_el_grid_2.active = bus_active
-        self.r_heat_in.active = (self.boiler.temp > 100.0)
-        city_active = (self.hot_res.level > 0)
-        self.r_heat_out.active = city_active
-        self.r_city.active = city_active
-
+        lap = self.profiler.lap()
+        changed = self.energisation.update(self.flows.source_states())
+        energised = self.energisation.energised
+        pipes = self.flow_pipes
+        self.changed_pipes = [pipes[i] for i in changed.tolist()]
+        for pipe, i in zip(self.changed_pipes, changed.tolist()):
+            pipe.active = bool(energised[i])
+        lap("scene.pipes")
+
+        self.invalidate_changed()
+        lap("scene.invalidate")
+        if self.overlay:
+            self.update(OVERLAY_RECT)
+
+    def scene_rect(self, rect):
+        return self.view.inverted()[0].mapRect(QRectF(rect))
+
+    def visible(self):
+        if self.visible_items is None:
+            r = self.scene_rect(self.rect())
+            self.visible_items = self.comp_index.query(r.left(), r.top(), r.right(), r.bottom())
+            self.visible_set = set(self.visible_items)
+        return self.visible_items
+
+    def invalidate_changed(self):
+        states = self.visual_states
+        view = self.view
+        for pipe in self.changed_pipes:
+            self.update(view.mapRect(pipe.bounding_rect()).adjusted(-1, -1, 1, 1))
+        self.changed_components = []
+        items = self.visible()
+        shown = self.visible_set
+        watched = [obiekt for obiekt in self.refresh_bus.subscribers if obiekt not in states or obiekt not in shown]
+        for item in items + watched:
+            state = item.visual_state()
+            if states.get(item, _MISSING) != state:
+                states[item] = state
+                self.update(view.mapRect(item.bounding_rect()).adjusted(-1, -1, 1, 1))
+                self.changed_components.append(item)
+        self.refresh_bus.publish(self.changed_components)
+
+    def set_view(self, zoom, pan):
+        self.zoom = min(max(zoom, ZOOM_MIN), ZOOM_MAX)
+        self.pan = pan
+        self.view = QTransform(self.zoom, 0, 0, self.zoom, pan.x(), pan.y())
+        self.visible_items = None
         self.update()
 
+    def end_gesture(self):
+        self.settle.stop()
+        if self.gesture:
+            self.gesture = False
+            self.update()
+
+    def wheelEvent(self, event):
+        pos = QPointF(event.pos())
+        zoom = min(max(self.zoom * 1.15 ** (event.angleDelta().y() / 120.0), ZOOM_MIN), ZOOM_MAX)
+        p = (pos - self.pan) / self.zoom
+        self.gesture = True
+        self.settle.start()
+        self.set_view(zoom, pos - p * zoom)
+
+    def mousePressEvent(self, event):
+        p = self.view.inverted()[0].map(QPointF(event.pos()))
+        item = None
+        if event.button() == Qt.LeftButton:
+            item = self.comp_index.hit(p.x(), p.y()) or self.pipe_index.hit(p.x(), p.y())
+        if item is not None:
+            QToolTip.showText(event.globalPos(), self.describe(item), self)
+        else:
+            self.drag_pos = QPointF(event.pos())
+            self.gesture = True
+
+    def mouseMoveEvent(self, event):
+        if self.drag_pos is not None:
+            pos = QPointF(event.pos())
+            self.set_view(self.zoom, self.pan + pos - self.drag_pos)
+            self.drag_pos = pos
+
+    def mouseReleaseEvent(self, event):
+        self.drag_pos = None
+        self.end_gesture()
+
+    def mouseDoubleClickEvent(self, event):
+        self.set_view(1.0, QPointF(0, 0))
+
+    def describe(self, comp):
+        if isinstance(comp, Rura):
+            ident = next(k for k, v in self.items.items() if v is comp)
+            if ident not in self.flows.pipe_ids:
+                return comp.label or ident
+            flow = self.engine.db.get(self.engine.db.handle(f"pipe.{ident}.flow"))
+            return f"{comp.label or ident}\npipe.{ident}.flow = {flow:.2f}"
+        lines = [" ".join(comp.name.split()) or type(comp).__name__]
+        model = comp.model
+        if model is not None:
+            for name, kind, _ in model.FIELDS:
+                value = getattr(model, name)
+                lines.append(f"{model.prefix}.{name} = {value:.2f}" if kind is float else f"{model.prefix}.{name} = {value}")
+        return "\n".join(lines)
+
+    def static_layer(self):
+        dpr = self.devicePixelRatioF()
+        key = (self.width(), self.height(), dpr, self.zoom, self.pan.x(), self.pan.y())
+        reuse = self.gesture and self.static_key is not None and self.static_key[:3] == key[:3]
+        if self.static_key != key and not reuse:
+            pixmap = QPixmap(int(self.width() * dpr), int(self.height() * dpr))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setTransform(self.view)
+            for comp in self.visible():
+                comp.draw_static_layer(painter)
+            painter.end()
+            self.static_pixmap = pixmap
+            self.static_key = key
+            self.static_view = QTransform(self.view)
+        return self.static_pixmap
+
+    def resizeEvent(self, event):
+        self.static_key = None
+        self.visible_items = None
+        super().resizeEvent(event)
+
     def paintEvent(self, event):
+        region = event.region()
+        rect = event.rect()
+        dpr = self.devicePixelRatioF()
+        lap = self.profiler.lap()
         painter = QPainter(self)
+        painter.fillRect(rect, Qt.black)
         painter.setRenderHint(QPainter.Antialiasing)
-        painter.fillRect(self.rect(), Qt.black)
-        for conn in self.Ruras:
-            conn.draw(painter)
-        for comp in self.Scadas:
-            comp.draw(painter)
+        painter.setTransform(self.view)
+        view = self.view
+        box = self.scene_rect(rect).adjusted(-1, -1, 1, 1)
+        box = (box.left(), box.top(), box.right(), box.bottom())
+        for conn in self.pipe_index.query(*box):
+            if region.intersects(view.mapRect(conn.bounding_rect())):
+                conn.draw(painter)
+        lap("paint.pipes")
+        static = self.static_layer()
+        if self.static_view == view:
+            painter.resetTransform()
+            source = QRectF(rect.x() * dpr, rect.y() * dpr, rect.width() * dpr, rect.height() * dpr)
+            painter.drawPixmap(QRectF(rect), static, source)
+        else:
+            painter.setTransform(self.static_view.inverted()[0] * view)
+            painter.drawPixmap(QPointF(0, 0), static)
+        painter.setTransform(view)
+        lap("paint.static")
+        for comp in self.comp_index.query(*box):
+            if region.intersects(view.mapRect(comp.bounding_rect())):
+                comp.draw_dynamic_layer(painter)
+        lap("paint.components")
+        painter.resetTransform()
+        if self.overlay and region.intersects(OVERLAY_RECT):
+            self.draw_overlay(painter)
+
+    def draw_overlay(self, painter):
+        stats = self.profiler.stats()
+        phases = stats["phases"]
+        ms = lambda name, key: phases.get(name, {}).get(key, 0.0) / 1000.0
+        lines = [
+            f"Klatka: {ms('frame.interval', 'p50_us'):.1f} / {ms('frame.interval', 'p99_us'):.1f} ms (p50/p99)",
+            f"Praca klatki: {ms('frame.work', 'p50_us'):.2f} / {ms('frame.work', 'p99_us'):.2f} ms",
+            f"Kroki symulacji: {ms('frame.ticks', 'p50_us'):.2f} / {ms('frame.ticks', 'p99_us'):.2f} ms"
+            if "frame.ticks" in phases else
+            f"Odbiór stanu z procesu: {ms('frame.snapshots', 'p50_us'):.2f} / {ms('frame.snapshots', 'p99_us'):.2f} ms",
+            f"Spóźnienie timera: {ms('frame.lateness', 'p50_us'):.1f} / {ms('frame.lateness', 'p99_us'):.1f} ms",
+            f"Pominięte terminy: {stats['counters'].get('frame.missed', 0)}",
+        ]
+        for grupa in ("tick.", "scene.", "bind.", "paint."):
+            for name, s in phases.items():
+                if name.startswith(grupa):
+                    lines.append(f"{name}: {s['p50_us']:.0f} / {s['p99_us']:.0f} µs")
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.fillRect(OVERLAY_RECT, QColor(0, 0, 0, 200))
+        painter.setPen(QColor(0, 255, 0))
+        painter.setFont(QFont("Consolas", 8))
+        for i, line in enumerate(lines[:OVERLAY_RECT.height() // 12]):
+            painter.drawText(OVERLAY_RECT.x() + 5, OVERLAY_RECT.y() + 12 + i * 12, line)
+
+class RefreshBus:
+    def __init__(self):
+        self.subscribers = {}
+
+    def subscribe(self, podglad):
+        self.subscribers.setdefault(podglad.obiekt, []).append(podglad)
+
+    def unsubscribe(self, podglad):
+        podglady = self.subscribers.get(podglad.obiekt, [])
+        if podglad in podglady:
+            podglady.remove(podglad)
+
+    def publish(self, changed):
+        subscribers = self.subscribers
+        for obiekt in changed:
+            for podglad in subscribers.get(obiekt, ()):
+                if podglad.isVisible() and not podglad.window().isMinimized() and not podglad.visibleRegion().isEmpty():
+                    podglad.update()
+
+
+def set_state(widget, stan):
+    widget.setProperty("stan", stan)
+    widget.style().unpolish(widget)
+    widget.style().polish(widget)
+
+
+class WidgetBinder:
+    def __init__(self):
+        self.bindings = []
+
+    def bind(self, getter, apply):
+        self.bindings.append([getter, apply, _MISSING])
+
+    def text(self, widget, getter):
+        self.bind(getter, widget.setText)
+
+    def value(self, widget, getter):
+        self.bind(getter, widget.setValue)
+
+    def maximum(self, widget, getter):
+        self.bind(getter, widget.setMaximum)
+
+    def enabled(self, widget, getter):
+        self.bind(getter, widget.setEnabled)
+
+    def checked(self, widget, getter):
+        self.bind(getter, widget.setChecked)
+
+    def state(self, widget, getter):
+        self.bind(getter, lambda stan: set_state(widget, stan))
+
+    def refresh(self):
+        for binding in self.bindings:
+            value = binding[0]()
+            if value != binding[2]:
+                binding[2] = value
+                binding[1](value)
+
 
 class MiniPodglad(QWidget):
-    def __init__(self, obiekt_scada):
+    def __init__(self, obiekt_scada, bus):
         super().__init__()
         self.obiekt = obiekt_scada
         self.setFixedSize(int(self.obiekt.width), int(self.obiekt.height))
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update)
-        self.timer.start(50)
+        bus.subscribe(self)
 
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        self.obiekt.draw_content(painter)
+        self.obiekt.draw_cached(painter, content=True)
 
-class MiniPodglad(QWidget):
-    def __init__(self, obiekt_scada):
+class TrendChart(QWidget):
+    def __init__(self, historian, serie):
         super().__init__()
-        self.obiekt = obiekt_scada
-        self.setFixedSize(int(self.obiekt.width), int(self.obiekt.height))
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update)
-        self.timer.start(50)
+        self.historian = historian
+        self.tiles = TrendTiles(historian)
+        self.serie = serie
+        self.widoczne = {tag: True for tag, *_ in serie}
+        self.level = LEVELS.index(1)
+        self.t_end = 0.0
+        self.follow = True
+        self.drag_x = None
+        self.setMinimumHeight(220)
+
+    def set_visible_tag(self, tag, visible):
+        self.widoczne[tag] = visible
+        self.update()
+
+    def wheelEvent(self, event):
+        krok = -1 if event.angleDelta().y() > 0 else 1
+        self.level = min(max(self.level + krok, 0), len(LEVELS) - 1)
+        self.update()
+
+    def mousePressEvent(self, event):
+        self.drag_x = event.x()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_x is None:
+            return
+        self.t_end -= (event.x() - self.drag_x) * LEVELS[self.level]
+        self.t_end = min(self.t_end, self.historian.last_time)
+        self.drag_x = event.x()
+        self.follow = False
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        self.drag_x = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.follow = True
+        self.update()
 
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        self.obiekt.draw_content(painter)
+        painter.fillRect(self.rect(), QColor(17, 17, 17))
+        w = self.width()
+        h = self.height() - 20
+        painter.setPen(QPen(QColor(50, 50, 50), 1))
+        for i in range(1, 4):
+            painter.drawLine(0, h * i // 4, w, h * i // 4)
+
+        spp = LEVELS[self.level]
+        if self.follow:
+            self.t_end = self.historian.last_time
+        if self.historian.last_time > 0:
+            x = np.arange(w, dtype=float)
+            for tag, opis, kolor, v_min, v_max in self.serie:
+                if not self.widoczne[tag]:
+                    continue
+                lo, hi = self.tiles.window(tag, spp, self.t_end, w)
+                lo_c = np.fmin(lo, np.roll(hi, 1))
+                hi_c = np.fmax(hi, np.roll(lo, 1))
+                ok = np.isfinite(lo_c)
+                y_lo = h - (lo_c[ok] - v_min) / (v_max - v_min) * h
+                y_hi = h - (hi_c[ok] - v_min) / (v_max - v_min) * h
+                painter.setPen(QPen(kolor, 1))
+                painter.drawLines([QLineF(a, b, a, c) for a, b, c in zip(x[ok].tolist(), y_lo.tolist(), y_hi.tolist())])
+
+        painter.setFont(QFont("Arial", 8))
+        x_txt = 5
+        for tag, opis, kolor, v_min, v_max in self.serie:
+            painter.setPen(kolor if self.widoczne[tag] else QColor(80, 80, 80))
+            painter.drawText(x_txt, h + 15, f"{opis} [{v_min}-{v_max}]")
+            x_txt += 150
+        painter.setPen(Qt.white)
+        okno = spp * w
+        opis_okna = f"{okno:.0f} s" if okno < 3600 else f"{okno / 3600:.1f} h"
+        painter.drawText(w - 150, h + 15, f"Okno: {opis_okna}" + ("" if self.follow else " (historia)"))
 
 class okno_materialy(QWidget):
     def __init__(self, scene):
         super().__init__()
         self.scene = scene
+        self.engine = scene.engine
+        self.commands = scene.commands
         self.setWindowTitle("Zarządzanie materiałami")
         self.resize(1000, 550)
         self.setStyleSheet("background-color: #222; color: white;")
@@ -498,7 +907,7 @@ class okno_materialy(QWidget):
         ramka_wegiel.setStyleSheet("background-color: #2a2a2a; border-radius: 5px;")
         layout_wegiel = QHBoxLayout(ramka_wegiel)
 
-        layout_wegiel.addWidget(MiniPodglad(self.scene.silo))
+        layout_wegiel.addWidget(MiniPodglad(self.scene.silo, self.scene.refresh_bus))
 
         col_wegiel = QVBoxLayout()
 
@@ -541,7 +950,7 @@ class okno_materialy(QWidget):
 
         woda_container = QHBoxLayout()
 
-        def stworz_panel_pionowy(zbiornik, nazwa):
+        def stworz_panel_pionowy(zbiornik, klucz, nazwa):
             frame = QFrame()
             frame.setStyleSheet("background-color: #2a2a2a; border-radius: 5px;")
 
@@ -552,7 +961,7 @@ class okno_materialy(QWidget):
             lbl_name.setAlignment(Qt.AlignCenter)
             v_layout.addWidget(lbl_name)
 
-            grafika = MiniPodglad(zbiornik)
+            grafika = MiniPodglad(zbiornik, self.scene.refresh_bus)
             h_center = QHBoxLayout()
             h_center.addStretch()
             h_center.addWidget(grafika)
@@ -593,8 +1002,11 @@ class okno_materialy(QWidget):
             def on_out_change(val):
                 lbl_out.setText(f"Odpływ: {val}%")
 
+            sl_in.setValue(int(zbiornik.model.flow_in))
+            sl_out.setValue(int(zbiornik.model.flow_out))
+
             def on_click():
-                self.zatwierdz_przeplyw(zbiornik, sl_in, sl_out)
+                self.zatwierdz_przeplyw(klucz, sl_in, sl_out)
 
             sl_in.valueChanged.connect(on_in_change)
             sl_out.valueChanged.connect(on_out_change)
@@ -602,17 +1014,29 @@ class okno_materialy(QWidget):
 
             return frame
 
-        woda_container.addWidget(stworz_panel_pionowy(self.scene.w1, "ZB. GŁÓWNY 1"))
-        woda_container.addWidget(stworz_panel_pionowy(self.scene.w2, "ZB. GŁÓWNY 2"))
-        woda_container.addWidget(stworz_panel_pionowy(self.scene.wr, "REZERWA"))
+        woda_container.addWidget(stworz_panel_pionowy(self.scene.w1, "w1", "ZB. GŁÓWNY 1"))
+        woda_container.addWidget(stworz_panel_pionowy(self.scene.w2, "w2", "ZB. GŁÓWNY 2"))
+        woda_container.addWidget(stworz_panel_pionowy(self.scene.wr, "wr", "REZERWA"))
 
         main_layout.addLayout(woda_container)
 
         self.setLayout(main_layout)
 
-        self.timer_logic = QTimer(self)
-        self.timer_logic.timeout.connect(self.update_logic)
-        self.timer_logic.start(100)
+        e = self.engine
+        self.binder = WidgetBinder()
+        self.binder.text(self.lbl_wolne, lambda: f"Wolne: {int(100.0 - e.silo.amount)}%")
+        self.binder.text(self.lbl_tonaz, lambda: f"Stan: {int(e.silo.amount / 100.0 * SILO_CAPACITY_T)} / {int(SILO_CAPACITY_T)} t")
+        self.binder.maximum(self.slider_wegiel, lambda: max(0, int(100.0 - e.silo.amount)))
+        for z in [self.scene.w1, self.scene.w2, self.scene.wr]:
+            if z.ui_label_m3:
+                self.binder.text(z.ui_label_m3, lambda m=z.model: self.opis_zbiornika(m))
+
+    @staticmethod
+    def opis_zbiornika(model):
+        aktualne_m3 = (model.level / 100.0) * TANK_CAPACITY_M3
+        bilans_m3 = model.balance_m3
+        znak = "+" if bilans_m3 >= 0 else ""
+        return f"{aktualne_m3:.1f} m³\nBilans: {znak}{bilans_m3:.2f}"
 
     def aktualizuj_etykiete_suwaka_wegla(self, val):
         tony_wybrane = (val / 100.0) * 800.0
@@ -621,55 +1045,24 @@ class okno_materialy(QWidget):
     def wykonaj_dostawe(self):
         val = self.slider_wegiel.value()
         if val > 0:
-            self.scene.silo.amount += val
+            self.commands.deliver_coal(val)
             self.slider_wegiel.setValue(0)
             self.lbl_wybrano.setText("Wybrano: 0 %")
 
-    def zatwierdz_przeplyw(self, zbiornik, slider_in, slider_out):
-        zbiornik.flow_in = float(slider_in.value())
-        zbiornik.flow_out = float(slider_out.value())
-
-    def update_logic(self):
-        obecny_poziom_proc = self.scene.silo.amount
-        wolne_miejsce = 100.0 - obecny_poziom_proc
-        self.lbl_wolne.setText(f"Wolne: {int(wolne_miejsce)}%")
-
-        obecne_tony = (obecny_poziom_proc / 100.0) * 800.0
-        self.lbl_tonaz.setText(f"Stan: {int(obecne_tony)} / 800 t")
-
-        max_dostawa = int(wolne_miejsce)
-        self.slider_wegiel.setMaximum(max_dostawa)
-        if self.slider_wegiel.value() > max_dostawa:
-            self.slider_wegiel.setValue(max_dostawa)
-
-        POJEMNOSC_ZBIORNIKA_M3 = 1000.0
-        MAX_PRZEPUSTOWOSC_RURY = 5.0
-
-        for z in [self.scene.w1, self.scene.w2, self.scene.wr]:
-            if hasattr(z, 'flow_in'):
-                wplyw_m3 = (z.flow_in / 100.0) * MAX_PRZEPUSTOWOSC_RURY
-                wyplyw_m3 = (z.flow_out / 100.0) * MAX_PRZEPUSTOWOSC_RURY
+    def zatwierdz_przeplyw(self, klucz, slider_in, slider_out):
+        self.commands.set_tank_flow(klucz, slider_in.value(), slider_out.value())
 
-                bilans_m3 = wplyw_m3 - wyplyw_m3
-                delta_procent = (bilans_m3 / POJEMNOSC_ZBIORNIKA_M3) * 100.0
-
-                z.level = max(0.0, min(100.0, z.level + delta_procent))
-
-                if hasattr(z, 'ui_label_m3') and z.ui_label_m3:
-                    aktualne_m3 = (z.level / 100.0) * POJEMNOSC_ZBIORNIKA_M3
-                    znak = "+" if bilans_m3 >= 0 else ""
-                    str_bilans = f"{znak}{bilans_m3:.2f}"
-                    z.ui_label_m3.setText(
-                        f"{aktualne_m3:.1f} m³\n"
-                        f"Bilans: {str_bilans}"
-                    )
+    def update_view(self):
+        self.binder.refresh()
 
 class okno_generacja(QWidget):
-    def __init__(self, scene):
+    def __init__(self, scene, historian=None):
         super().__init__()
         self.scene = scene
+        self.engine = scene.engine
+        self.commands = scene.commands
         self.setWindowTitle("Generacja")
-        self.resize(1000, 600)
+        self.resize(1000, 850 if historian is not None else 600)
 
         self.setStyleSheet("""
             QWidget { background-color: #1a1a1a; color: #eee; font-family: Arial; }
@@ -677,11 +1070,13 @@ class okno_generacja(QWidget):
             QSlider::handle:horizontal { background: #ff9900; width: 20px; border-radius: 5px; }
             QProgressBar { border: 1px solid #555; text-align: center; color: white; font-weight: bold; }
             QProgressBar::chunk { background-color: #ff9900; }
+            QLabel[stan="gotowy"] { color: green; }
+            QLabel[stan="zimny"] { color: gray; }
         """)
 
-        self.tank_val = 500.0
-
-        layout = QHBoxLayout(self)
+        outer = QVBoxLayout(self)
+        layout = QHBoxLayout()
+        outer.addLayout(layout)
 
         col_boiler = QVBoxLayout()
 
@@ -689,7 +1084,7 @@ class okno_generacja(QWidget):
         frame_boiler.setStyleSheet("background-color: #222; border: 1px solid #444;")
         lay_fb = QVBoxLayout(frame_boiler)
         lay_fb.addWidget(QLabel("1. KOCIOŁ PAROWY"))
-        lay_fb.addWidget(MiniPodglad(self.scene.boiler))
+        lay_fb.addWidget(MiniPodglad(self.scene.boiler, self.scene.refresh_bus))
         col_boiler.addWidget(frame_boiler)
 
         self.lbl_feed = QLabel("PALENISKO (WĘGIEL): 0%")
@@ -697,6 +1092,8 @@ class okno_generacja(QWidget):
         col_boiler.addWidget(self.lbl_feed)
         self.slider_feed = QSlider(Qt.Horizontal)
         self.slider_feed.setRange(0, 100)
+        self.slider_feed.setValue(self.engine.feed)
+        self.slider_feed.valueChanged.connect(self.commands.set_feed)
         self.slider_feed.valueChanged.connect(self.update_labels)
         col_boiler.addWidget(self.slider_feed)
 
@@ -737,6 +1134,8 @@ class okno_generacja(QWidget):
         lay_ft.addWidget(QLabel("POMPA KOTŁOWA (Tłoczenie do kotła)"))
         self.slider_pump = QSlider(Qt.Horizontal)
         self.slider_pump.setStyleSheet("QSlider::handle:horizontal { background: #0088ff; }")
+        self.slider_pump.setValue(self.engine.pump)
+        self.slider_pump.valueChanged.connect(self.commands.set_pump)
         lay_ft.addWidget(self.slider_pump)
 
         col_boiler.addWidget(frame_tank)
@@ -748,17 +1147,18 @@ class okno_generacja(QWidget):
         frame_res.setStyleSheet("background-color: #222; border: 1px solid #444;")
         lay_fr = QVBoxLayout(frame_res)
         lay_fr.addWidget(QLabel("2. BUFOR CIEPŁA"))
-        lay_fr.addWidget(MiniPodglad(self.scene.hot_res))
+        lay_fr.addWidget(MiniPodglad(self.scene.hot_res, self.scene.refresh_bus))
         col_res.addWidget(frame_res)
 
         box_dump = QFrame()
         box_dump.setStyleSheet("background-color: #331111; border-radius: 5px; padding: 5px;")
         lay_bd = QVBoxLayout(box_dump)
         self.lbl_valve_status = QLabel("Wymagane > 110°C")
-        self.lbl_valve_status.setStyleSheet("color: gray;")
+        set_state(self.lbl_valve_status, "zimny")
         lay_bd.addWidget(self.lbl_valve_status)
         self.chk_to_reserve = QCheckBox("ZRZUT DO BUFORA")
         self.chk_to_reserve.setEnabled(False)
+        self.chk_to_reserve.clicked.connect(self.commands.set_dump_valve)
         lay_bd.addWidget(self.chk_to_reserve)
         col_res.addWidget(box_dump)
 
@@ -766,6 +1166,8 @@ class okno_generacja(QWidget):
         self.slider_city = QSlider(Qt.Horizontal)
         self.slider_city.setRange(0, 100)
         self.slider_city.setStyleSheet("QSlider::handle:horizontal { background: #ff4444; }")
+        self.slider_city.setValue(self.engine.city)
+        self.slider_city.valueChanged.connect(self.commands.set_city)
         self.slider_city.valueChanged.connect(self.update_labels)
         col_res.addWidget(self.slider_city)
         self.lbl_city_flow = QLabel("...")
@@ -779,7 +1181,7 @@ class okno_generacja(QWidget):
         frame_turb.setStyleSheet("background-color: #222; border: 1px solid #444;")
         lay_fturb = QVBoxLayout(frame_turb)
         lay_fturb.addWidget(QLabel("3. TURBINA"))
-        lay_fturb.addWidget(MiniPodglad(self.scene.Turbina))
+        lay_fturb.addWidget(MiniPodglad(self.scene.Turbina, self.scene.refresh_bus))
         col_turbine.addWidget(frame_turb)
 
         self.lbl_rpm = QLabel("0 RPM")
@@ -797,131 +1199,57 @@ class okno_generacja(QWidget):
         col_turbine.addStretch()
         layout.addLayout(col_turbine)
 
-        self.physics_timer = QTimer(self)
-        self.physics_timer.timeout.connect(self.update_physics)
-        self.physics_timer.start(100)
+        self.trend = None
+        if historian is not None:
+            self.trend = TrendChart(historian, [
+                ("boiler.pressure", "Ciśnienie", QColor(48, 214, 214), 0, 150),
+                ("turbine.rpm", "Obroty", QColor(255, 153, 0), 0, 3500),
+                ("boiler.temp", "Temperatura", QColor(214, 48, 48), 0, 600),
+            ])
+            lay_trend = QHBoxLayout()
+            lay_trend.addWidget(QLabel("TREND:"))
+            for tag, opis, *_ in self.trend.serie:
+                chk = QCheckBox(opis)
+                chk.setChecked(True)
+                chk.toggled.connect(lambda on, tag=tag: self.trend.set_visible_tag(tag, on))
+                lay_trend.addWidget(chk)
+            lay_trend.addStretch()
+            lay_trend.addWidget(QLabel("kółko: zoom, przeciąganie: przesuw, dwuklik: na żywo"))
+            outer.addLayout(lay_trend)
+            outer.addWidget(self.trend)
+
+        self.update_labels()
+
+        e = self.engine
+        self.binder = WidgetBinder()
+        self.binder.text(self.lbl_inflow_info, lambda: f"Dopływ z rurociągów (W1+W2+WR): {e.real_inflow:.1f} m³/jedn")
+        self.binder.value(self.bar_tank, lambda: int(e.tank_val))
+        self.binder.checked(self.chk_to_reserve, lambda: e.dump_valve)
+        self.binder.enabled(self.chk_to_reserve, lambda: e.dump_ready)
+        self.binder.text(self.lbl_valve_status, lambda: "GOTOWOŚĆ" if e.dump_ready else "Zimny kocioł")
+        self.binder.state(self.lbl_valve_status, lambda: "gotowy" if e.dump_ready else "zimny")
+        self.binder.value(self.bar_temp, lambda: int(e.boiler.temp))
+        self.binder.value(self.bar_press, lambda: int(e.boiler.pressure))
+        self.binder.value(self.bar_boiler_water, lambda: int(e.boiler.water_level))
+        self.binder.text(self.lbl_rpm, lambda: f"{int(e.turbine.rpm)} RPM")
+        self.binder.value(self.bar_rpm, lambda: int(e.turbine.rpm))
+        self.binder.text(self.lbl_mw, lambda: f"{e.turbine.power_mw:.1f} MW")
+        self.binder.text(self.lbl_city_flow, lambda: f"Stan: {int(e.hot_res.level / 100.0 * e.hot_res.max_capacity)} m³ / {int(e.hot_res.max_capacity)} m³")
 
     def update_labels(self):
         self.lbl_feed.setText(f"PALENISKO (WĘGIEL): {self.slider_feed.value()}%")
 
-    def update_physics(self):
-        dt = 0.1
-
-        inflow_sum = 0.0
-
-        if self.scene.w1.level > 0: inflow_sum += self.scene.w1.flow_out
-        if self.scene.w2.level > 0: inflow_sum += self.scene.w2.flow_out
-        if self.scene.wr.level > 0: inflow_sum += self.scene.wr.flow_out
-
-        real_inflow = inflow_sum * 0.05
-
-        self.tank_val += real_inflow * dt
-
-        self.lbl_inflow_info.setText(f"Dopływ z rurociągów (W1+W2+WR): {real_inflow:.1f} m³/jedn")
-
-        pump_speed = self.slider_pump.value() * 0.2
-        actual_pump = 0.0
-
-        if self.tank_val > 0 and self.scene.boiler.water_level < 100:
-            actual_pump = pump_speed
-
-            max_possible = self.tank_val / dt
-            if actual_pump > max_possible:
-                actual_pump = max_possible
-
-            self.tank_val -= actual_pump * dt
-
-        if self.tank_val < 0: self.tank_val = 0
-        if self.tank_val > 1000: self.tank_val = 1000
-        self.bar_tank.setValue(int(self.tank_val))
-
-        self.scene.boiler.water_level += actual_pump * 0.2 * dt
-
-        steam_loss = 0.0
-        if self.scene.boiler.pressure > 0:
-            steam_loss = self.scene.boiler.pressure * 0.05
-        self.scene.boiler.water_level -= steam_loss * dt
-
-        if self.scene.boiler.water_level < 0: self.scene.boiler.water_level = 0
-        if self.scene.boiler.water_level > 100: self.scene.boiler.water_level = 100
-
-        feed = self.slider_feed.value()
-        heat_gain = 0
-        if self.scene.silo.amount > 0:
-            burn_cost = (feed / 100.0) * 0.05
-            if self.scene.silo.amount >= burn_cost:
-                self.scene.silo.amount -= burn_cost
-                heat_gain = feed * 0.3
-            else:
-                self.scene.silo.amount = 0
-
-        heat_loss = (self.scene.boiler.temp - 20.0) * 0.02
-
-        if self.scene.boiler.water_level <= 0: pass
-
-        transfer_cooling = 0.0
-        valve_open = self.chk_to_reserve.isChecked()
-        if self.scene.boiler.temp > 110.0:
-            self.chk_to_reserve.setEnabled(True)
-            self.lbl_valve_status.setText("GOTOWOŚĆ")
-            self.lbl_valve_status.setStyleSheet("color: green")
-            if valve_open:
-                if self.scene.hot_res.level < 100:
-                    transfer_cooling = 15.0
-                    self.scene.hot_res.level += 0.2
-        else:
-            if valve_open: self.chk_to_reserve.setChecked(False)
-            self.chk_to_reserve.setEnabled(False)
-            self.lbl_valve_status.setText("Zimny kocioł")
-            self.lbl_valve_status.setStyleSheet("color: gray")
-
-        self.scene.boiler.temp += (heat_gain - heat_loss - transfer_cooling) * dt
-        self.scene.boiler.temp = max(20.0, min(600.0, self.scene.boiler.temp))
-
-        target_p = 0
-        if self.scene.boiler.temp > 100 and self.scene.boiler.water_level > 0:
-            target_p = (self.scene.boiler.temp - 100) * 0.5
-
-        inertia = 0.05 if self.scene.boiler.water_level > 0 else 0.2
-        self.scene.boiler.pressure += (target_p - self.scene.boiler.pressure) * inertia
-
-        city_demand = self.slider_city.value()
-        if self.scene.hot_res.level > 0:
-            drain = (city_demand / 100.0) * 0.1
-            self.scene.hot_res.level -= drain
-        self.scene.hot_res.level = max(0.0, min(100.0, self.scene.hot_res.level))
-
-        p_in = self.scene.boiler.pressure
-        torque = 0
-        if p_in > 20: torque = (p_in - 20) * 2.0
-        friction = self.scene.Turbina.rpm * 0.05
-        load = 0
-        if self.scene.Turbina.rpm > 2500: load = (self.scene.Turbina.rpm - 2500) * 0.5
-
-        self.scene.Turbina.rpm += (torque - friction - load) * dt
-        if self.scene.Turbina.rpm < 0: self.scene.Turbina.rpm = 0
-
-        mw = 0
-        if self.scene.Turbina.rpm > 0:
-            mw = (self.scene.Turbina.rpm / 3000.0) * 50.0
-            if mw > 55: mw = 55
-        self.scene.Turbina.power_mw = mw
-
-        self.bar_temp.setValue(int(self.scene.boiler.temp))
-        self.bar_press.setValue(int(self.scene.boiler.pressure))
-        self.bar_boiler_water.setValue(int(self.scene.boiler.water_level))
-        self.lbl_rpm.setText(f"{int(self.scene.Turbina.rpm)} RPM")
-        self.bar_rpm.setValue(int(self.scene.Turbina.rpm))
-        self.lbl_mw.setText(f"{mw:.1f} MW")
-
-        cap = getattr(self.scene.hot_res, 'max_capacity', 1000.0)
-        vol = (self.scene.hot_res.level / 100.0) * cap
-        self.lbl_city_flow.setText(f"Stan: {int(vol)} m³ / {int(cap)} m³")
+    def update_view(self):
+        self.binder.refresh()
+        if self.trend is not None:
+            self.trend.update()
 
 class okno_energia(QWidget):
     def __init__(self, scene):
         super().__init__()
         self.scene = scene
+        self.engine = scene.engine
+        self.commands = scene.commands
         self.setWindowTitle("ROZDZIELNIA GPZ - STEROWANIE MOCĄ")
         self.resize(1000, 600)
 
@@ -976,6 +1304,18 @@ class okno_energia(QWidget):
                 border: 2px solid #fff;
             }
             QCheckBox:checked { color: white; border: 1px solid #00ff00; }
+
+            QLabel#arrow { font-size: 30px; color: gray; }
+            QLabel#arrow[stan="ok"] { color: #00ff00; }
+            QLabel#arrow[stan="ladowanie"] { color: orange; }
+            QLabel#arrow[stan="oddawanie"] { color: cyan; }
+            QLabel#arrow[stan="alarm"] { color: red; }
+            QLabel#bat_status { color: white; font-size: 14px; }
+            QLabel#bat_status[stan="spoczynek"] { color: gray; }
+            QLabel#bat_status[stan="ladowanie"] { color: orange; }
+            QLabel#bat_status[stan="pelne"] { color: green; }
+            QLabel#bat_status[stan="oddawanie"] { color: cyan; }
+            QLabel#bat_status[stan="alarm"] { color: red; }
         """)
 
         main_layout = QVBoxLayout(self)
@@ -989,7 +1329,7 @@ class okno_energia(QWidget):
         fr_gen.setObjectName("SubPanel")
         l_gen = QVBoxLayout(fr_gen)
         l_gen.addWidget(QLabel("WEJŚCIE (TURBINA)"))
-        l_gen.addWidget(MiniPodglad(self.scene.Turbina))
+        l_gen.addWidget(MiniPodglad(self.scene.Turbina, self.scene.refresh_bus))
         self.lbl_gen = QLabel("0 MW")
         self.lbl_gen.setStyleSheet("color: yellow; font-size: 20px;")
         self.lbl_gen.setAlignment(Qt.AlignCenter)
@@ -997,7 +1337,7 @@ class okno_energia(QWidget):
         top_layout.addWidget(fr_gen)
 
         self.arrow_1 = QLabel(">>>")
-        self.arrow_1.setStyleSheet("font-size: 30px; color: gray;")
+        self.arrow_1.setObjectName("arrow")
         self.arrow_1.setAlignment(Qt.AlignCenter)
         top_layout.addWidget(self.arrow_1)
 
@@ -1010,28 +1350,30 @@ class okno_energia(QWidget):
 
         v_aku1 = QVBoxLayout()
         self.chk_a = QCheckBox("SEKCJA A")
-        self.chk_a.setChecked(True)
+        self.chk_a.setChecked(self.engine.section_a)
+        self.chk_a.toggled.connect(lambda on: self.commands.set_section("a", on))
         v_aku1.addWidget(self.chk_a)
-        v_aku1.addWidget(MiniPodglad(self.scene.bat1))
+        v_aku1.addWidget(MiniPodglad(self.scene.bat1, self.scene.refresh_bus))
         hbox_akusy.addLayout(v_aku1)
 
         v_aku2 = QVBoxLayout()
         self.chk_b = QCheckBox("SEKCJA B")
-        self.chk_b.setChecked(True)
+        self.chk_b.setChecked(self.engine.section_b)
+        self.chk_b.toggled.connect(lambda on: self.commands.set_section("b", on))
         v_aku2.addWidget(self.chk_b)
-        v_aku2.addWidget(MiniPodglad(self.scene.bat2))
+        v_aku2.addWidget(MiniPodglad(self.scene.bat2, self.scene.refresh_bus))
         hbox_akusy.addLayout(v_aku2)
 
         l_bat.addLayout(hbox_akusy)
 
         self.lbl_bat_status = QLabel("STAN: SPOCZYNEK")
         self.lbl_bat_status.setAlignment(Qt.AlignCenter)
-        self.lbl_bat_status.setStyleSheet("color: white; font-size: 14px;")
+        self.lbl_bat_status.setObjectName("bat_status")
         l_bat.addWidget(self.lbl_bat_status)
         top_layout.addWidget(fr_bat)
 
         self.arrow_2 = QLabel(">>>")
-        self.arrow_2.setStyleSheet("font-size: 30px; color: gray;")
+        self.arrow_2.setObjectName("arrow")
         self.arrow_2.setAlignment(Qt.AlignCenter)
         top_layout.addWidget(self.arrow_2)
 
@@ -1039,7 +1381,7 @@ class okno_energia(QWidget):
         fr_grid.setObjectName("SubPanel")
         l_grid = QVBoxLayout(fr_grid)
         l_grid.addWidget(QLabel("WYJŚCIE (SIEĆ KSE)"))
-        l_grid.addWidget(MiniPodglad(self.scene.lines))
+        l_grid.addWidget(MiniPodglad(self.scene.lines, self.scene.refresh_bus))
         self.lbl_grid = QLabel("0 MW")
         self.lbl_grid.setStyleSheet("color: #00ff00; font-size: 20px;")
         self.lbl_grid.setAlignment(Qt.AlignCenter)
@@ -1058,7 +1400,6 @@ class okno_energia(QWidget):
 
         self.btn_normal = QPushButton("PRACA NA SIEĆ\n(NORMAL)")
         self.btn_normal.setCheckable(True)
-        self.btn_normal.setChecked(True)
         self.btn_group.addButton(self.btn_normal)
         bot_layout.addWidget(self.btn_normal)
 
@@ -1083,122 +1424,104 @@ class okno_energia(QWidget):
         bot_layout.addStretch()
         main_layout.addWidget(self.frame_bot, stretch=1)
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_physics)
-        self.timer.start(100)
-
-    def update_physics(self):
-        dt = 0.1
-
-        mw_in = self.scene.Turbina.power_mw
-        mw_out = 0.0
-
-        active_bats = []
-        if self.chk_a.isChecked(): active_bats.append(self.scene.bat1)
-        if self.chk_b.isChecked(): active_bats.append(self.scene.bat2)
-
-        if self.btn_normal.isChecked():
-            mw_out = mw_in
-            self.arrow_1.setText(">>>")
-            self.arrow_1.setStyleSheet("color: #00ff00; font-size: 30px;")
-            self.arrow_2.setText(">>>")
-            self.arrow_2.setStyleSheet("color: #00ff00; font-size: 30px;")
-            self.lbl_bat_status.setText("SPOCZYNEK")
-            self.lbl_bat_status.setStyleSheet("color: gray;")
-
-        elif self.btn_charge.isChecked():
-            TOTAL_CHARGE_CAPACITY = 15.0
-
-            if mw_in > 0 and len(active_bats) > 0:
-                hungry = [b for b in active_bats if b.charge < 100.0]
-                used = 0.0
-
-                if hungry:
-                    p_per_bat = TOTAL_CHARGE_CAPACITY / len(hungry)
+        self.mode_buttons = {
+            MODE_NORMAL: self.btn_normal,
+            MODE_CHARGE: self.btn_charge,
+            MODE_DISCHARGE: self.btn_discharge,
+            MODE_OFF: self.btn_off,
+        }
+        self.mode_buttons[self.engine.mode].setChecked(True)
+        for mode, btn in self.mode_buttons.items():
+            btn.clicked.connect(lambda _, m=mode: self.commands.set_mode(m))
+
+        e = self.engine
+        self.widok = self.energy_view()
+        self.binder = WidgetBinder()
+        for i, widget in enumerate((self.arrow_1, self.arrow_2, self.lbl_bat_status)):
+            self.binder.text(widget, lambda i=i: self.widok[i][0])
+            self.binder.state(widget, lambda i=i: self.widok[i][1])
+        self.binder.text(self.lbl_gen, lambda: f"{e.turbine.power_mw:.1f} MW")
+        self.binder.text(self.lbl_grid, lambda: f"{e.mw_out:.1f} MW")
+
+    def energy_view(self):
+        e = self.engine
+        status = e.bat_status
+        n = e.bat_sections
+
+        if e.mode == MODE_NORMAL:
+            return (">>>", "ok"), (">>>", "ok"), ("SPOCZYNEK", "spoczynek")
+
+        if e.mode == MODE_CHARGE:
+            if status == BAT_CHARGING:
+                bat = (f"ŁADOWANIE ({n} SEKCJE)", "ladowanie")
+            elif status == BAT_FULL:
+                bat = ("SEKCJE PEŁNE", "pelne")
+            elif status == BAT_NO_SECTIONS:
+                bat = ("BRAK SEKCJI!", "alarm")
+            else:
+                bat = ("BRAK MOCY WEJ.", "alarm")
+            arrow_2 = (">>>", "ok") if e.mw_out > 0 else ("---", "")
+            return (">>>", "ladowanie"), arrow_2, bat
 
-                    if mw_in < TOTAL_CHARGE_CAPACITY:
-                        p_per_bat = mw_in / len(hungry)
-                        used = mw_in
-                    else:
-                        used = TOTAL_CHARGE_CAPACITY
+        if e.mode == MODE_DISCHARGE:
+            if status == BAT_DISCHARGING:
+                return (">>>", "ok"), (">>> >>>", "oddawanie"), (f"ODDAWANIE ({n} SEKCJE)", "oddawanie")
+            bat = ("BRAK SEKCJI!" if status == BAT_NO_SECTIONS else "PUSTE!", "alarm")
+            return (">>>", "ok"), (">>>", "ok"), bat
 
-                    for b in hungry:
-                        b.charge += p_per_bat * 0.2 * dt
-                        if b.charge > 100: b.charge = 100
+        return ("X", "alarm"), ("X", "alarm"), ("ODCIĘTE", "alarm")
 
-                    self.lbl_bat_status.setText(f"ŁADOWANIE ({len(hungry)} SEKCJE)")
-                    self.lbl_bat_status.setStyleSheet("color: orange; font-weight: bold;")
-                else:
-                    self.lbl_bat_status.setText("SEKCJE PEŁNE")
-                    self.lbl_bat_status.setStyleSheet("color: green;")
+    def update_view(self):
+        self.widok = self.energy_view()
+        self.binder.refresh()
 
-                mw_out = max(0.0, mw_in - used)
-            else:
-                mw_out = 0.0
-                if len(active_bats) == 0:
-                    self.lbl_bat_status.setText("BRAK SEKCJI!")
-                    self.lbl_bat_status.setStyleSheet("color: red;")
-                else:
-                    self.lbl_bat_status.setText("BRAK MOCY WEJ.")
-                    self.lbl_bat_status.setStyleSheet("color: red;")
-
-            self.arrow_1.setText(">>>")
-            self.arrow_1.setStyleSheet("color: orange; font-size: 30px;")
-            self.arrow_2.setText(">>>") if mw_out > 0 else self.arrow_2.setText("---")
-
-        elif self.btn_discharge.isChecked():
-            TOTAL_DISCHARGE_CAP = 20.0
-
-            full = [b for b in active_bats if b.charge > 0.0]
-            boost = 0.0
-
-            if full:
-                p_per_bat = TOTAL_DISCHARGE_CAP / len(full)
-                for b in full:
-                    b.charge -= p_per_bat * 0.25 * dt
-                    if b.charge < 0: b.charge = 0
-                    boost += p_per_bat
-
-                self.lbl_bat_status.setText(f"ODDAWANIE ({len(full)} SEKCJE)")
-                self.lbl_bat_status.setStyleSheet("color: cyan; font-weight: bold;")
-                self.arrow_1.setText(">>>")
-                self.arrow_1.setStyleSheet("color: #00ff00; font-size: 30px;")
-                self.arrow_2.setText(">>> >>>")
-                self.arrow_2.setStyleSheet("color: cyan; font-size: 30px;")
-            else:
-                if len(active_bats) == 0:
-                    self.lbl_bat_status.setText("BRAK SEKCJI!")
-                else:
-                    self.lbl_bat_status.setText("PUSTE!")
-                self.lbl_bat_status.setStyleSheet("color: red; font-weight: bold;")
-                self.arrow_2.setText(">>>")
-
-            mw_out = mw_in + boost
-
-        elif self.btn_off.isChecked():
-            mw_out = 0.0
-            self.arrow_1.setText("X")
-            self.arrow_1.setStyleSheet("color: red; font-size: 30px;")
-            self.arrow_2.setText("X")
-            self.arrow_2.setStyleSheet("color: red; font-size: 30px;")
-            self.lbl_bat_status.setText("ODCIĘTE")
-            self.lbl_bat_status.setStyleSheet("color: red;")
-
-        self.lbl_gen.setText(f"{mw_in:.1f} MW")
-        self.lbl_grid.setText(f"{mw_out:.1f} MW")
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, replay=None, worker=True):
         super().__init__()
-        self.setWindowTitle("Elektrociepłownia")
+        self.setWindowTitle("Elektrociepłownia" + (" (ODTWARZANIE)" if replay else ""))
         self.resize(1100, 750)
         self.setStyleSheet("background-color: black;")
 
         self.scene = ScadaScene()
         self.setCentralWidget(self.scene)
 
+        run_dir = os.path.join(HISTORY_DIR, time.strftime("%Y%m%d_%H%M%S"))
+        os.makedirs(run_dir, exist_ok=True)
+        journal_path = os.path.join(run_dir, "polecenia.scj")
+        self.journal = None
+        self.player = None
+        self.worker = worker
+        self.run_dir = run_dir
+        self.profiler = NULL_PROFILER
+        self.alarms = plant_alarms(AlarmEngine(self.scene.engine.db))
+        if worker:
+            engine = self.scene.engine
+            engine.observers.remove(self.scene.flows.on_tick)
+            self.alarms.export().follow(engine)
+            self.clock = SimulationProcess(engine, list(self.scene.engines),
+                                           journal_path=None if replay else journal_path, replay_path=replay,
+                                           layout_path=DEFAULT_LAYOUT, history_dir=run_dir, alarms=True)
+            self.scene.commands = self.clock.commands
+            self.historian = Historian(engine.db, os.path.join(run_dir, "podglad"),
+                                        deviations=HISTORY_DEVIATIONS, rollup_tags=HISTORY_ROLLUPS)
+            self.historian.attach(engine)
+        else:
+            if replay:
+                self.player = JournalPlayer(self.scene.engine, replay)
+                self.player.attach()
+            else:
+                self.journal = CommandJournal(self.scene.engine, journal_path)
+                self.scene.commands = self.journal
+            self.clock = SimulationClock(self.scene.engine)
+            self.historian = Historian(self.scene.engine.db, run_dir,
+                                        deviations=HISTORY_DEVIATIONS, rollup_tags=HISTORY_ROLLUPS)
+            self.historian.attach(self.scene.engine)
+            self.alarms.attach(self.scene.engine)
+        self.last_frame = time.perf_counter()
         self.timer = QTimer()
-        self.timer.timeout.connect(self.scene.update_simulation)
-        self.timer.start(50)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.on_frame)
+        self.timer.start(FRAME_MS)
 
         self.okno_materialy = None
         self.okno_gen = None
@@ -1219,6 +1542,111 @@ class MainWindow(QMainWindow):
         btn_en.setStyleSheet("background-color: lightgray; color: black; border: 2px solid white;")
         btn_en.clicked.connect(self.otworz_okno_energii)
 
+        self.combo_speed = QComboBox(self)
+        self.combo_speed.setGeometry(680, 600, 100, 50)
+        self.combo_speed.setStyleSheet("background-color: lightgray; color: black; border: 2px solid white;")
+        self.combo_speed.addItems(list(SPEEDS))
+        self.combo_speed.currentTextChanged.connect(lambda nazwa: self.clock.set_speed(SPEEDS[nazwa]))
+
+        self.lbl_czas = QLabel(self)
+        self.lbl_czas.setGeometry(790, 600, 250, 50)
+        self.lbl_czas.setStyleSheet("color: white; font-size: 14px;")
+
+        self.lbl_alarmy = QLabel(self)
+        self.lbl_alarmy.setGeometry(50, 665, 800, 40)
+        self.lbl_alarmy.setStyleSheet("""
+            QLabel { color: gray; font-size: 14px; font-weight: bold; }
+            QLabel[stan="nowy"] { color: red; }
+            QLabel[stan="potwierdzony"] { color: orange; }
+        """)
+        btn_ack = QPushButton("POTWIERDŹ", self)
+        btn_ack.setGeometry(860, 665, 180, 40)
+        btn_ack.setStyleSheet("background-color: lightgray; color: black; border: 2px solid white;")
+        btn_ack.clicked.connect(self.ack_alarms)
+
+        self.binder = WidgetBinder()
+        self.binder.text(self.lbl_alarmy, self.opis_alarmow)
+        self.binder.state(self.lbl_alarmy, self.stan_alarmow)
+
+    def ack_alarms(self):
+        self.alarms.ack()
+        if self.worker:
+            self.clock.ack_alarm()
+
+    def on_frame(self):
+        now = time.perf_counter()
+        prof = self.profiler
+        if prof.enabled:
+            interval = now - self.last_frame
+            prof.add("frame.interval", int(interval * 1e9))
+            prof.add("frame.lateness", int(max(0.0, interval - FRAME_MS / 1000.0) * 1e9))
+            if interval > 1.5 * FRAME_MS / 1000.0:
+                prof.count("frame.missed")
+        lap = prof.lap()
+        self.clock.advance(now - self.last_frame)
+        self.last_frame = now
+        lap("frame.snapshots" if self.worker else "frame.ticks")
+
+        self.scene.update_simulation()
+        for okno in (self.okno_materialy, self.okno_gen, self.okno_energy):
+            if okno is not None and okno.isVisible():
+                okno.update_view()
+                lap("bind." + type(okno).__name__)
+
+        self.binder.refresh()
+        lap("bind.MainWindow")
+        if prof.enabled:
+            prof.add("frame.work", int((time.perf_counter() - now) * 1e9))
+        t = int(self.clock.sim_time)
+        self.lbl_czas.setText(f"Czas: {t // 3600:02d}:{t // 60 % 60:02d}:{t % 60:02d} ({self.combo_speed.currentText()})")
+
+    def set_profiling(self, on):
+        if on and not self.profiler.enabled:
+            self.profiler = TickProfiler()
+            if self.worker:
+                self.profiler.sources.append(self.clock.profile_stats)
+                self.clock.set_profiling(True)
+            else:
+                self.profiler.attach(self.scene.engine)
+        elif not on and self.profiler.enabled:
+            if self.worker:
+                self.clock.set_profiling(False)
+            self.profiler.detach()
+            self.profiler = NULL_PROFILER
+        self.scene.profiler = self.profiler
+        self.scene.overlay = on
+        self.scene.update(OVERLAY_RECT)
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_F3:
+            self.set_profiling(not self.profiler.enabled)
+        elif event.key() == Qt.Key_F4 and self.profiler.enabled:
+            self.profiler.dump(os.path.join(self.run_dir, "profil.json"))
+        else:
+            super().keyPressEvent(event)
+
+    def opis_alarmow(self):
+        widoczne = self.alarms.visible()
+        if not widoczne:
+            return "Brak alarmów"
+        reszta = f" (+{len(widoczne) - 1})" if len(widoczne) > 1 else ""
+        return f"ALARM: {widoczne[0][1]}{reszta}"
+
+    def stan_alarmow(self):
+        widoczne = self.alarms.visible()
+        if any(not acked for _, _, _, acked in widoczne):
+            return "nowy"
+        return "potwierdzony" if widoczne else ""
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        if isinstance(self.clock, SimulationProcess):
+            self.clock.close()
+        self.historian.close()
+        if self.journal is not None:
+            self.journal.close()
+        super().closeEvent(event)
+
     def otworz_okno_materialy(self):
         if self.okno_materialy is None:
             self.okno_materialy = okno_materialy(self.scene)
@@ -1226,7 +1654,7 @@ class MainWindow(QMainWindow):
 
     def otworz_okno_generacji(self):
         if self.okno_gen is None:
-            self.okno_gen = okno_generacja(self.scene)
+            self.okno_gen = okno_generacja(self.scene, self.historian)
         self.okno_gen.show()
 
     def otworz_okno_energii(self):
@@ -1234,13 +1662,20 @@ class MainWindow(QMainWindow):
             self.okno_energy = okno_energia(self.scene)
         self.okno_energy.show()
 
-if __name__ == "__main__":
+def run_gui(replay=None, worker=True):
     if hasattr(Qt, 'AA_EnableHighDpiScaling'):
         QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
         QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
 
     app = QApplication(sys.argv)
-    window = MainWindow()
+    window = MainWindow(replay, worker)
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    replay = None
+    if "--replay" in sys.argv[1:-1]:
+        replay = sys.argv[sys.argv.index("--replay") + 1]
+    sys.exit(run_gui(replay, worker="--inprocess" not in sys.argv[1:]))
@@ -0,0 +1,191 @@
+import numpy as np
+
+DENSE_LIMIT = 512
+LEAK = 1e-9
+CG_TOL = 1e-10
+
+
+def _components(n, i, j):
+    parent = np.arange(n)
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for a, b in zip(i.tolist(), j.tolist()):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    return np.array([find(x) for x in range(n)], dtype=np.int64)
+
+
+class FlowNetwork:
+    def __init__(self):
+        self.nodes = {}
+        self.edges = {}
+        self._fixed = []
+        self._a = []
+        self._b = []
+        self._g = []
+        self.head = np.zeros(0)
+        self.demand = np.zeros(0)
+        self.pressure = np.zeros(0)
+        self.lift = np.zeros(0)
+        self.is_open = np.zeros(0, dtype=bool)
+        self.flow = np.zeros(0)
+        self.factorisations = 0
+        self._dirty = True
+
+    def add_node(self, name, head=None):
+        if name in self.nodes:
+            raise ValueError(f"Węzeł już istnieje: {name}")
+        self.nodes[name] = len(self._fixed)
+        self._fixed.append(head is not None)
+        self.head = np.append(self.head, 0.0 if head is None else float(head))
+        self.demand = np.append(self.demand, 0.0)
+        self.pressure = np.append(self.pressure, 0.0)
+        self._dirty = True
+        return self.nodes[name]
+
+    def _add_edge(self, name, a, b, conductance, lift, is_open):
+        if name in self.edges:
+            raise ValueError(f"Odcinek już istnieje: {name}")
+        self.edges[name] = len(self._a)
+        self._a.append(self.nodes[a])
+        self._b.append(self.nodes[b])
+        self._g.append(float(conductance))
+        self.lift = np.append(self.lift, float(lift))
+        self.is_open = np.append(self.is_open, bool(is_open))
+        self.flow = np.append(self.flow, 0.0)
+        self._dirty = True
+        return self.edges[name]
+
+    def add_pipe(self, name, a, b, conductance=1.0):
+        return self._add_edge(name, a, b, conductance, 0.0, True)
+
+    def add_valve(self, name, a, b, conductance=1.0, is_open=True):
+        return self._add_edge(name, a, b, conductance, 0.0, is_open)
+
+    def add_pump(self, name, a, b, lift, conductance=1.0, is_open=True):
+        return self._add_edge(name, a, b, conductance, lift, is_open)
+
+    def set_head(self, node, head):
+        self.head[self.nodes[node]] = head
+
+    def set_demand(self, node, value):
+        self.demand[self.nodes[node]] = value
+
+    def set_lift(self, edge, lift):
+        self.lift[self.edges[edge]] = lift
+
+    def set_valve(self, edge, is_open):
+        i = self.edges[edge] if isinstance(edge, str) else edge
+        if self.is_open[i] != is_open:
+            self.is_open[i] = is_open
+            self._dirty = True
+
+    def set_valves(self, edges, states):
+        if (self.is_open[edges] != states).any():
+            self.is_open[edges] = states
+            self._dirty = True
+
+    def _factorise(self):
+        n = len(self._fixed)
+        fixed = np.array(self._fixed, dtype=bool)
+        a = np.array(self._a, dtype=np.int64)
+        b = np.array(self._b, dtype=np.int64)
+        g = np.where(self.is_open, np.array(self._g), 0.0)
+        unknown = np.nonzero(~fixed)[0]
+        pos = np.full(n, -1, dtype=np.int64)
+        pos[unknown] = np.arange(len(unknown))
+
+        self._arrays = a, b, g
+        self._fixed_mask = fixed
+        self._unknown = unknown
+        self._diag = np.full(len(unknown), LEAK)
+        np.add.at(self._diag, pos[a[~fixed[a]]], g[~fixed[a]])
+        np.add.at(self._diag, pos[b[~fixed[b]]], g[~fixed[b]])
+
+        inner = ~fixed[a] & ~fixed[b] & (g > 0)
+        ia, ib, ig = pos[a[inner]], pos[b[inner]], g[inner]
+        labels = _components(len(unknown), ia, ib)
+        roots, comp, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+        order = np.argsort(comp, kind="stable")
+        local = np.empty(len(unknown), dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        local[order] = np.arange(len(unknown)) - np.repeat(starts, sizes)
+
+        self._dense = []
+        for k in np.unique(sizes[sizes <= DENSE_LIMIT]):
+            ids = np.nonzero(sizes == k)[0]
+            slot = np.full(len(roots), -1, dtype=np.int64)
+            slot[ids] = np.arange(len(ids))
+            members = np.empty((len(ids), k), dtype=np.int64)
+            mask = slot[comp] >= 0
+            members[slot[comp[mask]], local[mask]] = np.nonzero(mask)[0]
+            m = np.zeros((len(ids), k, k))
+            m[:, np.arange(k), np.arange(k)] = self._diag[members]
+            e = slot[comp[ia]] >= 0
+            s, la, lb = slot[comp[ia[e]]], local[ia[e]], local[ib[e]]
+            np.add.at(m, (s, la, lb), -ig[e])
+            np.add.at(m, (s, lb, la), -ig[e])
+            self._dense.append((members, np.linalg.inv(m)))
+
+        big = np.nonzero(np.isin(comp, np.nonzero(sizes > DENSE_LIMIT)[0]))[0]
+        remap = np.full(len(unknown), -1, dtype=np.int64)
+        remap[big] = np.arange(len(big))
+        e = remap[ia] >= 0
+        self._sparse = (big, remap[ia[e]], remap[ib[e]], ig[e], self._diag[big])
+        self._dirty = False
+        self.factorisations += 1
+
+    def _cg(self, x, rhs):
+        _, ia, ib, ig, diag = self._sparse
+        n = len(rhs)
+
+        def matvec(v):
+            return diag * v - np.bincount(ia, ig * v[ib], n) - np.bincount(ib, ig * v[ia], n)
+
+        r = rhs - matvec(x)
+        z = r / diag
+        p = z.copy()
+        rz = r @ z
+        limit = CG_TOL * max(1.0, np.abs(rhs).max())
+        for _ in range(2 * n + 10):
+            if np.abs(r).max() <= limit:
+                break
+            ap = matvec(p)
+            alpha = rz / (p @ ap)
+            x = x + alpha * p
+            r -= alpha * ap
+            z = r / diag
+            rz, rz_old = r @ z, rz
+            p = z + (rz / rz_old) * p
+        return x
+
+    def solve(self):
+        if self._dirty:
+            self._factorise()
+        a, b, g = self._arrays
+        fixed = self._fixed_mask
+        n = len(fixed)
+        pf = np.where(fixed, self.head, 0.0)
+        gl = g * self.lift
+        rhs = (-self.demand + np.bincount(b, gl, n) - np.bincount(a, gl, n)
+               + np.bincount(a, g * pf[b], n) + np.bincount(b, g * pf[a], n))[self._unknown]
+
+        x = np.zeros(len(self._unknown))
+        for members, inverse in self._dense:
+            x[members] = np.einsum("cij,cj->ci", inverse, rhs[members])
+        big = self._sparse[0]
+        if len(big):
+            x[big] = self._cg(self.pressure[self._unknown[big]], rhs[big])
+
+        self.pressure = pf
+        self.pressure[self._unknown] = x
+        self.flow = g * (self.pressure[a] - self.pressure[b] + self.lift)
+        return self.flow
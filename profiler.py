@@ -0,0 +1,140 @@
+import json
+import time
+
+SUB = 4
+BUCKETS = 48 * SUB
+
+_clock = time.perf_counter_ns
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns):
+        bits = ns.bit_length()
+        bucket = bits * SUB + ((ns >> (bits - 3)) & 3) if bits > 2 else ns
+        self.counts[min(bucket, BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q):
+        if not self.count:
+            return 0
+        target = q / 100.0 * self.count
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                bits, sub = divmod(bucket, SUB)
+                upper = (5 + sub) << (bits - 3) if bits > 2 else bucket + 1
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count / 1000.0 if self.count else 0.0,
+            "p50_us": self.percentile(50) / 1000.0,
+            "p99_us": self.percentile(99) / 1000.0,
+            "max_us": self.max / 1000.0,
+        }
+
+
+def _no_lap(phase):
+    pass
+
+
+class NullProfiler:
+    enabled = False
+
+    def lap(self):
+        return _no_lap
+
+    def add(self, phase, ns):
+        pass
+
+
+class TickProfiler:
+    enabled = True
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self.sources = []
+        self._wrapped = []
+        self._originals = {}
+
+    def add(self, phase, ns):
+        h = self.phases.get(phase)
+        if h is None:
+            h = self.phases[phase] = Histogram()
+        h.add(ns)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def lap(self):
+        last = [_clock()]
+
+        def lap(phase):
+            now = _clock()
+            self.add(phase, now - last[0])
+            last[0] = now
+
+        return lap
+
+    def _timed(self, phase, fn):
+        add = self.add
+
+        def timed(*args):
+            t0 = _clock()
+            fn(*args)
+            add(phase, _clock() - t0)
+
+        return timed
+
+    def attach(self, engine):
+        self._wrapped.append(engine)
+        originals = self._originals
+        timed = []
+        for name, fn in engine.subsystems:
+            wrapper = self._timed("tick." + name, fn)
+            originals[wrapper] = fn
+            timed.append((name, wrapper))
+        engine.subsystems[:] = timed
+
+    def detach(self):
+        originals = self._originals
+        for engine in self._wrapped:
+            engine.subsystems[:] = [(name, originals.get(fn, fn)) for name, fn in engine.subsystems]
+        self._wrapped = []
+        self._originals = {}
+
+    def reset(self):
+        self.phases = {}
+        self.counters = {}
+
+    def stats(self):
+        phases = {name: h.summary() for name, h in self.phases.items()}
+        counters = dict(self.counters)
+        for source in self.sources:
+            remote = source()
+            if remote:
+                phases.update(remote["phases"])
+                counters.update(remote["counters"])
+        return {"phases": dict(sorted(phases.items())), "counters": counters}
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.stats(), f, indent=1)
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,120 @@
+import numpy as np
+
+TIERS = (
+    (1.0, 86400),
+    (60.0, 31 * 1440),
+    (3600.0, 5 * 8760),
+)
+STATS = ("min", "max", "mean", "integral", "count")
+
+
+class RollupTier:
+    def __init__(self, width, slots, width_tags):
+        self.width = width
+        self.slots = slots
+        self.bucket = np.full(slots, -1, dtype=np.int64)
+        self.count = np.zeros((slots, width_tags), dtype=np.int64)
+        self.sum = np.zeros((slots, width_tags))
+        self.min = np.zeros((slots, width_tags))
+        self.max = np.zeros((slots, width_tags))
+        self.integral = np.zeros((slots, width_tags))
+
+    def ingest(self, times, values, weighted):
+        ids = np.floor(times / self.width).astype(np.int64)
+        ub, starts = np.unique(ids, return_index=True)
+        if len(ub) > self.slots:
+            ub, starts = ub[-self.slots:], starts[-self.slots:]
+            cut = starts[0]
+            ids, values, weighted = ids[cut:], values[cut:], weighted[cut:]
+            starts = starts - cut
+        counts = np.diff(np.append(starts, len(ids)))[:, None]
+        sums = np.add.reduceat(values, starts, axis=0)
+        mins = np.minimum.reduceat(values, starts, axis=0)
+        maxs = np.maximum.reduceat(values, starts, axis=0)
+        integrals = np.add.reduceat(weighted, starts, axis=0)
+
+        slot = ub % self.slots
+        same = self.bucket[slot] == ub
+        fresh = slot[~same]
+        self.bucket[fresh] = ub[~same]
+        self.count[fresh] = 0
+        self.sum[fresh] = 0.0
+        self.integral[fresh] = 0.0
+        self.min[fresh] = np.inf
+        self.max[fresh] = -np.inf
+
+        self.count[slot] += counts
+        self.sum[slot] += sums
+        self.integral[slot] += integrals
+        np.minimum(self.min[slot], mins, out=mins)
+        np.maximum(self.max[slot], maxs, out=maxs)
+        self.min[slot] = mins
+        self.max[slot] = maxs
+
+    def query(self, j, first, last, group):
+        n = -(-(last - first) // group)
+        shape = (n, group)
+        ids = np.arange(first, first + n * group)
+        slot = ids % self.slots
+        valid = (self.bucket[slot] == ids) & (ids < last)
+        count = np.where(valid, self.count[slot, j], 0).reshape(shape)
+        total = np.where(valid, self.sum[slot, j], 0.0).reshape(shape)
+        integral = np.where(valid, self.integral[slot, j], 0.0).reshape(shape)
+        lo = np.where(valid, self.min[slot, j], np.inf).reshape(shape).min(axis=1)
+        hi = np.where(valid, self.max[slot, j], -np.inf).reshape(shape).max(axis=1)
+        count = count.sum(axis=1)
+        empty = count == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(empty, np.nan, total.sum(axis=1) / count)
+        start = (first + np.arange(n) * group) * self.width
+        return {
+            "start": start,
+            "end": np.minimum(start + group * self.width, last * self.width),
+            "min": np.where(empty, np.nan, lo),
+            "max": np.where(empty, np.nan, hi),
+            "mean": mean,
+            "integral": integral.sum(axis=1),
+            "count": count,
+        }
+
+
+class Rollups:
+    def __init__(self, names, tiers=TIERS):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.tiers = [RollupTier(width, slots, len(self.names)) for width, slots in tiers]
+        self.last_time = None
+
+    def ingest(self, times, values):
+        if not len(times):
+            return
+        dts = np.diff(times, prepend=times[0] if self.last_time is None else self.last_time)
+        weighted = values * dts[:, None]
+        for tier in self.tiers:
+            tier.ingest(times, values, weighted)
+        self.last_time = times[-1]
+
+    def _tier(self, t0, fits):
+        if self.last_time is not None:
+            for tier in reversed(fits):
+                if np.floor(t0 / tier.width) > np.floor(self.last_time / tier.width) - tier.slots:
+                    return tier
+        return fits[-1]
+
+    def query(self, name, t0, t1, bucket=None):
+        j = self.index[name]
+        if bucket is None:
+            fits = [tier for tier in self.tiers if t0 % tier.width == 0 and t1 % tier.width == 0] or self.tiers[:1]
+        else:
+            fits = [tier for tier in self.tiers if bucket % tier.width == 0]
+            if bucket <= 0 or not fits:
+                raise ValueError(f"Nieobsługiwany rozmiar przedziału: {bucket} s")
+            t0 = np.floor(t0 / bucket) * bucket
+        tier = self._tier(t0, fits)
+        w = tier.width
+        first = int(np.floor(t0 / w))
+        last = int(np.ceil(t1 / w))
+        group = max(1, last - first if bucket is None else int(round(bucket / w)))
+        result = tier.query(j, first, last, group)
+        result["end"] = np.minimum(result["end"], t1)
+        return result
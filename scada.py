@@ -0,0 +1,89 @@
+import time
+
+_START = time.perf_counter()
+
+import argparse
+import json
+import sys
+
+from engine import INTEGRATORS, INTEGRATOR_TICK, MODES, MODE_NORMAL, NOMINAL_DT, RTOL, ATOL
+from sweep import positive_float, run_scenario
+
+DEFAULT_SCENARIO = {
+    "feed": 100, "pump": 50, "city": 0, "mode": MODE_NORMAL,
+    "flow_in": 0, "flow_out": 0, "coal": 100.0, "dump": False,
+}
+
+
+def load_scenario(path=None, overrides=None):
+    scenario = dict(DEFAULT_SCENARIO)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            scenario.update(json.load(f))
+    scenario.update({k: v for k, v in (overrides or {}).items() if v is not None})
+    unknown = set(scenario) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ValueError(f"Nieznane pola scenariusza: {', '.join(sorted(unknown))}")
+    if scenario["mode"] not in MODES:
+        raise ValueError(f"Nieznany tryb rozdzielni: {scenario['mode']}")
+    return scenario
+
+
+def cmd_run(args):
+    scenario = load_scenario(args.scenario, {
+        "feed": args.feed, "pump": args.pump, "city": args.city, "mode": args.mode,
+        "flow_in": args.flow_in, "flow_out": args.flow_out, "coal": args.coal, "dump": args.dump or None,
+    })
+    started = time.perf_counter()
+    kpis = run_scenario(scenario, args.seconds, args.dt, args.integrator, args.multirate, args.rtol, args.atol)
+    result = {**scenario, "seconds": args.seconds, "integrator": args.integrator, "multirate": args.multirate, **kpis,
+              "startup_ms": (started - _START) * 1e3, "run_ms": (time.perf_counter() - started) * 1e3}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=1)
+    else:
+        print(json.dumps(result))
+    return 0
+
+
+def cmd_gui(args):
+    from main import run_gui
+    return run_gui(args.replay, worker=not args.inprocess)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Elektrociepłownia: symulacja bez GUI albo uruchomienie HMI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="symuluj scenariusz bez Qt i wypisz wskaźniki (KPI)")
+    run.add_argument("--scenario", help="plik JSON ze scenariuszem (pola jak w sweep.py)")
+    run.add_argument("--seconds", type=positive_float, default=3600.0, help="czas symulacji [s]")
+    run.add_argument("--dt", type=positive_float, default=NOMINAL_DT, help="krok symulacji [s]")
+    run.add_argument("--integrator", choices=INTEGRATORS, default=INTEGRATOR_TICK,
+                     help="metoda całkowania kotła i turbiny (rk4/rk45 pozwalają na duże kroki)")
+    run.add_argument("--multirate", action="store_true",
+                     help="każdy podsystem z własnym krokiem: woda 1 s, kocioł 100 ms, energia 10 ms")
+    run.add_argument("--rtol", type=positive_float, default=RTOL, help="względna tolerancja błędu RK45")
+    run.add_argument("--atol", type=positive_float, default=ATOL, help="bezwzględna tolerancja błędu RK45")
+    run.add_argument("--feed", type=int, help="palenisko [%%]")
+    run.add_argument("--pump", type=int, help="pompa kotłowa")
+    run.add_argument("--city", type=int, help="zasilanie miasta [%%]")
+    run.add_argument("--mode", choices=MODES, help="tryb rozdzielni")
+    run.add_argument("--flow-in", type=int, help="dopływ do zbiorników wody [%%]")
+    run.add_argument("--flow-out", type=int, help="odpływ ze zbiorników wody [%%]")
+    run.add_argument("--coal", type=float, help="początkowy stan węgla [%%]")
+    run.add_argument("--dump", action="store_true", help="otwieraj zrzut do bufora ciepła po osiągnięciu gotowości")
+    run.add_argument("--json", help="zapisz wyniki do pliku JSON zamiast wypisywać")
+    run.set_defaults(func=cmd_run)
+
+    gui = sub.add_parser("gui", help="uruchom HMI (ładuje PyQt5)")
+    gui.add_argument("--replay", help="odtwarzaj dziennik poleceń operatora")
+    gui.add_argument("--inprocess", action="store_true", help="symulacja w wątku GUI zamiast osobnego procesu")
+    gui.set_defaults(func=cmd_gui)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+class GridIndex:
+    def __init__(self, cell=128):
+        self.cell = cell
+        self.cells = {}
+        self.rects = {}
+        self.order = {}
+
+    def __len__(self):
+        return len(self.rects)
+
+    def _span(self, x0, y0, x1, y1):
+        c = self.cell
+        return range(int(x0 // c), int(x1 // c) + 1), range(int(y0 // c), int(y1 // c) + 1)
+
+    def insert(self, item, x0, y0, x1, y1):
+        if item in self.rects:
+            self.remove(item)
+        self.rects[item] = (x0, y0, x1, y1)
+        self.order.setdefault(item, len(self.order))
+        xs, ys = self._span(x0, y0, x1, y1)
+        for cx in xs:
+            for cy in ys:
+                self.cells.setdefault((cx, cy), []).append(item)
+
+    def remove(self, item):
+        x0, y0, x1, y1 = self.rects.pop(item)
+        xs, ys = self._span(x0, y0, x1, y1)
+        for cx in xs:
+            for cy in ys:
+                self.cells[(cx, cy)].remove(item)
+
+    def query(self, x0, y0, x1, y1):
+        found = set()
+        cells = self.cells
+        rects = self.rects
+        xs, ys = self._span(x0, y0, x1, y1)
+        for cx in xs:
+            for cy in ys:
+                for item in cells.get((cx, cy), ()):
+                    if item not in found:
+                        a0, b0, a1, b1 = rects[item]
+                        if a0 <= x1 and a1 >= x0 and b0 <= y1 and b1 >= y0:
+                            found.add(item)
+        return sorted(found, key=self.order.__getitem__)
+
+    def hit(self, x, y):
+        hits = self.query(x, y, x, y)
+        return hits[-1] if hits else None
@@ -0,0 +1,122 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+
+from engine import PlantEngine, NOMINAL_DT, MODES, MODE_NORMAL, SILO_CAPACITY_T, INTEGRATORS, INTEGRATOR_TICK, RTOL, ATOL
+
+TARGET_MW = 50.0
+
+
+def positive_float(text):
+    value = float(text)
+    if not 0.0 < value < math.inf:
+        raise argparse.ArgumentTypeError(f"oczekiwano dodatniej liczby skończonej: {text}")
+    return value
+
+
+def scenario_grid(feeds, pumps, cities, modes=(MODE_NORMAL,), flows_in=(0,), flows_out=(0,), coal=100, dump=False):
+    for feed, pump, city, mode, flow_in, flow_out in itertools.product(
+            feeds, pumps, cities, modes, flows_in, flows_out):
+        yield {
+            "feed": feed, "pump": pump, "city": city, "mode": mode,
+            "flow_in": flow_in, "flow_out": flow_out, "coal": coal, "dump": dump,
+        }
+
+
+def build_engine(scenario):
+    e = PlantEngine()
+    e.deliver_coal(scenario.get("coal", 100))
+    e.set_feed(scenario["feed"])
+    e.set_pump(scenario["pump"])
+    e.set_city(scenario["city"])
+    e.set_mode(scenario.get("mode", MODE_NORMAL))
+    for name in e.tanks:
+        e.set_tank_flow(name, scenario.get("flow_in", 0), scenario.get("flow_out", 0))
+    return e
+
+
+def run_scenario(scenario, seconds=3600.0, dt=NOMINAL_DT, integrator=INTEGRATOR_TICK, multirate=False,
+                 rtol=RTOL, atol=ATOL):
+    e = build_engine(scenario)
+    e.set_integrator(integrator, rtol, atol)
+    if multirate:
+        e.set_rates()
+    coal_start = e.silo.amount
+    boiler = e.boiler
+    turbine = e.turbine
+    kpi = {"peak": boiler.pressure, "target": None, "t": e.time, "mw": turbine.power_mw}
+
+    def probe(t):
+        if boiler.pressure > kpi["peak"]:
+            kpi["peak"] = boiler.pressure
+        mw = turbine.power_mw
+        if kpi["target"] is None and mw >= TARGET_MW:
+            t0, mw0 = kpi["t"], kpi["mw"]
+            kpi["target"] = t0 + (t - t0) * (TARGET_MW - mw0) / (mw - mw0) if mw > mw0 else t
+        kpi["t"] = t
+        kpi["mw"] = mw
+
+    e.probes.append(probe)
+    e.observers.append(probe)
+    for _ in range(int(round(seconds / dt))):
+        if scenario.get("dump", False) and e.dump_ready and not e.dump_valve:
+            e.set_dump_valve(True)
+        e.step(dt)
+
+    return {
+        "time_to_50mw": kpi["target"],
+        "peak_pressure": kpi["peak"],
+        "coal_burned_t": (coal_start - e.silo.amount) / 100.0 * SILO_CAPACITY_T,
+        "final_hot_level": e.hot_res.level,
+    }
+
+
+def _run_indexed(args):
+    index, scenario, seconds, dt, integrator, multirate, rtol, atol = args
+    return index, scenario, run_scenario(scenario, seconds, dt, integrator, multirate, rtol, atol)
+
+
+def sweep(scenarios, seconds=3600.0, dt=NOMINAL_DT, workers=None, integrator=INTEGRATOR_TICK, multirate=False,
+          rtol=RTOL, atol=ATOL):
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    jobs = [(i, s, seconds, dt, integrator, multirate, rtol, atol) for i, s in enumerate(scenarios)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_run_indexed, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Przegląd nastaw operatora (sweep) dla modelu elektrociepłowni.")
+    parser.add_argument("--feed", type=int, nargs="+", default=[100], help="palenisko (slider_feed) [%%]")
+    parser.add_argument("--pump", type=int, nargs="+", default=[50], help="pompa kotłowa (slider_pump)")
+    parser.add_argument("--city", type=int, nargs="+", default=[0], help="zasilanie miasta (slider_city) [%%]")
+    parser.add_argument("--mode", nargs="+", default=[MODE_NORMAL], choices=MODES, help="tryb rozdzielni")
+    parser.add_argument("--flow-in", type=int, nargs="+", default=[0], help="dopływ do zbiorników wody [%%]")
+    parser.add_argument("--flow-out", type=int, nargs="+", default=[0], help="odpływ ze zbiorników wody [%%]")
+    parser.add_argument("--coal", type=float, default=100.0, help="początkowy stan węgla [%%]")
+    parser.add_argument("--dump", action="store_true", help="otwieraj zrzut do bufora ciepła po osiągnięciu gotowości")
+    parser.add_argument("--seconds", type=positive_float, default=3600.0, help="czas symulacji [s]")
+    parser.add_argument("--dt", type=positive_float, default=NOMINAL_DT, help="krok symulacji [s]")
+    parser.add_argument("--workers", type=int, default=None, help="liczba procesów (domyślnie wszystkie rdzenie)")
+    parser.add_argument("--integrator", choices=INTEGRATORS, default=INTEGRATOR_TICK,
+                        help="metoda całkowania kotła i turbiny (rk4/rk45 pozwalają na duże kroki)")
+    parser.add_argument("--multirate", action="store_true",
+                        help="każdy podsystem z własnym krokiem: woda 1 s, kocioł 100 ms, energia 10 ms")
+    parser.add_argument("--rtol", type=positive_float, default=RTOL, help="względna tolerancja błędu RK45")
+    parser.add_argument("--atol", type=positive_float, default=ATOL, help="bezwzględna tolerancja błędu RK45")
+    args = parser.parse_args(argv)
+
+    grid = scenario_grid(args.feed, args.pump, args.city, args.mode, args.flow_in, args.flow_out, args.coal, args.dump)
+    for index, scenario, kpis in sweep(grid, args.seconds, args.dt, args.workers, args.integrator, args.multirate,
+                                       args.rtol, args.atol):
+        print(json.dumps({"index": index, **scenario, "integrator": args.integrator, "multirate": args.multirate,
+                          **kpis}), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
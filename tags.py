@@ -0,0 +1,91 @@
+from array import array
+
+
+class TagDatabase:
+    def __init__(self):
+        self.values = array('d')
+        self.names = []
+        self.kinds = []
+        self.handles = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def register(self, name, initial=0.0, kind=float):
+        if name in self.handles:
+            raise ValueError(f"Tag już istnieje: {name}")
+        handle = len(self.values)
+        self.values.append(initial)
+        self.names.append(name)
+        self.kinds.append(kind)
+        self.handles[name] = handle
+        return handle
+
+    def handle(self, name):
+        return self.handles[name]
+
+    def get(self, handle):
+        return self.kinds[handle](self.values[handle])
+
+    def set(self, handle, value):
+        self.values[handle] = value
+
+    def snapshot(self):
+        return self.values[:]
+
+    def restore(self, snapshot):
+        if len(snapshot) != len(self.values):
+            raise ValueError("Migawka nie pasuje do bazy tagów")
+        self.values[:] = snapshot
+
+    def restore_named(self, names, snapshot):
+        handles = self.handles
+        values = self.values
+        for name, value in zip(names, snapshot):
+            handle = handles.get(name)
+            if handle is not None:
+                values[handle] = value
+
+    def as_dict(self):
+        return {name: kind(v) for name, kind, v in zip(self.names, self.kinds, self.values)}
+
+
+class TagField:
+    __slots__ = ("index", "kind")
+
+    def __init__(self, index, kind):
+        self.index = index
+        self.kind = kind
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        v = obj._values[obj._base + self.index]
+        return v if self.kind is float else self.kind(v)
+
+    def __set__(self, obj, value):
+        obj._values[obj._base + self.index] = value
+
+
+class TagBlock:
+    __slots__ = ("db", "prefix", "_values", "_base")
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for i, (name, kind, _) in enumerate(cls.FIELDS):
+            setattr(cls, name, TagField(i, kind))
+
+    def __init__(self, db, prefix, **initial):
+        self.db = db
+        self.prefix = prefix
+        self._values = db.values
+        self._base = len(db)
+        for name, kind, default in self.FIELDS:
+            db.register(f"{prefix}.{name}", initial.get(name, default), kind)
+
+    def handle(self, name):
+        for i, field in enumerate(self.FIELDS):
+            if field[0] == name:
+                return self._base + i
+        raise KeyError(name)
@@ -0,0 +1,86 @@
+import pytest
+
+from engine import PlantEngine, MODE_OFF
+from alarms import AlarmEngine, plant_alarms, RAISE, CLEAR
+
+
+def test_histereza_opoznienie_i_potwierdzenie():
+    e = PlantEngine()
+    a = AlarmEngine(e.db)
+    a.add_high("temp", "boiler.temp", 100.0, deadband=10.0, on_delay=1.0)
+    a.attach(e)
+
+    e.boiler.temp = 105.0
+    e.run(0.5)
+    assert a.visible() == []
+    e.run(0.6)
+    assert a.visible() == [("temp", "temp", True, False)]
+
+    e.boiler.temp = 95.0
+    e.run(1)
+    assert a.active[a.lookup["temp"]]
+    e.boiler.temp = 85.0
+    e.step()
+    assert [ev[2] for ev in a.events] == [RAISE, CLEAR]
+    assert a.visible() == [("temp", "temp", False, False)]
+    a.ack("temp")
+    assert a.visible() == []
+
+
+def test_zaleznosci_od_tagow_i_odkladanie():
+    e = PlantEngine()
+    a = plant_alarms(AlarmEngine(e.db))
+    a.add_deviation("wyrownanie", "w1.level", "w2.level", 5.0)
+    a.attach(e)
+    e.step()
+    assert {name for name, *_ in a.visible()} == {"wegiel_niski"}
+
+    e.set_tank_flow("w2", 100, 0)
+    e.run(2)
+    assert "wyrownanie" in {name for name, *_ in a.visible()}
+
+    a.shelve("wegiel_niski", e.time + 10)
+    e.set_mode(MODE_OFF)
+    e.step()
+    names = [name for name, *_ in a.visible()]
+    assert "wegiel_niski" not in names and "odlaczony" in names
+    e.run(10)
+    assert "wegiel_niski" in {name for name, *_ in a.visible()}
+
+
+def test_tag_zarejestrowany_po_pierwszej_ocenie():
+    e = PlantEngine()
+    a = AlarmEngine(e.db)
+    a.add_high("temp", "boiler.temp", 100.0)
+    a.attach(e)
+    e.step()
+    extra = e.db.register("pomiar.dodatkowy")
+    e.step()
+    e.db.set(extra, 5.0)
+    e.step()
+    a.add_high("dodatkowy", "pomiar.dodatkowy", 10.0)
+    e.step()
+    e.db.set(extra, 20.0)
+    e.step()
+    assert [name for name, *_ in a.visible()] == ["dodatkowy"]
+
+
+def test_kierunek_alarmu_szybkosci_zmian():
+    e = PlantEngine()
+    a = AlarmEngine(e.db)
+    tag = e.db.register("pomiar.cisnienie")
+    for name in ("rise", "fall", "both"):
+        a.add_rate(name, "pomiar.cisnienie", 20.0, direction=name)
+    with pytest.raises(ValueError):
+        a.add_rate("zly", "pomiar.cisnienie", 20.0, direction="w_gore")
+    a.attach(e)
+    e.step()
+
+    e.db.set(tag, 10.0)
+    e.step()
+    assert [name for name, _, active, _ in a.visible() if active] == ["rise", "both"]
+    a.ack()
+    e.step()
+    e.db.set(tag, 0.0)
+    e.step()
+    assert [name for name, _, active, _ in a.visible() if active] == ["fall", "both"]
@@ -0,0 +1,48 @@
+import random
+
+import numpy as np
+
+from engine import PlantEngine, MODES
+from batch import PlantBatch, MODE_CODES
+
+
+def test_zgodnosc_z_silnikiem():
+    rnd = random.Random(7)
+    engines = []
+    for _ in range(16):
+        e = PlantEngine()
+        e.deliver_coal(rnd.randint(0, 100))
+        e.set_feed(rnd.randint(0, 100))
+        e.set_pump(rnd.randint(0, 99))
+        e.set_city(rnd.randint(0, 100))
+        e.set_mode(rnd.choice(MODES))
+        e.set_section("a", rnd.random() < 0.7)
+        for name in ("w1", "w2", "wr"):
+            e.set_tank_flow(name, rnd.randint(0, 100), rnd.randint(0, 100))
+        engines.append(e)
+
+    b = PlantBatch(len(engines))
+    for i, e in enumerate(engines):
+        one = PlantBatch.from_engine(e, 1)
+        for attr in ("level", "flow_in", "flow_out", "charge", "sections"):
+            getattr(b, attr)[:, i] = getattr(one, attr)[:, 0]
+        for attr in ("amount", "feed", "pump", "city", "mode"):
+            getattr(b, attr)[i] = getattr(one, attr)[0]
+
+    for k in range(600):
+        if k == 300:
+            for i, e in enumerate(engines):
+                e.set_dump_valve(True)
+                b.dump_valve[i] = e.dump_valve
+        for e in engines:
+            e.step(0.1)
+        b.step(0.1)
+
+    for i, e in enumerate(engines):
+        assert np.isclose(b.temp[i], e.boiler.temp)
+        assert np.isclose(b.pressure[i], e.boiler.pressure)
+        assert np.isclose(b.rpm[i], e.turbine.rpm)
+        assert np.isclose(b.hot_level[i], e.hot_res.level)
+        assert np.isclose(b.charge[0, i], e.bat1.charge)
+        assert np.isclose(b.mw_out[i], e.mw_out)
+        assert b.mode[i] == MODE_CODES[e.mode]
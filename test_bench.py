@@ -0,0 +1,16 @@
+from bench import percentiles, compare, measure
+
+
+def test_percentyle_i_regresje():
+    s = percentiles([i * 1000 for i in range(1, 101)])
+    assert s["p50"] == 51.0 and s["p99"] == 100.0 and s["max"] == 100.0
+
+    base = {"a": {"p50": 10.0}, "b": {"p50": 10.0}}
+    now = {"a": {"p50": 11.9}, "b": {"p50": 12.5}, "c": {"p50": 1.0}}
+    assert compare(now, base, 0.2) == [("b", 10.0, 12.5)]
+
+
+def test_pomiar():
+    calls = []
+    s = measure(lambda: calls.append(1), 20, warmup=2)
+    assert s["n"] == 20 and len(calls) == 22
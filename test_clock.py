@@ -0,0 +1,35 @@
+from engine import PlantEngine
+from clock import SimulationClock, SPEEDS
+
+
+def test_stala_liczba_krokow_niezaleznie_od_klatek():
+    a = SimulationClock(PlantEngine())
+    b = SimulationClock(PlantEngine())
+    for _ in range(100):
+        a.advance(0.05)
+    for _ in range(50):
+        b.advance(0.03)
+        b.advance(0.07)
+
+    assert a.engine.ticks == b.engine.ticks == 50
+
+
+def test_przyspieszenie_i_limit_nadrabiania():
+    c = SimulationClock(PlantEngine())
+    c.set_speed(SPEEDS["x100"])
+    c.advance(0.05)
+    assert c.engine.ticks == 50
+
+    c.set_speed(SPEEDS["x1"])
+    c.advance(10.0)
+    assert c.engine.ticks == 52
+    assert c.dropped_time > 9.0
+
+
+def test_tryb_max_miesci_sie_w_budzecie():
+    c = SimulationClock(PlantEngine(), frame_budget=0.01)
+    c.set_speed(SPEEDS["MAX"])
+    steps = c.advance(0.05)
+
+    assert steps > 64
+    assert c.engine.ticks == steps
@@ -0,0 +1,56 @@
+import random
+
+import numpy as np
+
+from compression import POINT, SwingingDoor
+
+
+def _points(t, v):
+    p = np.empty(len(t), dtype=POINT)
+    p["t"] = t
+    p["v"] = v
+    return p
+
+
+def _reconstruct(door, chunks):
+    kept = [door.feed(c) for c in chunks]
+    kept.append(np.array(door.pending(), dtype=POINT))
+    return np.concatenate(kept)
+
+
+def test_odtworzenie_w_granicach_tolerancji():
+    rnd = random.Random(3)
+    t = np.arange(5000) * 0.1
+    v = np.cumsum([rnd.uniform(-0.2, 0.3) for _ in t])
+    v[2000:3000] = v[2000]
+    door = SwingingDoor(0.5)
+    kept = _reconstruct(door, np.array_split(_points(t, v), 7))
+
+    assert np.all(np.diff(kept["t"]) > 0)
+    assert np.max(np.abs(np.interp(t, kept["t"], kept["v"]) - v)) <= 0.5 + 1e-9
+    assert door.ratio > 5
+
+
+def test_plaskie_bloki_i_martwa_strefa():
+    t = np.arange(1000) * 0.1
+    v = np.where(t < 50, 10.0, 12.0)
+    door = SwingingDoor(0.0, exception=0.01)
+    kept = _reconstruct(door, np.array_split(_points(t, v), 10))
+
+    assert np.array_equal(np.interp(t, kept["t"], kept["v"]), v)
+    assert door.stored <= 3
+
+
+def test_blokowe_drzwi_jak_punktowe():
+    rnd = random.Random(5)
+    t = np.arange(3000) * 0.1
+    v = np.cumsum([rnd.uniform(-0.05, 0.06) for _ in t])
+    blokowe = SwingingDoor(0.3)
+    kept = _reconstruct(blokowe, np.array_split(_points(t, v), 40))
+    punktowe = SwingingDoor(0.3)
+    out = []
+    for ti, vi in zip(t.tolist(), v.tolist()):
+        punktowe._door(ti, vi, out)
+    out.extend(punktowe.pending())
+    assert not blokowe._scalar and blokowe.ratio > 16
+    assert len(kept) == len(out) and np.allclose(kept["t"], [p[0] for p in out])
@@ -0,0 +1,114 @@
+import sys
+import time
+
+import pytest
+
+from engine import PlantEngine, MODE_CHARGE, BAT_NO_SECTIONS
+from profiler import TickProfiler
+
+
+def test_silnik_bez_qt():
+    e = PlantEngine()
+    e.deliver_coal(100)
+    e.set_feed(100)
+    e.set_pump(50)
+    e.run(30)
+
+    assert e.boiler.temp > 110
+    assert e.turbine.rpm > 0
+    assert e.silo.amount < 100
+    assert not any(m.startswith("PyQt5") for m in sys.modules)
+
+
+def test_doba_ponizej_sekundy_krokiem_60s():
+    e = PlantEngine()
+    e.deliver_coal(100)
+    e.set_feed(60)
+    e.set_tank_flow("w1", 40, 30)
+    e.set_integrator("rk45")
+
+    start = time.perf_counter()
+    e.run(24 * 3600, dt=60.0)
+
+    assert time.perf_counter() - start < 1.0
+    assert e.ticks == 24 * 60
+
+
+def test_dostawa_wegla_do_pojemnosci_silosu():
+    e = PlantEngine()
+    e.deliver_coal(80)
+    e.deliver_coal(80)
+    assert e.silo.amount == 100.0
+
+
+def test_ladowanie_bez_sekcji():
+    e = PlantEngine()
+    e.turbine.power_mw = 10.0
+    e.set_mode(MODE_CHARGE)
+    e.set_section("a", False)
+    e.set_section("b", False)
+    e.step_energy(0.1)
+
+    assert e.bat_status == BAT_NO_SECTIONS
+    assert e.mw_out == 0.0
+
+
+def _scenario(integrator):
+    e = PlantEngine()
+    e.deliver_coal(100)
+    e.set_feed(40)
+    e.set_pump(30)
+    e.set_tank_flow("w1", 60, 60)
+    e.set_tank_flow("w2", 60, 60)
+    e.set_integrator(integrator)
+    return e
+
+
+def test_rk45_dlugi_krok():
+    ref = _scenario("euler")
+    ref.run(60, dt=0.001)
+    e = _scenario("rk45")
+    e.run(60, dt=20.0)
+
+    assert e.ticks == 3
+    assert abs(e.boiler.temp - ref.boiler.temp) < 0.01 * ref.boiler.temp
+    assert abs(e.turbine.rpm - ref.turbine.rpm) < 0.01 * ref.turbine.rpm
+    assert abs(e.silo.amount - ref.silo.amount) < 0.01
+
+
+def test_zrzut_zamykany_w_trakcie_kroku():
+    e = PlantEngine()
+    e.set_integrator("rk4")
+    e.boiler.temp = 115.0
+    e.dump_ready = True
+    e.set_dump_valve(True)
+    e.step(10.0)
+
+    assert not e.dump_valve and not e.dump_ready
+    assert 0.0 < e.hot_res.level < 1.0
+
+
+def test_nieznany_integrator():
+    with pytest.raises(ValueError):
+        PlantEngine().set_integrator("verlet")
+
+
+def test_wielokrokowy_harmonogram():
+    single = _scenario("euler")
+    multi = _scenario("euler")
+    multi.set_mode(MODE_CHARGE)
+    single.set_mode(MODE_CHARGE)
+    multi.set_rates()
+    p = TickProfiler()
+    p.attach(multi)
+    single.run(20)
+    multi.run(20)
+
+    stats = p.stats()["phases"]
+    assert stats["tick.water"]["count"] == 20
+    assert stats["tick.boiler"]["count"] == 200
+    assert stats["tick.energy"]["count"] == 2000
+    assert abs(multi.boiler.temp - single.boiler.temp) < 0.01 * single.boiler.temp
+    assert 50.5 < multi.bat1.charge < 51.0 and abs(multi.bat1.charge - single.bat1.charge) < 0.05
+    with pytest.raises(ValueError):
+        multi.set_rates({"chlodnia": 1.0})
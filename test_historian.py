@@ -0,0 +1,68 @@
+import numpy as np
+
+from engine import PlantEngine
+from historian import SPILL_ROWS, Historian
+
+
+def test_zapis_i_odczyt_z_segmentow(tmp_path):
+    e = PlantEngine()
+    e.deliver_coal(80)
+    e.set_feed(100)
+    h = Historian(e.db, tmp_path, capacity=64, segment_points=100)
+    h.attach(e)
+    temps = []
+    for _ in range(1000):
+        e.step()
+        temps.append(e.boiler.temp)
+
+    t, v = h.series("boiler.temp")
+    assert len(t) == 1000
+    assert np.allclose(v, temps)
+    segments = h.archives["boiler.temp"].segments
+    assert len(segments) == 10
+    assert [s._file is None for s in segments] == [True] * 9 + [False]
+
+    t, v = h.series("boiler.temp", 9.95, 20.05)
+    assert len(t) == 101
+    assert np.isclose(t[0], 10.0) and np.isclose(t[-1], 20.0)
+
+    h.close()
+    assert segments[-1]._file is None
+    assert np.allclose(h.series("boiler.temp")[1], temps)
+
+
+def test_pierscien_bez_katalogu():
+    e = PlantEngine()
+    h = Historian(e.db, capacity=32)
+    h.attach(e)
+    e.run(10)
+    t, _ = h.series("turbine.rpm")
+    assert len(t) == 32
+    assert np.isclose(t[-1], 10.0)
+
+
+def test_przyrostowy_zrzut_i_ostatnia_wartosc(tmp_path):
+    e = PlantEngine()
+    e.deliver_coal(80)
+    e.set_feed(100)
+    h = Historian(e.db, tmp_path, capacity=4 * SPILL_ROWS, segment_points=10000)
+    h.attach(e)
+    for _ in range(4 * SPILL_ROWS):
+        e.step()
+    assert h.latest("boiler.temp") == e.boiler.temp
+    assert h.latest("turbine.rpm") == e.turbine.rpm
+
+    stored = []
+    for _ in range(3 * SPILL_ROWS):
+        e.step()
+        stored.append(h.archives["turbine.rpm"].segments[-1].count)
+        assert h.latest("boiler.temp") == e.boiler.temp
+    assert max(np.diff(stored)) == SPILL_ROWS
+    t, _ = h.series("turbine.rpm")
+    assert len(t) == 7 * SPILL_ROWS and np.all(np.diff(t) > 0)
+
+
+def test_kompresja_tylko_z_niezerowa_odchylka(tmp_path):
+    e = PlantEngine()
+    h = Historian(e.db, tmp_path, deviations={"boiler.temp": 0.5, "turbine.rpm": 0.0, "silo.amount": (0.0, 0.01)})
+    assert sorted(h.compression_ratios()) == ["boiler.temp", "silo.amount"]
@@ -0,0 +1,38 @@
+import math
+
+import pytest
+
+from integrators import integrate
+
+
+@pytest.mark.parametrize("method,h,tol", [("euler", 0.01, 1e-2), ("rk4", 0.1, 1e-6), ("rk45", None, 1e-6)])
+def test_zanik_wykladniczy(method, h, tol):
+    y = integrate(lambda t, y, m: [-y[0]], [1.0], 0.0, 2.0, method, h=h)
+    assert abs(y[0] - math.exp(-2.0)) < tol
+
+
+@pytest.mark.parametrize("method", ["rk4", "rk45"])
+def test_zdarzenie_przelacza_tryb(method):
+    seen = []
+    y = integrate(lambda t, y, m: [2.0 if m[0] else 1.0], [0.0], 0.0, 1.0, method,
+                  events=lambda y: (y[0] - 0.5,), on_event=lambda before, after, y: seen.append(y[0]))
+    assert len(seen) == 1 and abs(seen[0] - 0.5) < 1e-5
+    assert abs(y[0] - 1.5) < 1e-5
+
+
+def test_czynnik_calkujacy_dla_sztywnego_zaniku():
+    rhs = lambda t, y, m: [50.0 * (math.sin(t) - y[0])]
+    exact = (2500.0 * math.sin(20.0) - 50.0 * math.cos(20.0) + 50.0 * math.exp(-1000.0)) / 2501.0
+    steps = []
+    y = integrate(rhs, [0.0], 0.0, 20.0, "rk45", rtol=1e-3, atol=1e-6, linear=lambda m, y: [50.0],
+                  on_step=lambda t, y: steps.append(t))
+    assert abs(y[0] - exact) < 1e-4 and steps[-1] == 20.0
+
+    plain = []
+    integrate(rhs, [0.0], 0.0, 20.0, "rk45", rtol=1e-3, atol=1e-6, on_step=lambda t, y: plain.append(t))
+    assert len(steps) < 0.8 * len(plain)
+
+    decay = []
+    y = integrate(lambda t, y, m: [5.0 - 50.0 * y[0]], [1.0], 0.0, 20.0, "rk45", linear=lambda m, y: [50.0],
+                  on_step=lambda t, y: decay.append(t))
+    assert abs(y[0] - 0.1) < 1e-9 and len(decay) <= 5
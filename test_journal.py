@@ -0,0 +1,94 @@
+import pytest
+
+from engine import PlantEngine, MODE_CHARGE, MODE_DISCHARGE
+from journal import CommandJournal, JournalPlayer, replay, read_config, read_journal
+from layout import PipeFlows, load_layout
+
+
+def _sesja(path):
+    e = PlantEngine()
+    j = CommandJournal(e, path)
+    j.deliver_coal(70)
+    j.set_feed(90)
+    e.run(30)
+    j.set_pump(45)
+    j.set_tank_flow("w2", 30, 60)
+    e.run(100)
+    j.set_dump_valve(True)
+    j.set_mode(MODE_CHARGE)
+    e.run(20)
+    j.set_section("b", False)
+    j.set_mode(MODE_DISCHARGE)
+    j.set_city(40)
+    e.run(50)
+    j.close()
+    return e
+
+
+def test_odtworzenie_bit_w_bit(tmp_path):
+    path = tmp_path / "sesja.scj"
+    e = _sesja(path)
+    _, _, records = read_journal(path)
+    assert len(records) == 9
+    assert records[3] == (300, "set_tank_flow", ("w2", 30.0, 60.0))
+
+    r = replay(path, extra_ticks=e.ticks - records[-1][0])
+    assert r.ticks == e.ticks
+    assert r.db.snapshot() == e.db.snapshot()
+
+
+def test_odtwarzanie_przez_obserwatora(tmp_path):
+    path = tmp_path / "sesja.scj"
+    e = _sesja(path)
+    r = PlantEngine()
+    player = JournalPlayer(r, path)
+    player.attach()
+    while r.ticks < e.ticks:
+        r.step(player.dt)
+    assert player.finished
+    assert r.db.snapshot() == e.db.snapshot()
+
+
+def test_integrator_i_kroki_w_naglowku(tmp_path):
+    path = tmp_path / "sesja.scj"
+    e = PlantEngine()
+    e.set_integrator("rk45", rtol=1e-5)
+    e.set_rates({"water": 1.0, "thermal": 0.5})
+    e.run(0.3)
+    j = CommandJournal(e, path)
+    j.deliver_coal(70)
+    j.set_feed(90)
+    e.run(20)
+    j.set_pump(45)
+    e.run(10.3)
+    j.close()
+
+    integrator, rtol, atol, rates, due = read_config(path)
+    assert (integrator, rtol, atol, rates) == ("rk45", 1e-5, 1e-8, {"water": 1.0, "thermal": 0.5})
+    assert due == pytest.approx({"water": 0.3, "thermal": 0.3})
+    r = replay(path, extra_ticks=e.ticks - j.start_tick - read_journal(path)[2][-1][0])
+    assert r.integrator == "rk45" and r.rtol == 1e-5 and r.rates == e.rates
+    assert r.db.snapshot() == e.db.snapshot()
+
+    e.set_rates(None)
+    with pytest.raises(ValueError):
+        j.set_city(10)
+    assert e.city != 10
+
+
+def test_dziennik_z_gui_na_samym_silniku(tmp_path):
+    path = tmp_path / "sesja.scj"
+    e = PlantEngine()
+    PipeFlows(load_layout(), {"": e}).attach(e)
+    e.run(5)
+    j = CommandJournal(e, path)
+    j.deliver_coal(70)
+    j.set_feed(90)
+    e.run(30)
+    j.set_pump(45)
+    e.run(10)
+    j.close()
+
+    r = replay(path, extra_ticks=e.ticks - j.start_tick - read_journal(path)[2][-1][0])
+    assert len(r.db) < len(e.db)
+    assert r.db.snapshot() == e.db.snapshot()[:len(r.db)]
@@ -0,0 +1,95 @@
+import pytest
+
+from engine import MULTIRATE, PlantEngine
+from layout import ACTIVE_FLOW, SOURCES, PipeFlows, load_layout, plant_engines, synthetic_layout, validate_layout
+from profiler import TickProfiler
+from spatial import GridIndex
+
+
+def test_domyslny_uklad():
+    layout = load_layout()
+    ids = {c["id"] for c in layout["components"]}
+    assert {"w1", "w2", "wr", "silo", "boiler", "Turbina", "hot_res", "bat1", "bat2", "lines"} <= ids
+    assert {s["when"] for s in layout["sources"]} == set(SOURCES)
+
+
+def test_bledny_uklad():
+    with pytest.raises(ValueError):
+        validate_layout({"components": [{"id": "a", "type": "Boiler", "x": 0, "y": 0}] * 2})
+    with pytest.raises(ValueError):
+        validate_layout({"components": [{"id": "a", "type": "Boiler", "x": 0, "y": 0, "model": "reaktor"}]})
+    with pytest.raises(ValueError):
+        validate_layout({"pipes": [{"id": "r", "from": [0, 0], "to": [1], "unit": "x"}]})
+    with pytest.raises(ValueError):
+        validate_layout({"sources": [{"at": [0, 0], "when": "reaktor"}]})
+
+
+def test_uklad_syntetyczny():
+    layout = synthetic_layout(100, units=3)
+    assert layout["units"] == ["", "u2", "u3"]
+    assert len(layout["components"]) == len(layout["pipes"]) == 100
+
+
+def test_indeks_przestrzenny():
+    index = GridIndex(cell=50)
+    for i in range(100):
+        index.insert(i, i * 20, 0, i * 20 + 10, 10)
+    assert index.query(0, 0, 45, 5) == [0, 1, 2]
+    assert index.hit(205, 5) == 10
+    assert index.hit(215, 5) is None
+    index.insert(10, 1000, 1000, 1010, 1010)
+    assert index.hit(205, 5) is None
+    assert index.hit(1005, 1005) == 10
+    index.remove(10)
+    assert len(index) == 99
+
+
+def test_przeplywy_w_rurach():
+    e = PlantEngine()
+    e.bat1.charge = e.bat2.charge = 0.0
+    flows = PipeFlows(load_layout(), {"": e})
+    active = lambda: {pid for pid, q in zip(flows.pipe_ids, flows.update()) if q > ACTIVE_FLOW}
+    assert active() == set()
+    e.set_tank_flow("w2", 0, 10)
+    assert active() == {"r_w2_drop", "r_mix_2", "r_feed_v", "r_feed_h"}
+    e.bat1.charge = 50.0
+    assert {"r_el_b1", "r_el_bat_bus", "r_el_b2", "r_el_grid_2"} <= active()
+    assert "r_el_gen" not in active()
+
+
+def test_przeplywy_zapisywane_do_tagow():
+    e = PlantEngine()
+    e.bat1.charge = e.bat2.charge = 0.0
+    flows = PipeFlows(load_layout(), {"": e})
+    flows.attach(e)
+    h = e.db.handle("pipe.r_w2_drop.flow")
+    e.run(1)
+    assert e.db.get(h) == 0.0
+    e.set_tank_flow("w2", 0, 10)
+    e.run(1)
+    assert e.db.get(h) > ACTIVE_FLOW
+    solves = flows.solves
+    e.run(1)
+    assert flows.solves == solves
+
+
+def test_jednostki_z_wlasnym_harmonogramem():
+    engines = plant_engines(["", "u2"])
+    main, unit = engines[""], engines["u2"]
+    main.set_rates()
+    main.set_integrator("rk4")
+    assert unit.integrator == "rk4" and unit.rates == MULTIRATE
+    p = TickProfiler()
+    p.attach(unit)
+    main.run(20)
+    stats = p.stats()["phases"]
+    assert stats["tick.water"]["count"] == 20
+    assert stats["tick.energy"]["count"] == 2000
+
+    main.set_rates({"water": 1.0, "unit:u2": 2.0})
+    assert unit.rates == {"water": 1.0}
+    main.run(20)
+    assert p.stats()["phases"]["tick.water"]["count"] == 40
+    extra = PlantEngine(main.db, "u3")
+    main.add_unit("u3", extra)
+    assert extra.integrator == "rk4" and extra.rates == {"water": 1.0}
@@ -0,0 +1,237 @@
+import os
+
+import pytest
+
+_app = None
+
+
+@pytest.fixture(scope="module")
+def gui():
+    global _app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    import main
+    _app = QApplication.instance() or QApplication([])
+    return main
+
+
+def _pixmap(w, h):
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtGui import QPixmap
+    pixmap = QPixmap(w, h)
+    pixmap.fill(Qt.transparent)
+    return pixmap
+
+
+def _kafelek(gui):
+    from PyQt5.QtCore import Qt
+
+    class Kafelek(gui.Scada):
+        __slots__ = ("stan",)
+
+        def visual_state(self):
+            return (self.stan,)
+
+        def draw_dynamic(self, painter):
+            painter.fillRect(0, 0, 20, 10, Qt.red)
+
+    comp = Kafelek(0, 0, 20, 10, "kafelek")
+    comp.stan = 0
+    return comp
+
+
+def _draw(comp, zoom):
+    from PyQt5.QtGui import QPainter
+    target = _pixmap(200, 100)
+    painter = QPainter(target)
+    painter.scale(zoom, zoom)
+    comp.draw_cached(painter)
+    painter.end()
+
+
+def test_lru_w_bajtach(gui):
+    cache = gui.DisplayListCache(capacity=2 * gui.pixmap_bytes(_pixmap(10, 10)))
+    cache.put("a", _pixmap(10, 10))
+    cache.put("b", _pixmap(10, 10))
+    assert cache.get("a") is not None
+    cache.put("c", _pixmap(10, 10))
+    assert list(cache.entries) == ["a", "c"] and cache.bytes == 800
+    cache.put("d", _pixmap(20, 20))
+    assert list(cache.entries) == ["d"] and cache.bytes == 1600
+    cache.put("d", _pixmap(10, 10))
+    assert cache.bytes == 400
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert cache.get("a") is None and cache.misses == 1
+
+
+def test_kwantyzacja_powiekszenia(gui):
+    cache_scale = gui.cache_scale
+    assert cache_scale(1.0, 0.3) == cache_scale(1.0, 1.0) == 1.0
+    assert cache_scale(2.0, 0.5) == 2.0
+    assert cache_scale(1.0, 1.1) == cache_scale(1.0, 1.15) >= 1.15
+    assert cache_scale(1.0, 2.0) == 2.0 and cache_scale(1.0, 8.0) == 8.0
+    assert len({cache_scale(1.0, 1.0 + i / 100) for i in range(1, 101)}) == 4
+
+
+def test_trafienia_w_pamieci_podrecznej(gui):
+    cache = gui.DISPLAY_CACHE
+    cache.clear()
+    hits, misses = cache.hits, cache.misses
+    comp = _kafelek(gui)
+    _draw(comp, 1.1)
+    _draw(comp, 1.15)
+    _draw(comp, 1.0)
+    assert (cache.hits - hits, cache.misses - misses) == (1, 2)
+    comp.stan = 1
+    _draw(comp, 1.0)
+    assert cache.misses - misses == 3 and len(cache.entries) == 3
+    cache.clear()
+    assert cache.bytes == 0
+
+
+def test_wiazania_bez_zbednych_odswiezen(gui):
+    from PyQt5.QtWidgets import QLabel, QProxyStyle
+
+    class Styl(QProxyStyle):
+        polished = 0
+
+        def polish(self, target):
+            if isinstance(target, QLabel):
+                Styl.polished += 1
+            return super().polish(target)
+
+    class Etykieta(QLabel):
+        texts = 0
+
+        def setText(self, text):
+            Etykieta.texts += 1
+            super().setText(text)
+
+    label = Etykieta()
+    style = Styl()
+    label.setStyle(style)
+    tags = {"tekst": "1", "stan": "ok"}
+    binder = gui.WidgetBinder()
+    binder.text(label, lambda: tags["tekst"])
+    binder.state(label, lambda: tags["stan"])
+
+    binder.refresh()
+    assert Etykieta.texts == 1 and Styl.polished == 1 and label.property("stan") == "ok"
+    binder.refresh()
+    binder.refresh()
+    assert Etykieta.texts == 1 and Styl.polished == 1
+
+    tags["stan"] = "alarm"
+    binder.refresh()
+    binder.refresh()
+    assert Etykieta.texts == 1 and Styl.polished == 2 and label.property("stan") == "alarm"
+    tags["tekst"] = "2"
+    binder.refresh()
+    assert Etykieta.texts == 2 and Styl.polished == 2 and label.text() == "2"
+
+
+def test_szyna_odswiezania_tylko_widoczne(gui):
+    from PyQt5.QtWidgets import QWidget
+
+    class Podglad(QWidget):
+        def __init__(self, obiekt, parent):
+            super().__init__(parent)
+            self.obiekt = obiekt
+            self.calls = 0
+            self.resize(20, 20)
+
+        def update(self):
+            self.calls += 1
+
+    okno = QWidget()
+    okno.resize(100, 100)
+    a, b, c, d = (gui.Scada(0, 0, 20, 20, name) for name in "abcd")
+    widoczny, zmieniony, ukryty, poza = (Podglad(obiekt, okno) for obiekt in (a, b, c, d))
+    ukryty.hide()
+    poza.move(500, 500)
+    bus = gui.RefreshBus()
+    for podglad in (widoczny, zmieniony, ukryty, poza):
+        bus.subscribe(podglad)
+    okno.show()
+    ukryty.hide()
+
+    bus.publish([b, c, d])
+    assert (widoczny.calls, zmieniony.calls, ukryty.calls, poza.calls) == (0, 1, 0, 0)
+    bus.publish([a, b])
+    assert (widoczny.calls, zmieniony.calls) == (1, 2)
+    okno.hide()
+    bus.publish([a, b, c, d])
+    assert (widoczny.calls, zmieniony.calls, ukryty.calls, poza.calls) == (1, 2, 0, 0)
+
+
+def _scena(gui):
+    from engine import PlantEngine
+    scene = gui.ScadaScene(PlantEngine())
+    scene.resize(1100, 750)
+    scene.update_simulation()
+    return scene
+
+
+def test_zmiana_jednego_tagu_odswieza_jeden_prostokat(gui):
+    scene = _scena(gui)
+    scene.engine.deliver_coal(30)
+    scene.update_simulation()
+    calls = []
+    scene.update = lambda *args: calls.append(args)
+    scene.update_simulation()
+    assert calls == []
+
+    scene.engine.deliver_coal(20)
+    scene.update_simulation()
+    silo = scene.items["silo"]
+    assert scene.changed_components == [silo]
+    assert calls == [(scene.view.mapRect(silo.bounding_rect()).adjusted(-1, -1, 1, 1),)]
+
+
+def test_rury_pod_korpusami(gui):
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtGui import QColor, QImage
+
+    class Korpus(gui.Scada):
+        def draw_static(self, painter):
+            painter.fillRect(0, 0, 40, 40, Qt.red)
+
+    scene = _scena(gui)
+    scene.resize(1400, 900)
+    scene.add_component("korpus", Korpus(1200, 800, 40, 40, "korpus"))
+    scene.add_pipe("przez_korpus", gui.Rura(1150, 820, 1290, 820, QColor("#ffffff"), 6))
+    image = QImage(1400, 900, QImage.Format_ARGB32_Premultiplied)
+    scene.render(image)
+    assert QColor(image.pixel(1220, 820)).name() == "#ff0000"
+    assert QColor(image.pixel(1170, 820)).name() != "#000000"
+
+
+def test_warstwa_statyczna_po_zakonczeniu_gestu(gui):
+    from PyQt5.QtCore import QEvent, QPointF, Qt
+    from PyQt5.QtGui import QImage, QMouseEvent
+
+    scene = _scena(gui)
+    image = QImage(1100, 750, QImage.Format_ARGB32_Premultiplied)
+    scene.render(image)
+    pixmap, key = scene.static_pixmap, scene.static_key
+
+    def mouse(kind, x, y):
+        return QMouseEvent(kind, QPointF(x, y), Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+
+    scene.mousePressEvent(mouse(QEvent.MouseButtonPress, 1050, 700))
+    for x in range(1040, 990, -10):
+        scene.mouseMoveEvent(mouse(QEvent.MouseMove, x, 700))
+        scene.render(image)
+        assert scene.static_pixmap is pixmap and scene.static_key == key
+    assert scene.pan == QPointF(-50, 0)
+
+    scene.mouseReleaseEvent(mouse(QEvent.MouseButtonRelease, 1000, 700))
+    scene.render(image)
+    assert scene.static_pixmap is not pixmap and scene.static_view == scene.view
+    rebuilt = scene.static_pixmap
+    scene.render(image)
+    assert scene.static_pixmap is rebuilt
+
+    scene.set_view(2.0, QPointF(0, 0))
+    scene.render(image)
+    assert scene.static_key[3] == 2.0
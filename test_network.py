@@ -0,0 +1,52 @@
+import numpy as np
+
+import network
+from network import FlowNetwork
+
+
+def test_szeregowo_i_zawor():
+    n = FlowNetwork()
+    n.add_node("src", head=10.0)
+    n.add_node("j")
+    n.add_node("out", head=0.0)
+    n.add_pipe("p", "src", "j", conductance=1.0)
+    n.add_valve("v", "j", "out", conductance=3.0)
+    flow = n.solve()
+    assert np.allclose(flow, 7.5) and np.isclose(n.pressure[1], 2.5)
+    n.set_head("src", 20.0)
+    n.solve()
+    assert n.factorisations == 1
+    n.set_valve("v", False)
+    assert np.abs(n.solve()).max() < 1e-6
+    assert n.factorisations == 2
+
+
+def test_pompa():
+    n = FlowNetwork()
+    n.add_node("ground", head=0.0)
+    n.add_node("a")
+    n.add_node("b")
+    n.add_pump("pompa", "ground", "a", lift=6.0)
+    n.add_pipe("p", "a", "b")
+    n.add_pipe("powrot", "b", "ground")
+    assert np.allclose(n.solve(), 2.0)
+    assert np.allclose(n.pressure, [0.0, 4.0, 2.0])
+
+
+def test_bilans_w_duzej_sieci(monkeypatch):
+    monkeypatch.setattr(network, "DENSE_LIMIT", 8)
+    rng = np.random.default_rng(1)
+    n = FlowNetwork()
+    n.add_node("zrodlo", head=5.0)
+    n.add_node("odplyw", head=0.0)
+    for i in range(60):
+        n.add_node(i)
+    for i in range(1, 60):
+        n.add_pipe(("t", i), int(rng.integers(0, i)), i, conductance=rng.uniform(0.5, 2.0))
+    n.add_pipe("we", "zrodlo", 0)
+    n.add_pipe("wy", 59, "odplyw")
+    n.set_demand(30, 0.2)
+    flow = n.solve()
+    a, b, _ = n._arrays
+    net = np.bincount(a, flow, len(n.nodes)) - np.bincount(b, flow, len(n.nodes))
+    assert np.allclose(net[2:], -n.demand[2:], atol=1e-7)
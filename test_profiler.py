@@ -0,0 +1,37 @@
+from engine import PlantEngine
+from profiler import Histogram, TickProfiler
+
+
+def test_histogram_percentyle():
+    h = Histogram()
+    for ns in range(1000, 101000, 1000):
+        h.add(ns)
+    assert h.count == 100 and h.max == 100000
+    assert 50000 <= h.percentile(50) <= 50000 * 1.25
+    assert h.percentile(100) == 100000
+
+
+def test_podpiecie_do_silnika():
+    e = PlantEngine()
+    original = list(e.subsystems)
+    p = TickProfiler()
+    p.attach(e)
+    e.run(10)
+    stats = p.stats()["phases"]
+    assert set(stats) == {"tick.water", "tick.boiler", "tick.turbine", "tick.energy"}
+    assert stats["tick.boiler"]["count"] == 100
+    p.detach()
+    assert e.subsystems == original
+
+
+def test_odpiecie_zachowuje_nowe_jednostki():
+    e = PlantEngine()
+    unit = PlantEngine(e.db, "u2")
+    original = list(e.subsystems)
+    p = TickProfiler()
+    p.attach(e)
+    subsystems = e.subsystems
+    e.add_unit("u2", unit)
+    p.detach()
+    assert e.subsystems is subsystems
+    assert e.subsystems == original + [("unit:u2", unit.step)]
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from engine import PlantEngine
+from historian import Historian
+from rollup import Rollups
+
+
+def test_zgodnosc_z_surowymi_probkami():
+    e = PlantEngine()
+    e.deliver_coal(100)
+    e.set_feed(100)
+    e.set_pump(40)
+    h = Historian(e.db, capacity=100000, rollup_tags=["boiler.temp", "turbine.power_mw"])
+    h.attach(e)
+    e.run(3 * 3600, dt=0.5)
+
+    t, v = h.series("boiler.temp")
+    r = h.query("boiler.temp", 3600, 7200, 60)
+    assert len(r["start"]) == 60
+    m = (t >= 3600 + 60 * 7) & (t < 3600 + 60 * 8)
+    assert r["count"][7] == m.sum()
+    assert np.isclose(r["min"][7], v[m].min())
+    assert np.isclose(r["max"][7], v[m].max())
+    assert np.isclose(r["mean"][7], v[m].mean())
+    assert np.isclose(r["integral"][7], v[m].sum() * 0.5)
+
+    whole = h.query("turbine.power_mw", 0, 3 * 3600)
+    t, p = h.series("turbine.power_mw", 0, 3 * 3600 - 0.1)
+    assert whole["count"][0] == len(p)
+    assert np.isclose(whole["integral"][0], p.sum() * 0.5)
+
+
+def test_przyrostowe_dokladanie_blokow():
+    times = np.arange(1, 7201, dtype=float)
+    values = np.sin(times / 100.0)[:, None]
+    a = Rollups(["x"])
+    b = Rollups(["x"])
+    a.ingest(times, values)
+    for chunk in np.array_split(np.arange(len(times)), 13):
+        b.ingest(times[chunk], values[chunk])
+    for bucket in (1, 60, 3600):
+        ra = a.query("x", 0, 7200, bucket)
+        rb = b.query("x", 0, 7200, bucket)
+        for stat in ("min", "max", "mean", "integral", "count"):
+            assert np.allclose(ra[stat], rb[stat], equal_nan=True)
+
+
+def test_godzinowe_z_30_dni_od_niewyrownanego_t0():
+    times = np.arange(10.0, 31 * 86400 + 1, 10.0)
+    r = Rollups(["x"])
+    r.ingest(times, np.ones((len(times), 1)))
+    t0, t1 = 86400 + 1234.5, 31 * 86400 - 3600.0
+
+    hourly = r.query("x", t0, t1, 3600)
+    assert hourly["start"][0] == 86400 and len(hourly["start"]) == 30 * 24 - 1
+    assert not np.isnan(hourly["mean"]).any() and (hourly["count"] == 360).all()
+
+    two = r.query("x", t0, t1, 7200)
+    assert two["end"][-1] == t1
+    assert two["count"][-1] == 360 and (two["count"][:-1] == 720).all()
+
+
+def test_calosc_z_niewyrownanego_zakresu_i_zle_przedzialy():
+    times = np.arange(0.5, 7200, 0.5)
+    r = Rollups(["x"])
+    r.ingest(times, times[:, None])
+
+    whole = r.query("x", 1800.5, 5400.25)
+    assert len(whole["start"]) == 1 and whole["start"][0] == 1800
+    assert whole["count"][0] == ((times >= 1800) & (times < 5401)).sum()
+    hour = r.query("x", 3600, 7200)
+    assert len(hour["start"]) == 1 and hour["count"][0] == ((times >= 3600) & (times < 7200)).sum()
+
+    for bucket in (0.5, 1.5, 0, -60):
+        with pytest.raises(ValueError):
+            r.query("x", 0, 3600, bucket)
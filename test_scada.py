@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import scada
+
+
+def test_uruchomienie_bez_qt(tmp_path):
+    code = "import sys, scada; sys.exit(scada.main(sys.argv[1:]) or any(m.startswith('PyQt5') for m in sys.modules))"
+    out = tmp_path / "kpi.json"
+    subprocess.run([sys.executable, "-c", code, "run", "--seconds", "60", "--feed", "80", "--json", str(out)],
+                   check=True, cwd=os.path.dirname(os.path.abspath(scada.__file__)))
+    kpis = json.loads(out.read_text())
+    assert kpis["feed"] == 80 and kpis["seconds"] == 60
+    assert kpis["coal_burned_t"] > 0
+
+
+def test_scenariusz_z_pliku(tmp_path):
+    path = tmp_path / "scenariusz.json"
+    path.write_text(json.dumps({"city": 40, "mode": "charge"}))
+    s = scada.load_scenario(str(path), {"pump": 70, "city": None})
+    assert (s["city"], s["mode"], s["pump"], s["feed"]) == (40, "charge", 70, 100)
+    path.write_text(json.dumps({"reaktor": 1}))
+    with pytest.raises(ValueError):
+        scada.load_scenario(str(path))
+
+
+@pytest.mark.parametrize("flag, value", [("--dt", "0"), ("--dt", "-0.1"), ("--seconds", "nan"), ("--rtol", "0"),
+                                         ("--atol", "inf")])
+def test_niedodatnie_parametry_odrzucone(flag, value, capsys):
+    with pytest.raises(SystemExit) as exc:
+        scada.main(["run", flag, value])
+    assert exc.value.code == 2 and "dodatniej" in capsys.readouterr().err
@@ -0,0 +1,34 @@
+import json
+
+from sweep import main, scenario_grid, sweep, run_scenario
+
+
+def test_sweep_zwraca_kpi_dla_kazdego_scenariusza():
+    grid = list(scenario_grid([60, 100], [20, 50], [0]))
+    wyniki = list(sweep(grid, seconds=60, workers=2))
+
+    assert sorted(i for i, _, _ in wyniki) == list(range(len(grid)))
+    for index, scenario, kpis in wyniki:
+        assert kpis == run_scenario(grid[index], seconds=60)
+        assert kpis["coal_burned_t"] > 0
+
+
+def test_sweep_z_integratorem_i_harmonogramem(capsys):
+    grid = list(scenario_grid([100], [50], [0]))
+    (_, _, kpis), = sweep(grid, seconds=600, dt=10.0, workers=1, integrator="rk45", multirate=True)
+    assert kpis == run_scenario(grid[0], 600, 10.0, "rk45", True)
+    assert kpis != run_scenario(grid[0], 600, 10.0)
+
+    assert main(["--seconds", "600", "--dt", "10", "--workers", "1", "--integrator", "rk45", "--multirate"]) == 0
+    wynik = json.loads(capsys.readouterr().out)
+    assert wynik["integrator"] == "rk45" and wynik["multirate"] is True
+    assert wynik["coal_burned_t"] == kpis["coal_burned_t"]
+
+
+def test_kpi_z_krokow_wewnetrznych():
+    scenario = next(scenario_grid([100], [50], [0]))
+    fine = run_scenario(scenario, 600, 0.1)
+    coarse = run_scenario(scenario, 600, 60.0, "rk45")
+    assert abs(coarse["peak_pressure"] - fine["peak_pressure"]) < 0.01 * fine["peak_pressure"]
+    loose = run_scenario(scenario, 600, 60.0, "rk45", rtol=1e-3, atol=1e-4)
+    assert abs(loose["peak_pressure"] - fine["peak_pressure"]) < 0.05 * fine["peak_pressure"]
@@ -0,0 +1,37 @@
+import pytest
+
+from tags import TagDatabase
+from engine import PlantEngine, MODE_CHARGE
+
+
+def test_rejestracja_i_uchwyty():
+    db = TagDatabase()
+    h = db.register("a.x", 1.5)
+    assert db.handle("a.x") == h
+    assert db.get(h) == 1.5
+    with pytest.raises(ValueError):
+        db.register("a.x")
+
+
+def test_migawka_przywraca_stan():
+    e = PlantEngine()
+    e.deliver_coal(80)
+    e.set_feed(100)
+    e.set_pump(50)
+    e.run(5)
+    snap = e.db.snapshot()
+    temp = e.boiler.temp
+    e.run(5)
+    assert e.boiler.temp != temp
+    e.db.restore(snap)
+    assert e.boiler.temp == temp
+
+
+def test_wiele_jednostek_we_wspolnej_bazie():
+    db = TagDatabase()
+    a = PlantEngine(db, "u1")
+    b = PlantEngine(db, "u2")
+    a.set_mode(MODE_CHARGE)
+    assert a.mode == MODE_CHARGE and b.mode != MODE_CHARGE
+    assert db.as_dict()["u1.boiler.temp"] == 20.0
+    assert a.boiler.handle("temp") != b.boiler.handle("temp")
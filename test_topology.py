@@ -0,0 +1,37 @@
+import numpy as np
+
+from engine import PlantEngine
+from layout import PipeFlows, load_layout
+from topology import Energisation, reach_sets
+
+
+def test_slepe_odgalezienia():
+    # 0 -> 1 -> 2 (odbior), 1 -> 3 (slepa), 4 -> 1 (drugie zrodlo)
+    a = np.array([0, 1, 1, 4])
+    b = np.array([1, 2, 3, 1])
+    reach = reach_sets(5, a, b, np.arange(4), [0, 4], [2])
+    assert reach[0].tolist() == [0, 1]
+    assert reach[1].tolist() == [1, 3]
+
+
+def test_zbior_zmian():
+    en = Energisation(4, [np.array([0, 1]), np.array([1, 3])])
+    assert en.update(np.array([True, False])).tolist() == [0, 1]
+    assert en.update(np.array([True, False])).tolist() == []
+    assert en.update(np.array([True, True])).tolist() == [3]
+    assert en.update(np.array([False, True])).tolist() == [0]
+    assert en.energised.tolist() == [False, True, False, True]
+
+
+def test_zgodnosc_z_przeplywami():
+    e = PlantEngine()
+    for tank in e.tanks:
+        e.set_tank_flow(tank, 0, 10)
+    e.boiler.pressure = e.turbine.power_mw = 5.0
+    flows = PipeFlows(load_layout(), {"": e})
+    en = flows.energisation()
+    rng = np.random.default_rng(3)
+    for _ in range(50):
+        on = rng.random(len(flows._source_edges)) < 0.4
+        en.update(on)
+        assert np.array_equal(en.energised, flows.update(on) > 1e-6)
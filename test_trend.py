@@ -0,0 +1,34 @@
+import numpy as np
+
+from engine import PlantEngine
+from historian import Historian
+from trend import TrendTiles, minmax_per_pixel
+
+
+def test_min_max_na_piksel():
+    rnd = np.random.default_rng(1)
+    t = np.sort(rnd.uniform(0, 100, 5000))
+    v = rnd.normal(size=5000)
+    lo, hi = minmax_per_pixel(t, v, 10.0, 0.5, 100)
+    for px in (0, 37, 99):
+        m = (t >= 10.0 + px * 0.5) & (t < 10.0 + (px + 1) * 0.5)
+        assert lo[px] == v[m].min() and hi[px] == v[m].max()
+
+
+def test_przesuwanie_korzysta_z_kafelkow():
+    e = PlantEngine()
+    e.deliver_coal(50)
+    e.set_feed(100)
+    h = Historian(e.db, capacity=1 << 15)
+    h.attach(e)
+    e.run(2000)
+    tiles = TrendTiles(h)
+    lo, hi = tiles.window("boiler.temp", 1, 1000, 800)
+    assert len(lo) == 800
+    misses = tiles.misses
+    for shift in range(1, 50):
+        tiles.window("boiler.temp", 1, 1000 - shift, 800)
+    assert tiles.misses == misses
+    t, v = h.series("boiler.temp")
+    m = (t >= 250) & (t < 251)
+    assert lo[50] == v[m].min() and hi[50] == v[m].max()
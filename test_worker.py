@@ -0,0 +1,107 @@
+import time
+
+import numpy as np
+
+from alarms import AlarmEngine, plant_alarms
+from engine import PlantEngine
+from journal import JournalPlayer
+from layout import DEFAULT_LAYOUT, PipeFlows, load_layout, plant_engines
+from worker import SLOTS, SharedPlant, SimulationProcess
+
+
+def test_seqlock_i_kolejka():
+    shared = SharedPlant(3)
+    try:
+        out = np.zeros(3)
+        shared.publish(5, 0.5, np.array([1.0, 2.0, 3.0]))
+        assert shared.read(5, out) == 0.5 and out.tolist() == [1.0, 2.0, 3.0]
+        assert shared.read(4, out) is None
+        shared.publish(5 + SLOTS, 9.0, np.zeros(3))
+        assert shared.read(5, out) is None
+        shared.seq[7 % SLOTS] = 2 * 7 + 1
+        assert shared.read(7, out) is None
+
+        shared.push(3, b"\x07\x00\x00\x00")
+        shared.push(4, b"\x01\x00\x00\x00")
+        assert [(op, rec[1]) for op, rec, _ in shared.pop()] == [(3, 7), (4, 1)]
+        assert list(shared.pop()) == []
+    finally:
+        shared.close()
+
+
+def test_proces_symulacji_z_dziennikiem(tmp_path):
+    path = tmp_path / "polecenia.scj"
+    e = PlantEngine()
+    sim = SimulationProcess(e, journal_path=str(path))
+    try:
+        sim.wait_ready()
+        sim.set_speed(None)
+        sim.commands.deliver_coal(50)
+        sim.commands.set_feed(80)
+        sim.commands.set_tank_flow("w1", 10, 20)
+        deadline = time.perf_counter() + 20
+        while e.ticks < 3000 and time.perf_counter() < deadline:
+            sim.advance()
+            time.sleep(0.005)
+        sim.set_paused(True)
+        time.sleep(0.1)
+        sim.advance()
+        assert sim.advance() == 0
+    finally:
+        sim.close()
+    assert e.ticks >= 3000 and e.ticks == sim.seen and sim.skipped > 0
+    r = PlantEngine()
+    JournalPlayer(r, str(path)).fast_forward(e.ticks)
+    assert r.db.snapshot() == e.db.snapshot()
+
+
+def _czekaj(sim, warunek):
+    deadline = time.perf_counter() + 20
+    while not warunek() and time.perf_counter() < deadline:
+        sim.advance()
+        time.sleep(0.01)
+    return warunek()
+
+
+def test_obserwatorzy_w_procesie_symulacji(tmp_path):
+    e = PlantEngine()
+    layout = load_layout()
+    PipeFlows(layout, plant_engines(layout["units"], e))
+    alarms = plant_alarms(AlarmEngine(e.db)).export()
+    alarms.follow(e)
+    flows = [e.db.handle(f"pipe.{p['id']}.flow") for p in layout["pipes"]]
+    sim = SimulationProcess(e, layout["units"], layout_path=DEFAULT_LAYOUT, history_dir=str(tmp_path), alarms=True)
+    try:
+        sim.wait_ready()
+        sim.set_speed(None)
+        assert _czekaj(sim, lambda: ("wegiel_niski", "Niski stan węgla", True, False) in alarms.visible())
+        sim.ack_alarm()
+        assert _czekaj(sim, lambda: ("wegiel_niski", "Niski stan węgla", True, True) in alarms.visible())
+        sim.commands.deliver_coal(50)
+        assert _czekaj(sim, lambda: "wegiel_niski" not in [a[0] for a in alarms.visible()])
+        sim.commands.set_tank_flow("w1", 10, 20)
+        assert _czekaj(sim, lambda: any(e.db.values[h] > 0 for h in flows))
+    finally:
+        sim.close()
+    assert e.observers == [alarms.sync] and alarms.events == []
+    assert (tmp_path / "boiler.temp.00000.seg").stat().st_size > 0
+
+
+def test_profilowanie_w_procesie_symulacji():
+    e = PlantEngine()
+    sim = SimulationProcess(e)
+    try:
+        sim.wait_ready()
+        sim.set_profiling(True)
+        deadline = time.perf_counter() + 20
+        stats = None
+        while time.perf_counter() < deadline:
+            sim.advance()
+            stats = sim.profile_stats()
+            if stats and stats["phases"].get("tick.boiler", {}).get("count", 0) > 0:
+                break
+            time.sleep(0.05)
+    finally:
+        sim.close()
+    assert stats["phases"]["tick.boiler"]["count"] > 0
+    assert stats["phases"]["tick.energy"]["count"] > 0
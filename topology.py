@@ -0,0 +1,72 @@
+from collections import deque
+
+import numpy as np
+
+NO_CHANGE = np.zeros(0, dtype=np.int64)
+
+
+def reach_sets(n, a, b, owner, sources, sinks):
+    adjacency = [[] for _ in range(n)]
+    for e, (u, v) in enumerate(zip(a.tolist(), b.tolist())):
+        adjacency[u].append((v, e))
+        adjacency[v].append((u, e))
+    sinks = set(sinks)
+    reach = []
+    for s in sources:
+        seen = {s}
+        queue = deque([s])
+        edges = set()
+        while queue:
+            u = queue.popleft()
+            for v, e in adjacency[u]:
+                edges.add(e)
+                if v not in seen:
+                    seen.add(v)
+                    queue.append(v)
+        if not seen & sinks:
+            reach.append(NO_CHANGE)
+            continue
+
+        terminal = sinks | {s}
+        degree = dict.fromkeys(seen, 0)
+        for e in edges:
+            degree[a[e]] += 1
+            degree[b[e]] += 1
+        alive = set(edges)
+        leaves = [u for u in seen if degree[u] == 1 and u not in terminal]
+        while leaves:
+            u = leaves.pop()
+            for v, e in adjacency[u]:
+                if e in alive:
+                    alive.remove(e)
+                    degree[u] -= 1
+                    degree[v] -= 1
+                    if degree[v] == 1 and v not in terminal:
+                        leaves.append(v)
+        reach.append(np.unique(owner[sorted(alive)]) if alive else NO_CHANGE)
+    return reach
+
+
+class Energisation:
+    def __init__(self, pipes, reach):
+        self.reach = reach
+        self.count = np.zeros(pipes, dtype=np.int32)
+        self.energised = np.zeros(pipes, dtype=bool)
+        self.sources = np.zeros(len(reach), dtype=bool)
+
+    def update(self, states):
+        flipped = np.nonzero(states != self.sources)[0]
+        if not len(flipped):
+            return NO_CHANGE
+        count = self.count
+        touched = []
+        for s in flipped.tolist():
+            idx = self.reach[s]
+            count[idx] += 1 if states[s] else -1
+            touched.append(idx)
+        self.sources[flipped] = states[flipped]
+        candidates = np.unique(np.concatenate(touched))
+        now = count[candidates] > 0
+        changed = candidates[now != self.energised[candidates]]
+        self.energised[candidates] = now
+        return changed
@@ -0,0 +1,65 @@
+from collections import OrderedDict
+
+import numpy as np
+
+LEVELS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600, 43200, 86400)
+TILE_PX = 256
+
+
+def minmax_per_pixel(t, v, t0, spp, pixels):
+    edges = np.searchsorted(t, t0 + np.arange(pixels + 1) * spp, "left")
+    lo = np.full(pixels, np.nan)
+    hi = np.full(pixels, np.nan)
+    nonempty = edges[1:] > edges[:-1]
+    if nonempty.any():
+        starts = edges[:-1][nonempty]
+        part = v[:edges[-1]]
+        lo[nonempty] = np.minimum.reduceat(part, starts)
+        hi[nonempty] = np.maximum.reduceat(part, starts)
+    return lo, hi
+
+
+class TrendTiles:
+    def __init__(self, historian, capacity=256):
+        self.historian = historian
+        self.capacity = capacity
+        self.tiles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _compute(self, name, spp, k):
+        h = self.historian
+        t0 = k * TILE_PX * spp
+        t1 = t0 + TILE_PX * spp
+        rollups = h.rollups
+        if spp >= 1 and rollups is not None and name in rollups.index:
+            r = h.query(name, t0, t1, spp)
+            if r["count"].any():
+                return r["min"], r["max"]
+        t, v = h.series(name, t0, t1)
+        return minmax_per_pixel(t, v, t0, spp, TILE_PX)
+
+    def tile(self, name, spp, k):
+        key = (name, spp, k)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+        self.misses += 1
+        tile = self._compute(name, spp, k)
+        if (k + 1) * TILE_PX * spp <= self.historian.last_time:
+            self.tiles[key] = tile
+            if len(self.tiles) > self.capacity:
+                self.tiles.popitem(last=False)
+        return tile
+
+    def window(self, name, spp, t_end, pixels):
+        end = int(round(t_end / spp))
+        first = (end - pixels) // TILE_PX
+        last = (end - 1) // TILE_PX
+        tiles = [self.tile(name, spp, k) for k in range(first, last + 1)]
+        lo = np.concatenate([tile[0] for tile in tiles])
+        hi = np.concatenate([tile[1] for tile in tiles])
+        offset = end - pixels - first * TILE_PX
+        return lo[offset:offset + pixels], hi[offset:offset + pixels]
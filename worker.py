@@ -0,0 +1,345 @@
+import argparse
+import json
+import os
+import struct
+import subprocess
+import sys
+import time
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from clock import SimulationClock, SPEED_MAX
+from alarms import AlarmEngine, plant_alarms
+from engine import NOMINAL_DT
+from historian import HISTORY_DEVIATIONS, Historian
+from journal import ARGS, COMMANDS, OPCODES, CommandJournal, JournalPlayer, decode
+from layout import PipeFlows, load_layout, plant_engines
+from profiler import TickProfiler
+
+SLOTS = 4096
+QUEUE = 256
+RECORD_BYTES = 32
+STATS_BYTES = 1 << 16
+STATS_PERIOD = 0.5
+WORKER_PERIOD = 0.002
+START_TIMEOUT = 10.0
+
+PUBLISHED = 0
+HEAD = 1
+TAIL = 2
+STOP = 3
+READY = 4
+STATS_SEQ = 5
+HEADER_WORDS = 8
+
+SET_SPEED = 250
+SET_PAUSED = 251
+SET_PROFILING = 252
+ACK_ALARM = 253
+CONTROL = {SET_SPEED: struct.Struct("<d"), SET_PAUSED: struct.Struct("<?"), SET_PROFILING: struct.Struct("<?"),
+           ACK_ALARM: struct.Struct("<i")}
+
+
+class SharedPlant:
+    def __init__(self, n, name=None):
+        size = 8 * HEADER_WORDS + 8 * SLOTS * (n + 2) + QUEUE * RECORD_BYTES + STATS_BYTES
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        if not self.owner:
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        buf = self.shm.buf
+        self.name = self.shm.name
+        self.header = np.ndarray(HEADER_WORDS, np.uint64, buf, 0)
+        self.slots = np.ndarray((SLOTS, n + 2), np.float64, buf, 8 * HEADER_WORDS)
+        self.seq = self.slots.view(np.uint64)[:, 0]
+        self.queue = np.ndarray((QUEUE, RECORD_BYTES), np.uint8, buf, 8 * HEADER_WORDS + self.slots.nbytes)
+        self.stats = np.ndarray(STATS_BYTES, np.uint8, buf, 8 * HEADER_WORDS + self.slots.nbytes + self.queue.nbytes)
+        if self.owner:
+            self.header[:] = 0
+            self.seq[:] = 0
+
+    def publish(self, tick, t, values):
+        i = tick % SLOTS
+        row = self.slots[i]
+        self.seq[i] = 2 * tick + 1
+        row[1] = t
+        row[2:] = values
+        self.seq[i] = 2 * tick + 2
+        self.header[PUBLISHED] = tick
+
+    def read(self, tick, out):
+        i = tick % SLOTS
+        seq = self.seq[i]
+        if seq != 2 * tick + 2:
+            return None
+        row = self.slots[i]
+        t = float(row[1])
+        out[:] = row[2:]
+        if self.seq[i] != seq:
+            return None
+        return t
+
+    def push(self, opcode, payload):
+        head = int(self.header[HEAD])
+        if head - int(self.header[TAIL]) >= QUEUE:
+            raise RuntimeError("Kolejka poleceń symulacji jest pełna")
+        record = self.queue[head % QUEUE]
+        record[0] = opcode
+        record[1:1 + len(payload)] = np.frombuffer(payload, np.uint8)
+        self.header[HEAD] = head + 1
+
+    def pop(self):
+        tail = int(self.header[TAIL])
+        while tail < int(self.header[HEAD]):
+            record = self.queue[tail % QUEUE].tobytes()
+            tail += 1
+            self.header[TAIL] = tail
+            yield record[0], record, 1
+
+    def publish_stats(self, stats):
+        data = json.dumps(stats).encode()[:STATS_BYTES - 4]
+        seq = int(self.header[STATS_SEQ])
+        self.header[STATS_SEQ] = seq + 1
+        self.stats[:4] = np.frombuffer(struct.pack("<I", len(data)), np.uint8)
+        self.stats[4:4 + len(data)] = np.frombuffer(data, np.uint8)
+        self.header[STATS_SEQ] = seq + 2
+
+    def read_stats(self):
+        seq = int(self.header[STATS_SEQ])
+        if not seq or seq % 2:
+            return None
+        size = struct.unpack("<I", self.stats[:4].tobytes())[0]
+        data = self.stats[4:4 + size].tobytes()
+        if int(self.header[STATS_SEQ]) != seq:
+            return None
+        return json.loads(data)
+
+    def close(self):
+        del self.header, self.slots, self.seq, self.queue, self.stats
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _remote(name):
+    opcode = OPCODES[name]
+    enum = COMMANDS[opcode][2]
+
+    def command(self, *args):
+        if enum is not None:
+            args = (enum.index(args[0]),) + args[1:]
+        self.shared.push(opcode, ARGS[opcode].pack(*args))
+
+    command.__name__ = name
+    return command
+
+
+class RemoteCommands:
+    def __init__(self, shared):
+        self.shared = shared
+
+    def set_speed(self, speed):
+        self.shared.push(SET_SPEED, CONTROL[SET_SPEED].pack(-1.0 if speed is SPEED_MAX else speed))
+
+    def set_paused(self, paused):
+        self.shared.push(SET_PAUSED, CONTROL[SET_PAUSED].pack(paused))
+
+    def set_profiling(self, on):
+        self.shared.push(SET_PROFILING, CONTROL[SET_PROFILING].pack(on))
+
+    def ack_alarm(self, index=-1):
+        self.shared.push(ACK_ALARM, CONTROL[ACK_ALARM].pack(index))
+
+
+for _name, _, _ in COMMANDS:
+    setattr(RemoteCommands, _name, _remote(_name))
+
+
+def run_worker(name, units, dt, journal_path=None, replay_path=None, layout_path=None, history_dir=None,
+               alarms=False, tags=None):
+    parent = os.getppid()
+    engines = plant_engines(units)
+    engine = engines[units[0]]
+    if layout_path:
+        PipeFlows(load_layout(layout_path), engines).attach(engine)
+    target = engine
+    if replay_path:
+        JournalPlayer(engine, replay_path).attach()
+    elif journal_path:
+        target = CommandJournal(engine, journal_path, dt)
+    alarm_engine = None
+    if alarms:
+        alarm_engine = plant_alarms(AlarmEngine(engine.db)).export()
+        alarm_engine.attach(engine)
+    historian = None
+    if history_dir:
+        historian = Historian(engine.db, history_dir, deviations=HISTORY_DEVIATIONS)
+        historian.attach(engine)
+    if tags is not None and tags != len(engine.db):
+        raise RuntimeError("Baza tagów procesu symulacji nie pasuje do GUI")
+    shared = SharedPlant(len(engine.db), name)
+    header = shared.header
+    values = np.frombuffer(engine.db.values)
+
+    def stopped():
+        if os.getppid() != parent:
+            header[STOP] = 1
+        return header[STOP]
+
+    def publish(t):
+        shared.publish(engine.ticks, t, values)
+
+    publish(engine.time)
+    engine.observers.append(publish)
+    clock = SimulationClock(engine, dt)
+    profiler = None
+    header[READY] = 1
+    last = time.perf_counter()
+    reported = last
+    try:
+        while not stopped():
+            for opcode, record, pos in shared.pop():
+                if opcode == SET_SPEED:
+                    speed = CONTROL[SET_SPEED].unpack_from(record, pos)[0]
+                    clock.set_speed(SPEED_MAX if speed < 0 else speed)
+                elif opcode == SET_PAUSED:
+                    clock.set_paused(CONTROL[SET_PAUSED].unpack_from(record, pos)[0])
+                elif opcode == SET_PROFILING:
+                    if CONTROL[SET_PROFILING].unpack_from(record, pos)[0]:
+                        if profiler is None:
+                            profiler = TickProfiler()
+                            profiler.attach(engine)
+                    elif profiler is not None:
+                        profiler.detach()
+                        profiler = None
+                elif opcode == ACK_ALARM:
+                    if alarm_engine is not None:
+                        index = CONTROL[ACK_ALARM].unpack_from(record, pos)[0]
+                        alarm_engine.ack(None if index < 0 else alarm_engine.names[index])
+                else:
+                    command, args = decode(opcode, record, pos)
+                    getattr(target, command)(*args)
+            now = time.perf_counter()
+            clock.advance(now - last)
+            last = now
+            if profiler is not None and now - reported >= STATS_PERIOD:
+                shared.publish_stats(profiler.stats())
+                reported = now
+            time.sleep(WORKER_PERIOD)
+    finally:
+        if target is not engine:
+            target.close()
+        if historian is not None:
+            historian.close()
+        del values
+        shared.close()
+
+
+class SimulationProcess:
+    def __init__(self, engine, units=("",), dt=NOMINAL_DT, journal_path=None, replay_path=None, layout_path=None,
+                 history_dir=None, alarms=False):
+        self.engine = engine
+        self.dt = dt
+        self.tags = len(engine.db)
+        self.shared = SharedPlant(self.tags)
+        self.commands = RemoteCommands(self.shared)
+        self.seen = 0
+        self.skipped = 0
+        self.last_steps = 0
+        cmd = [sys.executable, os.path.abspath(__file__), self.shared.name, "--dt", repr(dt), "--tags", str(self.tags),
+               "--units", *units]
+        for flag, path in (("--journal", journal_path), ("--replay", replay_path), ("--layout", layout_path),
+                           ("--history", history_dir)):
+            if path:
+                cmd += [flag, os.path.abspath(path)]
+        if alarms:
+            cmd.append("--alarms")
+        self.process = subprocess.Popen(cmd)
+        self._finalizer = weakref.finalize(self, _shutdown, self.process, self.shared)
+
+    @property
+    def sim_time(self):
+        return self.engine.time
+
+    @property
+    def ready(self):
+        return bool(self.shared.header[READY])
+
+    def wait_ready(self, timeout=START_TIMEOUT):
+        deadline = time.perf_counter() + timeout
+        while not self.ready:
+            if time.perf_counter() > deadline or self.process.poll() is not None:
+                raise RuntimeError("Proces symulacji nie wystartował")
+            time.sleep(0.005)
+
+    def set_speed(self, speed):
+        self.commands.set_speed(speed)
+
+    def set_paused(self, paused):
+        self.commands.set_paused(paused)
+
+    def set_profiling(self, on):
+        self.commands.set_profiling(on)
+
+    def ack_alarm(self, index=-1):
+        self.commands.ack_alarm(index)
+
+    def profile_stats(self):
+        return self.shared.read_stats()
+
+    def advance(self, real_elapsed=0.0):
+        shared = self.shared
+        engine = self.engine
+        if not self.ready or int(shared.header[PUBLISHED]) <= self.seen:
+            self.last_steps = 0
+            return 0
+        values = np.frombuffer(engine.db.values)[:self.tags]
+        t = None
+        while t is None:
+            latest = int(shared.header[PUBLISHED])
+            t = shared.read(latest, values)
+        del values
+        engine.time = t
+        engine.ticks = latest
+        self.last_steps = latest - self.seen
+        self.skipped += self.last_steps - 1
+        self.seen = latest
+        for observer in engine.observers:
+            observer(t)
+        return self.last_steps
+
+    def close(self):
+        self._finalizer()
+
+
+def _shutdown(process, shared):
+    shared.header[STOP] = 1
+    try:
+        process.wait(START_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    shared.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Proces symulacji elektrociepłowni publikujący stan w pamięci współdzielonej.")
+    parser.add_argument("name", help="nazwa bloku pamięci współdzielonej")
+    parser.add_argument("--dt", type=float, default=NOMINAL_DT)
+    parser.add_argument("--units", nargs="*", default=[""])
+    parser.add_argument("--journal", help="zapisuj polecenia operatora do dziennika")
+    parser.add_argument("--replay", help="odtwarzaj polecenia z dziennika")
+    parser.add_argument("--layout", help="licz przepływy w rurach według układu")
+    parser.add_argument("--history", help="archiwizuj tagi w katalogu")
+    parser.add_argument("--alarms", action="store_true", help="oceniaj alarmy instalacji")
+    parser.add_argument("--tags", type=int, help="oczekiwana liczba tagów")
+    args = parser.parse_args(argv)
+    run_worker(args.name, args.units or [""], args.dt, args.journal, args.replay, args.layout, args.history,
+               args.alarms, args.tags)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())